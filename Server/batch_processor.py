@@ -0,0 +1,104 @@
+# batch_processor.py
+# 녹화된 센서 데이터를 한 번에 재처리하기 위한 NumPy 벡터화 버전입니다.
+# (서버 실행에는 필요 없으며, RMS_DEAD_ZONE / RMS_MAX_SCORE 재조정 시 사용)
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import config
+
+ACCEL_SCALE_FACTOR = config.ACCEL_SCALE_FACTOR
+G_CONSTANT = config.G_CONSTANT
+RMS_N_SAMPLES = config.RMS_N_SAMPLES
+
+
+def calculate_movement_a_batch(accel):
+    """
+    (N, 3) raw 가속도 배열(ax, ay, az)로부터 (movement_a, magnitude) 배열을 계산합니다.
+    sensor_processor.calculate_movement_a와 같은 순서로 연산합니다.
+    """
+    accel = np.asarray(accel)
+    if accel.ndim != 2 or accel.shape[1] != 3:
+        raise ValueError(f"accel은 (N, 3) 배열이어야 합니다: {accel.shape}")
+
+    # 1. 가속도 성분 계산 (g 단위)
+    accel_g = accel.astype(np.float64) / ACCEL_SCALE_FACTOR
+
+    # 2. 가속도 벡터 크기 계산 (magnitude_g)
+    sum_of_squares = accel_g[:, 0] ** 2 + accel_g[:, 1] ** 2 + accel_g[:, 2] ** 2
+    magnitude_g = np.sqrt(sum_of_squares)
+
+    # 3. 순수한 운동 가속도 (Movement_A) 계산
+    movement_a = np.abs(magnitude_g - G_CONSTANT)
+
+    return movement_a, magnitude_g
+
+
+def calculate_rms_batch(movement_a, n_samples=RMS_N_SAMPLES):
+    """
+    movement_a 배열에 대한 rolling RMS를 계산합니다.
+    sensor_processor.calculate_rms_score를 샘플마다 호출한 결과와 같습니다.
+    (처음 n_samples-1개는 버퍼가 덜 찬 상태이므로 현재까지의 샘플 수로 나눕니다.)
+    """
+    movement_a = np.asarray(movement_a, dtype=np.float64)
+    count = len(movement_a)
+    if count == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    sq = movement_a * movement_a
+    window_sum = np.empty(count, dtype=np.float64)
+    window_len = np.empty(count, dtype=np.float64)
+
+    # 버퍼가 덜 찬 앞부분 (n_samples-1개 이하)만 누적 합을 사용합니다.
+    head = min(count, n_samples - 1)
+    np.cumsum(sq[:head], out=window_sum[:head])
+    window_len[:head] = np.arange(1, head + 1)
+
+    # 💡 가득 찬 윈도우는 자기 샘플만 더합니다. (전체 누적 합의 차이는 스트림이 길수록 반올림 오차가 커짐)
+    if count > head:
+        window_sum[head:] = sliding_window_view(sq, n_samples).sum(axis=1)
+        window_len[head:] = n_samples
+
+    return np.sqrt(np.maximum(window_sum, 0.0) / window_len)
+
+
+def verify_against_scalar(movement_a, n_samples=RMS_N_SAMPLES):
+    """
+    calculate_rms_batch 결과를 샘플 단위 RollingWindow(sensor_processor와 같은 RMS 버퍼)와 비교해
+    최대 상대 오차를 반환합니다.
+    """
+    from rolling_stats import RollingWindow
+
+    movement_a = np.asarray(movement_a, dtype=np.float64)
+    batch = calculate_rms_batch(movement_a, n_samples)
+    window = RollingWindow(n_samples)
+    scalar = np.empty(len(movement_a), dtype=np.float64)
+    for i, value in enumerate(movement_a.tolist()):
+        window.push(value)
+        scalar[i] = window.rms()
+    scale = np.maximum(np.abs(scalar), 1e-12)
+    return float(np.max(np.abs(batch - scalar) / scale)) if len(scalar) else 0.0
+
+
+def process_batch(accel, n_samples=RMS_N_SAMPLES):
+    """
+    (N, 3) int16 raw 가속도 배열을 받아 (movement_a, magnitude, rms) 배열을 반환합니다.
+    """
+    movement_a, magnitude_g = calculate_movement_a_batch(accel)
+    rms = calculate_rms_batch(movement_a, n_samples)
+    return movement_a, magnitude_g, rms
+
+
+# =====================================================
+# ✅ 독립 실행: 긴 스트림에서 배치 결과가 샘플 단위 계산과 일치하는지 확인
+# =====================================================
+if __name__ == "__main__":
+    import sys
+
+    VERIFY_TOLERANCE = 1e-9
+    rng = np.random.default_rng(42)
+    # 오래 흔든 구간 뒤에 정지 구간 (누적 오차가 가장 크게 드러나는 형태)
+    active = np.abs(rng.normal(1.5, 0.8, 200_000))
+    idle = np.abs(rng.normal(0.0, 0.01, 20_000))
+    error = verify_against_scalar(np.concatenate([active, idle]))
+    print(f"[VERIFY] 220000 샘플, 최대 상대 오차 {error:.3e} (허용 {VERIFY_TOLERANCE:.0e})")
+    sys.exit(0 if error <= VERIFY_TOLERANCE else 1)
@@ -0,0 +1,91 @@
+# ble_protocol.py
+
+import json
+import struct
+import config
+
+# --- 바이너리 페이로드 형식 (config.py 주석 참고) ---
+BINARY_MAGIC = config.BLE_BINARY_MAGIC
+HEADER = struct.Struct("<BBHI")
+SAMPLE_FIELDS = 6 # ax, ay, az, gx, gy, gz
+SAMPLE_SIZE = SAMPLE_FIELDS * 2
+
+# 샘플 수별로 미리 컴파일한 Struct 캐시 (N은 최대 255)
+_sample_structs = {}
+
+# --- 전역 상태 변수 ---
+# 💡 보드(sender)별 마지막 seq 번호와 누락된 알림 수
+_last_seq = {}
+dropped_packets = 0
+
+
+def _samples_struct(count):
+    s = _sample_structs.get(count)
+    if s is None:
+        s = struct.Struct(f"<{count * SAMPLE_FIELDS}h")
+        _sample_structs[count] = s
+    return s
+
+
+def is_binary(data):
+    return len(data) > 0 and data[0] == BINARY_MAGIC
+
+
+def decode_binary(data):
+    """
+    바이너리 알림을 해석하여 (seq, 보드 타임스탬프 ms, 샘플 수, 평탄화된 int16 튜플)을 반환합니다.
+    샘플 i의 ax, ay, az는 values[i*6], values[i*6+1], values[i*6+2] 입니다.
+    """
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise ValueError(f"바이너리 페이로드가 너무 짧습니다 ({len(view)} bytes)")
+
+    _, count, seq, device_ms = HEADER.unpack_from(view)
+    expected = HEADER.size + count * SAMPLE_SIZE
+    if len(view) != expected:
+        raise ValueError(f"바이너리 페이로드 길이 불일치: {len(view)} != {expected} (N={count})")
+
+    values = _samples_struct(count).unpack_from(view, HEADER.size)
+    return seq, device_ms, count, values
+
+
+def decode_json(data):
+    """기존 JSON 알림을 (None, None, 1, (ax, ay, az, gx, gy, gz)) 형태로 변환합니다."""
+    raw_data = json.loads(bytes(data).decode("utf-8"))
+    values = (
+        raw_data.get('ax', 0), raw_data.get('ay', 0), raw_data.get('az', 0),
+        raw_data.get('gx', 0), raw_data.get('gy', 0), raw_data.get('gz', 0),
+    )
+    return None, None, 1, values
+
+
+def decode_notification(data):
+    """알림 형식을 자동 판별(바이너리 / JSON)하여 해석합니다."""
+    if is_binary(data):
+        return decode_binary(data)
+    return decode_json(data)
+
+
+def track_sequence(sender, seq):
+    """seq 번호 차이로 누락된 알림 수를 누적하고, 이번 알림의 누락 개수를 반환합니다."""
+    global dropped_packets
+    if seq is None:
+        return 0
+
+    prev = _last_seq.get(sender)
+    _last_seq[sender] = seq
+    if prev is None:
+        return 0
+
+    gap = (seq - prev - 1) & 0xFFFF
+    if gap > 0x8000: # 순서 뒤바뀜/보드 재시작은 누락으로 세지 않음
+        return 0
+    dropped_packets += gap
+    return gap
+
+
+def encode_binary(seq, device_ms, samples):
+    """테스트/리플레이용: (ax, ay, az, gx, gy, gz) 샘플 목록을 바이너리 페이로드로 만듭니다."""
+    count = len(samples)
+    flat = [v for sample in samples for v in sample]
+    return HEADER.pack(BINARY_MAGIC, count, seq & 0xFFFF, device_ms & 0xFFFFFFFF) + _samples_struct(count).pack(*flat)
@@ -0,0 +1,105 @@
+# calibration.py
+# RMS Score 스트림으로 Dead Zone / MAX Score를 온라인 보정합니다.
+#
+# - 정지 노이즈: RMS < CALIB_IDLE_GATE인 샘플의 CALIB_NOISE_QUANTILE 분위수 x CALIB_DEAD_ZONE_MARGIN -> Dead Zone
+# - 최대 흔들기: RMS >= CALIB_IDLE_GATE인 샘플의 CALIB_PEAK_QUANTILE 분위수 -> MAX Score
+# - ERROR_SCORE_THRESHOLD 이상은 이상치(anomaly)로 세고 추정에서 제외합니다.
+# - 보드 전체(프로세스 수명)와 세션(BLE 연결 1번) 단위로 따로 추정합니다.
+# 💡 분위수는 rolling_stats.P2Quantile(마커 5개)로 추정하므로 샘플을 쌓아 두지 않습니다. (메모리/갱신 O(1))
+
+import logging
+import config
+import log_utils
+from rolling_stats import P2Quantile
+
+log = log_utils.get_logger(__name__)
+
+
+class QuantilePair:
+    """정지 노이즈 / 최대 흔들기 분위수 추정기 한 쌍 (보드 또는 세션 1개 분량)"""
+
+    def __init__(self):
+        self.noise = P2Quantile(config.CALIB_NOISE_QUANTILE)
+        self.peak = P2Quantile(config.CALIB_PEAK_QUANTILE)
+        self.anomalies = 0
+
+    def reset(self):
+        self.noise.reset()
+        self.peak.reset()
+        self.anomalies = 0
+
+    @property
+    def ready(self):
+        min_samples = config.CALIB_MIN_SAMPLES
+        return self.noise.count >= min_samples and self.peak.count >= min_samples
+
+    def estimate(self):
+        """(dead_zone, max_score) 추정값. 샘플이 부족한 쪽은 현재 config 값을 사용합니다."""
+        min_samples = config.CALIB_MIN_SAMPLES
+        dead_zone = config.RMS_DEAD_ZONE
+        max_score = config.RMS_MAX_SCORE
+        if self.noise.count >= min_samples:
+            dead_zone = self.noise.value() * config.CALIB_DEAD_ZONE_MARGIN
+        if self.peak.count >= min_samples:
+            max_score = self.peak.value()
+        return dead_zone, max(max_score, dead_zone * 2.0) # 활성 범위가 0 이하가 되지 않도록
+
+
+class RmsCalibrator:
+    """
+    보드 1개의 RMS Score 보정기. SensorState.calculate_rms_score에서 샘플마다 add()를 호출합니다.
+    on_session_ready(calibrator): 이번 세션 추정이 처음 유효해졌을 때 호출 (main_server의 자동 적용 등)
+    """
+
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.board = QuantilePair() # 프로세스 수명 동안 누적
+        self.session = QuantilePair() # BLE 연결마다 새로 시작
+        self.session_ready = False
+        self.on_session_ready = None
+        self._gate = config.CALIB_IDLE_GATE
+        self._error_threshold = config.ERROR_SCORE_THRESHOLD
+
+    def start_session(self):
+        """새 연결(세션) 시작: 세션 추정만 비웁니다. (보드 누적 추정은 유지)"""
+        self.session.reset()
+        self.session_ready = False
+
+    def add(self, rms):
+        if rms >= self._error_threshold:
+            self.board.anomalies += 1
+            self.session.anomalies += 1
+            log_utils.log_once_per(log, logging.WARNING, "[CALIB] [%s] 이상치 RMS %.4f (세션 누적 %d개, 보정에서 제외)",
+                                   self.device_id, rms, self.session.anomalies, key=self.device_id)
+            return
+        if rms < self._gate:
+            self.board.noise.add(rms)
+            self.session.noise.add(rms)
+        else:
+            self.board.peak.add(rms)
+            self.session.peak.add(rms)
+
+        if not self.session_ready and self.session.ready:
+            self.session_ready = True
+            dead_zone, max_score = self.session.estimate()
+            log.info("[CALIB] [%s] 세션 보정 완료: Dead Zone %.4f (현재 %s), MAX Score %.4f (현재 %s)",
+                     self.device_id, dead_zone, config.RMS_DEAD_ZONE, max_score, config.RMS_MAX_SCORE)
+            if self.on_session_ready is not None:
+                self.on_session_ready(self)
+
+    def report(self):
+        """{"board": {...}, "session": {...}} 추정 요약"""
+        result = {}
+        for scope, pair in (("board", self.board), ("session", self.session)):
+            dead_zone, max_score = pair.estimate()
+            result[scope] = {
+                "ready": pair.ready,
+                "noise_samples": pair.noise.count,
+                "peak_samples": pair.peak.count,
+                "noise_quantile": pair.noise.value(),
+                "peak_quantile": pair.peak.value(),
+                "dead_zone": dead_zone,
+                "max_score": max_score,
+                "anomalies": pair.anomalies,
+            }
+        return result
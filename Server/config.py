@@ -4,18 +4,68 @@
 BLE_SERVICE_UUID = "12345678-1234-1234-1234-1234567890ab"
 BLE_CHARACTERISTIC_UUID = "abcd1234-5678-90ab-cdef-1234567890ab"
 BLE_TARGET_NAME = "RUNNIG_BOARD_1" # <------------- 변경필요
+# ⭐️ 동시에 연결할 보드 목록. 순서가 TCP 메시지의 speeds 채널 순서가 됩니다.
+BLE_TARGET_NAMES = ["RUNNIG_BOARD_1", "RUNNIG_BOARD_2"]
+
+# --- BLE 바이너리 페이로드 설정 (JSON과 자동 구분) ---
+# 형식 (little-endian): magic(u8) | 샘플 수 N(u8) | seq(u16) | 보드 타임스탬프 ms(u32) | N x (ax, ay, az, gx, gy, gz : int16)
+BLE_BINARY_MAGIC = 0xA5 # JSON은 항상 '{'(0x7B)로 시작하므로 충돌하지 않음
+BLE_SAMPLE_INTERVAL_MS = 45 # 보드의 샘플링 주기 (한 알림 안의 샘플 시각 추정에 사용)
 
 # --- TCP/IP 설정 ---
 TCP_HOST = '127.0.0.1'  
 TCP_PORT = 65432
 MAX_TCP_CONNECTIONS = 1
-TCP_SEND_INTERVAL_MS = 30 # 전송 주기 (ms)
+TCP_SEND_INTERVAL_MS = 30 # 전송 주기 (ms) - "interval" 모드에서만 사용
+
+# ⭐️ 전송 방식: "event" = 새 샘플이 처리될 때마다 즉시 전송, "interval" = TCP_SEND_INTERVAL_MS 주기로 전송
+TCP_PUBLISH_MODE = "event"
+TCP_MAX_SEND_RATE_HZ = 0 # event 모드 최대 전송 빈도 (0 = 제한 없음)
+TCP_KEEPALIVE_MS = 500 # 새 샘플이 없을 때 마지막 속도를 재전송하는 주기 (ms)
+TCP_WRITE_BUFFER_LIMIT = 64 * 1024 # 송신 버퍼가 이 크기(bytes)를 넘게 밀린 클라이언트는 연결 해제
+# ⭐️ 바이너리 프레임 (common/game_protocol.py): hello로 버전 2를 요청한 게임에게만 바이너리로 보냅니다.
+#    False면 hello에 버전 1(JSON 라인)로 답합니다.
+TCP_BINARY_ENABLED = True
+# ⭐️ UDP 전송 (최신 값만 의미 있는 속도 스트림용): 게임이 UDP로 구독하면 바이너리 SPEED 프레임을 데이터그램으로 보냅니다.
+#    재전송/순서 대기가 없어 Wi-Fi에서 패킷이 빠져도 다음 값이 밀리지 않습니다. (게임은 seq로 오래된 프레임을 버림)
+#    UDP_HOST: 구독을 받을 주소. None이면 TCP_HOST와 같음.
+#    게임을 다른 PC에서 (Wi-Fi로) 실행하면 "0.0.0.0"(모든 인터페이스) 또는 이 PC의 IP로 지정하세요. (실행 시 --udp-host로도 지정 가능)
+UDP_ENABLED = True
+UDP_HOST = None
+UDP_PORT = 65432 # TCP와 같은 번호 (프로토콜이 달라 충돌 없음)
+MAX_UDP_SUBSCRIBERS = 4
+UDP_SUBSCRIBER_TIMEOUT_MS = 3000 # 이 시간 동안 구독(heartbeat)이 없으면 전송 중단
+# ⭐️ 지연 추적: 속도 메시지에 "t": [BLE 수신, RMS 계산, 전송] 시각(서버 monotonic ms)을 붙입니다.
+TRACE_ENABLED = True
+
+# --- 로그 설정 (common/log_utils.py) ---
+LOG_LEVEL = "INFO" # 기본 레벨: DEBUG / INFO / WARNING / ERROR
+# 모듈별 레벨 (예: 샘플별 진단 출력을 보려면 "main_server": "DEBUG")
+LOG_MODULE_LEVELS = {
+    "main_server": "INFO",
+    "speed_control": "INFO",
+    "sensor_processor": "INFO",
+}
+LOG_FILE = None # 파일로도 남기려면 경로 지정 (예: "server.log")
+
+# --- 센서 녹화/재생 설정 (sensor_log.py) ---
+RECORD_ENABLED = False # True면 모든 BLE 알림을 로그 파일로 저장 (--record 옵션과 동일)
+RECORD_DIR = "recordings" # 로그 저장 폴더 (CWD 기준)
+LOG_INDEX_INTERVAL_MS = 1000 # 시간 인덱스 간격 (ms)
 
 # --- 센서 계산 상수 (sensor_processor.py에서 사용) ---
 ACCEL_SCALE_FACTOR = 4096.0
 G_CONSTANT = 1.0 
 RMS_N_SAMPLES = 8 # RMS 계산에 사용할 샘플 개수 (N)
 
+# ⭐️ 추가 통계 윈도우 (기본 RMS 윈도우와 동시에 O(1)로 갱신됨)
+# 형식: {이름: ("samples", 샘플 수) 또는 ("ms", 밀리초)}
+RMS_WINDOWS = {
+    "long": ("samples", 256),
+    "1s": ("ms", 1000),
+}
+RMS_WINDOW_MS_CAPACITY = 1024 # ms 단위 윈도우가 미리 할당할 최대 샘플 수
+
 # --- 속도 제어 상수 (main_server.py에서 사용) ---
 TARGET_MAX_SPEED = 7.04 
 
@@ -30,4 +80,46 @@ RMS_ACTIVE_RANGE = RMS_MAX_SCORE - RMS_DEAD_ZONE
 ACCELERATION_RATE = 1.5 
 
 # 💡 센서 오버플로우/비정상 값 처리 임계값 추가
-ERROR_SCORE_THRESHOLD = 50.0
\ No newline at end of file
+ERROR_SCORE_THRESHOLD = 50.0
+
+# --- RMS 자동 보정 (calibration.py) ---
+# 보드/세션별로 정지 노이즈와 최대 흔들기 RMS 분위수를 P² 알고리즘으로 추정합니다. (메모리 O(1))
+CALIB_ENABLED = True
+CALIB_IDLE_GATE = 0.2 # 이 값 미만 RMS는 정지(노이즈) 샘플, 이상은 흔들기 샘플로 분류
+CALIB_NOISE_QUANTILE = 0.95 # 정지 노이즈 분위수 -> Dead Zone 기준
+CALIB_PEAK_QUANTILE = 0.90 # 흔들기 분위수 -> MAX Score 기준
+CALIB_DEAD_ZONE_MARGIN = 1.2 # Dead Zone = 노이즈 분위수 x 여유 배율
+CALIB_MIN_SAMPLES = 40 # 추정이 유효해지는 최소 샘플 수 (정지/흔들기 각각, 약 2초)
+CALIB_AUTO_APPLY = False # True면 플레이어 보드(첫 번째)의 세션 추정값을 RMS_DEAD_ZONE / RMS_MAX_SCORE에 적용
+# --- 속도 필터 체인 (speed_filters.py) ---
+# 파라미터 값이 문자열이면 위의 같은 이름 상수 값을 사용합니다. (튜닝 시 상수만 바꿔도 반영)
+# 부스에서 A/B 비교: SPEED_FILTER_CHAIN을 프리셋 이름으로 바꾸거나 서버를 --filter 이름 으로 실행
+SPEED_FILTER_RATE_HZ = 1000.0 / BLE_SAMPLE_INTERVAL_MS # 필터 단계가 호출되는 대략적인 빈도 (one_euro 기본값)
+
+# 에러 필터 -> Dead Zone -> 활성 범위 제한 -> 0 ~ TARGET_MAX_SPEED 선형 변환 (공통 앞부분)
+_SPEED_MAPPING = [
+    ("threshold", {"limit": "ERROR_SCORE_THRESHOLD"}),
+    ("dead_zone", {"zone": "RMS_DEAD_ZONE"}),
+    ("clamp", {"low": 0.0, "high": "RMS_ACTIVE_RANGE"}),
+    ("linear", {"divisor": "RMS_ACTIVE_RANGE", "scale": "TARGET_MAX_SPEED"}),
+]
+_SPEED_LIMIT = [("clamp", {"low": 0.0, "high": "TARGET_MAX_SPEED"})]
+
+SPEED_FILTER_PRESETS = {
+    # 기존 동작: 가속은 ACCELERATION_RATE배, 감속은 즉시
+    "legacy": _SPEED_MAPPING + [("momentum", {"up": "ACCELERATION_RATE"})] + _SPEED_LIMIT,
+    # 가속/감속 모두 지수 평균으로 부드럽게
+    "ema": _SPEED_MAPPING + [("ema", {"alpha": 0.35})] + _SPEED_LIMIT,
+    # 천천히 흔들 때는 떨림 제거, 빠르게 바뀔 때는 지연 최소화
+    "one_euro": _SPEED_MAPPING + [("one_euro", {"min_cutoff": 1.0, "beta": 0.05, "d_cutoff": 1.0})] + _SPEED_LIMIT,
+    # 기존 모멘텀 + 샘플당 변화량 제한 (급정지/급가속 완화)
+    "slew": _SPEED_MAPPING + [("momentum", {"up": "ACCELERATION_RATE"}), ("slew", {"up": 0.8, "down": 1.2})] + _SPEED_LIMIT,
+    # 약한 흔들기에도 반응하도록 앞쪽을 키운 곡선 (0~1로 정규화 -> 곡선 -> 속도)
+    "lut": _SPEED_MAPPING[:3] + [
+        ("linear", {"divisor": "RMS_ACTIVE_RANGE"}),
+        ("lut", {"points": [(0.0, 0.0), (0.1, 0.25), (0.3, 0.6), (0.6, 0.85), (1.0, 1.0)]}),
+        ("linear", {"scale": "TARGET_MAX_SPEED"}),
+        ("momentum", {"up": "ACCELERATION_RATE"}),
+    ] + _SPEED_LIMIT,
+}
+SPEED_FILTER_CHAIN = "legacy" # 프리셋 이름 또는 단계 목록
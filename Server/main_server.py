@@ -1,208 +1,624 @@
 # main_server.py (메인 서버 파일)
 
+import argparse
 import asyncio
+import functools
+import os
+import sys
 from bleak import BleakClient, BleakScanner
 import json
+import logging
 import socket
-import threading
 import time
 
+# 💡 공용 모듈(common/log_utils.py) 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import log_utils
+import game_protocol
+
 # ⭐⭐ 분리된 모듈 import ⭐⭐
 import config 
 import sensor_processor as sp 
+import ble_protocol as bp
+import sensor_log
+import speed_control
 
+log = log_utils.get_logger("main_server")
 
 # --- 전역 상태 변수 (통신 및 제어 관련만 유지) ---
-tcp_clients = [] 
-PREVIOUS_APPLIED_SPEED = 0.0 
+# 💡 모든 상태는 하나의 asyncio 이벤트 루프에서만 접근하므로 락이 필요 없습니다.
+tcp_clients = set() # 접속한 클라이언트의 StreamWriter
+binary_clients = set() # hello로 바이너리 프레임(버전 2)을 협상한 클라이언트 (tcp_clients의 부분집합)
+udp_subscribers = {} # UDP 구독 주소 (host, port) -> 구독 만료 시각 (time.monotonic)
+udp_transport = None # UDP 서버 소켓 (asyncio.DatagramTransport)
+last_update = None # 마지막으로 보낸 speed_control.SpeedUpdate (새 UDP 구독자에게 바로 전송)
+clients_event = None # 클라이언트가 1명 이상이면 set (asyncio.Event)
+sample_event = None # 새 샘플이 처리되면 set (asyncio.Event)
+# 💡 보드별 처리/모멘텀 상태 (config.BLE_TARGET_NAMES 순서 = 채널 순서)
+board_states = sp.init_states(config.BLE_TARGET_NAMES)
+recorder = None # 녹화 중이면 sensor_log.SensorLogWriter
+
+
+def apply_calibration(calibrator):
+    """(CALIB_AUTO_APPLY) 플레이어 보드의 세션 보정값을 Dead Zone / MAX Score에 적용하고 필터 체인을 다시 만듭니다."""
+    dead_zone, max_score = calibrator.session.estimate()
+    config.RMS_DEAD_ZONE = dead_zone
+    config.RMS_MAX_SCORE = max_score
+    config.RMS_ACTIVE_RANGE = max_score - dead_zone
+    speed_control.configure()
+    log.info("[CALIB] 보정값 적용: RMS_DEAD_ZONE=%.4f, RMS_MAX_SCORE=%.4f", dead_zone, max_score)
+
+
+# 💡 속도 필터 체인은 보드 공용이므로 플레이어 보드(speed 채널)의 보정값만 적용합니다.
+if config.CALIB_AUTO_APPLY and board_states[0].calibration is not None:
+    board_states[0].calibration.on_session_ready = apply_calibration
 
-# --- 2. BLE 콜백 함수 --- (계산 함수만 변경)
-def ble_data_callback(sender, data):
-    """BLE로부터 데이터를 수신하여 Movement_A를 계산하고 RMS 버퍼에 추가합니다."""
+# --- 2. BLE 콜백 함수 --- (JSON / 바이너리 자동 판별)
+def ble_data_callback(sender, data, state=None, arrival_ms=None):
+    """BLE로부터 데이터를 수신하여 Movement_A를 계산하고 해당 보드의 RMS 버퍼에 추가합니다.
+    한 알림에 샘플이 여러 개(바이너리 배치) 들어있으면 순서대로 모두 처리합니다.
+    state: 보드별 SensorState (functools.partial로 지정, 생략 시 첫 번째 보드)
+    arrival_ms: 도착 시각 (재생 모드에서 녹화된 시각을 넘김, 생략 시 현재 시각)"""
+    if state is None:
+        state = board_states[0]
+    recv_ms = time.monotonic() * 1000.0
     try:
-        text = data.decode("utf-8")
-        raw_data = json.loads(text)
+        if recorder is not None:
+            recorder.write(state.device_id, data)
+        if arrival_ms is None:
+            arrival_ms = recv_ms
+        seq, device_ms, count, values = bp.decode_notification(data)
         
-        # 1. Movement_A 계산 (sp 모듈 함수 사용)
-        processed_data = sp.calculate_movement_a(raw_data)
-        
-        # 2. RMS Score 계산 및 버퍼 업데이트 (sp 모듈 함수 사용)
-        rms_score = sp.calculate_rms_score(processed_data['movement_a'])
+        dropped = bp.track_sequence(state.device_id, seq)
+        if dropped:
+            log.warning("BLE: %d개 알림 누락 (seq=%s, 누적 %d)", dropped, seq, bp.dropped_packets)
+
+        interval_ms = config.BLE_SAMPLE_INTERVAL_MS
+        last = count - 1
+        for i in range(count):
+            base = i * bp.SAMPLE_FIELDS
+            
+            # 1. Movement_A 계산 (sp 모듈 함수 사용)
+            _, movement_a = sp.calculate_movement_a_xyz(values[base], values[base + 1], values[base + 2])
+            
+            # 2. RMS Score 계산 및 버퍼 업데이트 (배치 내 샘플 시각은 주기로 역산)
+            rms_score = state.calculate_rms_score(movement_a, arrival_ms - (last - i) * interval_ms)
+
+        state.trace_recv_ms = recv_ms
+        state.trace_rms_ms = time.monotonic() * 1000.0
 
-        # ⭐️ 실시간 출력 (Raw Data와 필터링 결과 모두 표시)
-        """print(f"BLE <- Raw A({raw_data['ax']}, {raw_data['ay']}, {raw_data['az']}) | "
-              f"Mov_A: {processed_data['movement_a']:.4f} | "
-              f"RMS Score: {rms_score:.4f} ({len(sp.RMS_BUFFER)}/{config.RMS_N_SAMPLES})")"""
+        # 3. 전송 태스크 깨우기 (배치 알림은 한 번만)
+        if sample_event is not None:
+            sample_event.set()
+
+        # ⭐️ 실시간 출력 (Raw Data와 필터링 결과 모두 표시, DEBUG 레벨에서 보드별 초당 1번)
+        log_utils.log_once_per(log, logging.DEBUG,
+                               "BLE <- [%s] Raw A(%d, %d, %d) x%d | Mov_A: %.4f | RMS Score: %.4f (%d/%d)",
+                               state.device_id, values[0], values[1], values[2], count, movement_a,
+                               rms_score, len(state.rms_buffer), config.RMS_N_SAMPLES,
+                               key=state.device_id)
 
     except json.JSONDecodeError:
-        print("BLE Error: Received malformed JSON.")
+        log_utils.log_once_per(log, logging.ERROR, "BLE Error: Received malformed JSON.")
     except Exception as e:
-        print(f"BLE Error in callback: {e}")
+        log_utils.log_once_per(log, logging.ERROR, "BLE Error in callback: %s", e)
+
+# --- 3. 속도 전송 (속도 계산은 speed_control.py) ---
+def latest_seqs():
+    return tuple(state.latest_snapshot[1] for state in board_states)
+
+
+def has_clients():
+    return bool(tcp_clients or udp_subscribers)
+
+
+def send_to_clients(update):
+    """
+    모든 클라이언트에 전송하고 끊어진 클라이언트를 정리합니다.
+    update(speed_control.SpeedUpdate)는 클라이언트가 협상한 형식(JSON 라인 / 바이너리 프레임)으로 보냅니다.
+    drain()을 기다리지 않으므로 느린 클라이언트 하나가 루프를 막지 않으며,
+    송신 버퍼가 TCP_WRITE_BUFFER_LIMIT를 넘은 클라이언트는 끊습니다.
+    UDP 구독자에게는 SPEED 프레임 1개를 데이터그램 1개로 보냅니다. (구독이 만료된 주소는 정리)
+    """
+    global last_update
+    last_update = update
+    if udp_subscribers:
+        send_to_subscribers(update)
+
+    clients_to_remove = []
+    for writer in tcp_clients:
+        if writer.is_closing() or writer.transport.get_write_buffer_size() > config.TCP_WRITE_BUFFER_LIMIT:
+            clients_to_remove.append(writer)
+            continue
+        writer.write(update.as_frame() if writer in binary_clients else update.as_json())
+
+    for writer in clients_to_remove:
+        drop_client(writer)
+
+
+def drop_client(writer):
+    if writer in tcp_clients:
+        tcp_clients.discard(writer)
+        binary_clients.discard(writer)
+        writer.close()
+        log.info("TCP: Client disconnected. Total: %d", len(tcp_clients))
+        if not has_clients():
+            clients_event.clear()
+
+
+def send_to_subscribers(update):
+    now = time.monotonic()
+    expired = [addr for addr, expires in udp_subscribers.items() if expires < now]
+    for addr in expired:
+        drop_subscriber(addr, "구독 만료")
+    if udp_transport is None or not udp_subscribers:
+        return
+    frame = update.as_frame()
+    for addr in udp_subscribers:
+        udp_transport.sendto(frame, addr) # 💡 버퍼가 차면 OS가 버림 (최신 값이 곧 다시 감)
+
+
+def drop_subscriber(addr, reason):
+    if udp_subscribers.pop(addr, None) is not None:
+        log.info("UDP: %s 구독 해제 (%s). Total: %d", addr, reason, len(udp_subscribers))
+        if not has_clients() and clients_event is not None:
+            clients_event.clear()
+
+
+async def wait_for_clients():
+    """접속한 클라이언트가 없으면 접속할 때까지 완전히 대기합니다. 대기했다면 True 반환."""
+    if has_clients():
+        return False
+    await clients_event.wait()
+    return True
+
+
+async def interval_publish_loop():
+    """(기존 방식) TCP_SEND_INTERVAL_MS 주기로 최신 RMS Score를 전송합니다."""
+    while True:
+        await wait_for_clients()
+
+        # 전송 주기를 config 값으로 설정
+        await asyncio.sleep(config.TCP_SEND_INTERVAL_MS / 1000.0) 
+        
+        # ⭐⭐ 분리된 모듈의 최종 RMS Score 사용 ⭐⭐
+        send_to_clients(speed_control.build_speed_update(board_states, step_all=True))
+
+
+async def event_publish_loop():
+    """
+    새 샘플이 처리될 때마다 즉시 속도를 계산하여 전송합니다.
+    - TCP_MAX_SEND_RATE_HZ: 전송 빈도 상한 (초과분은 최신 샘플로 합쳐서 전송)
+    - TCP_KEEPALIVE_MS: 새 샘플이 없을 때 마지막 속도를 재전송하는 주기
+    """
+    min_interval = 1.0 / config.TCP_MAX_SEND_RATE_HZ if config.TCP_MAX_SEND_RATE_HZ > 0 else 0.0
+    keepalive = config.TCP_KEEPALIVE_MS / 1000.0
+
+    last_seqs = latest_seqs()
+    last_send_time = 0.0
+    update = None
+
+    while True:
+        if await wait_for_clients():
+            update = None # 새로 접속한 클라이언트에게 바로 현재 속도를 보냄
+
+        if update is not None:
+            try:
+                await asyncio.wait_for(sample_event.wait(), keepalive)
+            except asyncio.TimeoutError:
+                pass
+
+        if min_interval:
+            wait_time = min_interval - (time.monotonic() - last_send_time)
+            if wait_time > 0:
+                await asyncio.sleep(wait_time) # 대기하는 동안 들어온 샘플은 최신 값으로 합쳐짐
+
+        sample_event.clear()
+        seqs = latest_seqs()
+
+        if seqs != last_seqs or update is None:
+            last_seqs = seqs
+            update = speed_control.build_speed_update(board_states)
+        # else: keepalive -> 마지막 메시지 재전송
+
+        send_to_clients(update)
+        last_send_time = time.monotonic()
+
+
+# --- 4. TCP 서버 (asyncio) ---
+def ping_time(msg):
+    """{"ping": 게임 시각}의 시각(float). 숫자가 아니면 None (잘못된 메시지는 무시)"""
+    t = msg.get("ping")
+    if isinstance(t, bool) or not isinstance(t, (int, float)):
+        return None
+    return float(t)
+
+
+def requested_versions(request):
+    """hello/subscribe의 {"versions": [...]} 목록. 형식이 맞지 않으면 빈 목록"""
+    versions = request.get("versions") if isinstance(request, dict) else None
+    if not isinstance(versions, list):
+        return []
+    return [v for v in versions if isinstance(v, int) and not isinstance(v, bool)]
+
+
+def handle_client_message(writer, line):
+    """
+    게임이 보낸 JSON 라인을 처리합니다.
+    {"ping": 게임 시각} -> {"pong": 게임 시각, "server": 서버 시각} (지연 추적용 시계 오프셋 측정)
+                           바이너리 클라이언트에게는 PONG 프레임
+    {"hello": {"versions": [...]}} -> {"proto": N} (이후 속도 메시지를 버전 N 형식으로 전송)
+    형식이 맞지 않는 메시지는 무시합니다. (연결은 유지)
+    """
+    try:
+        msg = json.loads(line)
+    except ValueError:
+        return
+    if not isinstance(msg, dict):
+        return
+    if "ping" in msg:
+        ping_ms = ping_time(msg)
+        if ping_ms is None:
+            return
+        server_ms = time.monotonic() * 1000.0
+        if writer in binary_clients:
+            writer.write(game_protocol.encode_pong(server_ms, ping_ms))
+        else:
+            reply = {"pong": msg["ping"], "server": server_ms}
+            writer.write((json.dumps(reply) + '\n').encode('utf-8'))
+    elif "hello" in msg:
+        versions = requested_versions(msg["hello"])
+        proto = game_protocol.PROTO_JSON
+        if config.TCP_BINARY_ENABLED and game_protocol.PROTO_BINARY in versions:
+            proto = game_protocol.PROTO_BINARY
+        # 💡 답장 라인까지는 JSON, 그 다음 바이트부터 새 형식 (같은 이벤트 루프라 중간에 다른 메시지가 끼지 않음)
+        writer.write((json.dumps({"proto": proto}) + '\n').encode('utf-8'))
+        if proto == game_protocol.PROTO_BINARY:
+            binary_clients.add(writer)
+        else:
+            binary_clients.discard(writer)
+        log.info("TCP: 프로토콜 버전 %d (%s)", proto, '바이너리 프레임' if proto == game_protocol.PROTO_BINARY else 'JSON 라인')
+
+
+async def handle_tcp_client(reader, writer):
+    """클라이언트 1명의 연결을 관리합니다. 게임이 보내는 ping 메시지에 응답하고 연결 종료를 감지합니다."""
+    addr = writer.get_extra_info('peername')
+
+    if len(tcp_clients) >= config.MAX_TCP_CONNECTIONS:
+        writer.close()
+        return
+
+    # 💡 작은 속도 메시지가 Nagle 알고리즘으로 묶여 늦게 나가지 않도록 바로 전송
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+
+    tcp_clients.add(writer)
+    clients_event.set()
+    log.info("TCP: Client connected from %s. Total: %d", addr, len(tcp_clients))
+
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            handle_client_message(writer, line)
+    except (ConnectionError, OSError, ValueError):
+        pass
+    finally:
+        drop_client(writer)
+
+
+class UdpSpeedProtocol(asyncio.DatagramProtocol):
+    """
+    UDP 구독 처리. 게임이 보내는 데이터그램은 JSON 1개입니다.
+    {"subscribe": {"versions": [2]}} -> 구독 등록/연장 (heartbeat로 주기적으로 다시 보냄), 현재 속도 프레임을 바로 전송
+    {"ping": 게임 시각}              -> PONG 프레임
+    {"unsubscribe": true}            -> 구독 해제
+    형식이 맞지 않는 데이터그램은 예외 없이 버립니다.
+    """
+
+    def connection_made(self, transport):
+        global udp_transport
+        udp_transport = transport
+
+    def connection_lost(self, exc):
+        global udp_transport
+        udp_transport = None
+        for addr in list(udp_subscribers):
+            drop_subscriber(addr, "UDP 소켓 닫힘")
+
+    def datagram_received(self, data, addr):
+        try:
+            msg = json.loads(data)
+        except ValueError: # UnicodeDecodeError 포함
+            return
+        if not isinstance(msg, dict):
+            return
+        if "subscribe" in msg:
+            self.subscribe(msg["subscribe"], addr)
+        elif "ping" in msg and addr in udp_subscribers:
+            ping_ms = ping_time(msg)
+            if ping_ms is not None:
+                udp_transport.sendto(game_protocol.encode_pong(time.monotonic() * 1000.0, ping_ms), addr)
+        elif "unsubscribe" in msg:
+            drop_subscriber(addr, "게임 종료")
+
+    def subscribe(self, request, addr):
+        if game_protocol.PROTO_BINARY not in requested_versions(request):
+            return # UDP는 바이너리 프레임(버전 2)만 지원 -> 응답이 없으므로 게임은 TCP로 전환
+        is_new = addr not in udp_subscribers
+        if is_new and len(udp_subscribers) >= config.MAX_UDP_SUBSCRIBERS:
+            return
+        udp_subscribers[addr] = time.monotonic() + config.UDP_SUBSCRIBER_TIMEOUT_MS / 1000.0
+        if is_new:
+            log.info("UDP: %s 구독. Total: %d", addr, len(udp_subscribers))
+            clients_event.set()
+            # 구독 응답 대신 현재 속도 프레임을 바로 보냄 (게임은 첫 프레임으로 구독 성립을 확인)
+            if last_update is not None:
+                udp_transport.sendto(last_update.as_frame(), addr)
+
+    def error_received(self, exc):
+        # 게임이 꺼진 주소로 보낸 경우 등 (ICMP port unreachable) -> 구독 만료로 정리됨
+        log_utils.log_once_per(log, logging.DEBUG, "UDP: 전송 오류 %s", exc)
+
+
+async def udp_server():
+    """UDP 구독 소켓을 엽니다. (실패해도 TCP 전송은 계속)"""
+    global udp_transport
+    loop = asyncio.get_running_loop()
+    host = config.UDP_HOST or config.TCP_HOST
+    try:
+        transport, _ = await loop.create_datagram_endpoint(UdpSpeedProtocol,
+                                                           local_addr=(host, config.UDP_PORT))
+    except OSError as e:
+        log.error("UDP Error: Failed to open socket on %s:%d: %s (TCP만 사용)", host, config.UDP_PORT, e)
+        return None
+    log.info("UDP Server listening on %s:%d", host, config.UDP_PORT)
+    return transport
+
+
+async def tcp_server():
+    """TCP 서버(와 UDP_ENABLED면 UDP 구독 소켓)를 실행하고 RMS Score를 최종 속도로 변환하여 전송합니다."""
+    global clients_event, sample_event, udp_transport
+    clients_event = asyncio.Event()
+    sample_event = asyncio.Event()
 
-# --- 3. TCP 서버 스레드 (RMS 기반 속도, Dead Zone, 모멘텀 로직) ---
-def tcp_server_thread():
-    """TCP 서버를 실행하고 RMS Score를 최종 속도로 변환하여 전송합니다."""
-    global tcp_clients, PREVIOUS_APPLIED_SPEED
-    
     # config에서 설정값 로드
     TCP_HOST = config.TCP_HOST
     TCP_PORT = config.TCP_PORT
-    MAX_TCP_CONNECTIONS = config.MAX_TCP_CONNECTIONS
-    
-    TARGET_MAX_SPEED = config.TARGET_MAX_SPEED
-    RMS_DEAD_ZONE = config.RMS_DEAD_ZONE
-    RMS_ACTIVE_RANGE = config.RMS_ACTIVE_RANGE
-    ACCELERATION_RATE = config.ACCELERATION_RATE
-    ERROR_SCORE_THRESHOLD = config.ERROR_SCORE_THRESHOLD
-    
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     
     try:
-        server_socket.bind((TCP_HOST, TCP_PORT))
-        server_socket.listen(MAX_TCP_CONNECTIONS)
-        print(f"\nTCP Server listening on {TCP_HOST}:{TCP_PORT}")
+        server = await asyncio.start_server(handle_tcp_client, TCP_HOST, TCP_PORT, reuse_address=True)
+        log.info("TCP Server listening on %s:%d (mode: %s)", TCP_HOST, TCP_PORT, config.TCP_PUBLISH_MODE)
     except Exception as e:
-        print(f"TCP Error: Failed to start server: {e}")
+        log.error("TCP Error: Failed to start server: %s", e)
         return
 
-    def accept_clients():
-        while True:
-            try:
-                server_socket.settimeout(0.5) 
-                client_conn, addr = server_socket.accept()
-                client_conn.setblocking(True) 
-                
-                if len(tcp_clients) >= MAX_TCP_CONNECTIONS:
-                    client_conn.close()
-                    continue
-                    
-                tcp_clients.append(client_conn)
-                print(f"TCP: Client connected from {addr}. Total: {len(tcp_clients)}")
-            except socket.timeout:
-                continue
-            except Exception:
-                break 
-    
-    threading.Thread(target=accept_clients, daemon=True).start()
-    
-    # 데이터 전송 루프
-    while True:
-        # 전송 주기를 config 값으로 설정
-        time.sleep(config.TCP_SEND_INTERVAL_MS / 1000.0) 
-        
-        if not tcp_clients:
-            continue
-            
-        # ⭐⭐ 분리된 모듈의 최종 RMS Score 사용 ⭐⭐
-        current_rms_score = sp.latest_rms_score 
-        current_applied_speed = 0.0 
-
-        # 1. 에러 값 필터링 
-        if current_rms_score >= ERROR_SCORE_THRESHOLD:
-            target_speed = 0.0
-            current_rms_score = 0.0 
-            print(f"[SERVER_ERROR] 비정상적인 RMS Score ({current_rms_score:.4f}) 감지. 0.00 처리.")
-
-        # 2. Dead Zone 처리 및 목표 속도 계산 
-        elif current_rms_score <= RMS_DEAD_ZONE: 
-            target_speed = 0.0 
-        else:
-            # Dead Zone을 제외한 활성 점수 계산 및 Target Speed로 스케일링
-            active_score = current_rms_score - RMS_DEAD_ZONE
-            
-            clamped_score = min(active_score, RMS_ACTIVE_RANGE)
-            
-            target_speed = (clamped_score / RMS_ACTIVE_RANGE) * TARGET_MAX_SPEED
+    transport = await udp_server() if config.UDP_ENABLED else None
 
-        # 3. 모멘텀 (가속 보상) 로직 적용
-        speed_difference = target_speed - PREVIOUS_APPLIED_SPEED
-        
-        if speed_difference > 0:
-            current_applied_speed = PREVIOUS_APPLIED_SPEED + (speed_difference * ACCELERATION_RATE)
-        else:
-            current_applied_speed = PREVIOUS_APPLIED_SPEED + speed_difference 
-            
-        # 4. 최대 속도 제한 및 음수 방지
-        current_applied_speed = max(0.0, min(current_applied_speed, TARGET_MAX_SPEED))
-        
-        # 5. 다음 루프를 위해 저장
-        PREVIOUS_APPLIED_SPEED = current_applied_speed
+    try:
+        async with server:
+            # 데이터 전송 루프
+            if config.TCP_PUBLISH_MODE == "interval":
+                await interval_publish_loop()
+            else:
+                await event_publish_loop()
+    finally:
+        for writer in list(tcp_clients):
+            drop_client(writer)
+        if transport is not None:
+            transport.close()
+        udp_transport = None
+        udp_subscribers.clear()
+
+
+# --- 5. Main BLE 실행 함수 --- 
+async def ble_session(device, state):
+    """보드 1개와의 연결을 유지합니다. 연결이 끊기면 반환되고 ble_run이 다시 검색합니다."""
+    BLE_CHARACTERISTIC_UUID = config.BLE_CHARACTERISTIC_UUID
+    try:
+        async with BleakClient(device.address) as client:
+            log.info("블루투스 연결 성공 | 이름 : %s | 주소 : %s | 채널 : %d", device.name, device.address, state.channel)
             
-        # 전송 데이터 생성
-        data_to_send = {"speed": current_applied_speed}
-        message = json.dumps(data_to_send) + '\n' 
+            callback = functools.partial(ble_data_callback, state=state)
+            await client.start_notify(BLE_CHARACTERISTIC_UUID, callback)
+            log.info("블루투스로 데이터 받는중... ctrl+C로 종료")
+
+            while client.is_connected:
+                await asyncio.sleep(1)
         
-        # ⭐️ 실시간 출력
-        """print(f"TCP -> RMS Score: {current_rms_score:.4f} | Target Speed: {target_speed:.4f} | "
-              f"Applied Speed: {current_applied_speed:.4f}")"""
+        log.warning("BLE: %s Disconnected. Reconnecting...", device.name)
         
-        # 6. 클라이언트 전송
-        clients_to_remove = []
-        for client_conn in tcp_clients:
-            try:
-                client_conn.sendall(message.encode('utf-8'))
-            except Exception:
-                clients_to_remove.append(client_conn)
-                
-        for client_conn in clients_to_remove:
-            tcp_clients.remove(client_conn)
-            client_conn.close()
-            print(f"TCP: Client disconnected. Total: {len(tcp_clients)}")
+    except Exception as e:
+        log.error("BLE Error: %s Connection failed (%s). Retrying in 5s...", device.name, e)
+        await asyncio.sleep(5)
+    finally:
+        # 끊긴 보드의 속도가 마지막 값으로 멈춰 있지 않도록 초기화
+        state.reset()
+        if sample_event is not None:
+            sample_event.set()
+
 
-# --- 4. Main BLE 실행 함수 --- 
 async def ble_run():
+    """설정된 모든 보드를 검색하여 보드마다 별도의 BleakClient 세션을 동시에 유지합니다."""
     # ⭐⭐ 타겟 장치 이름을 목록으로 정의 ⭐⭐
-    TARGET_NAMES = ["RUNNIG_BOARD_1", "RUNNIG_BOARD_2"]
-    BLE_CHARACTERISTIC_UUID = config.BLE_CHARACTERISTIC_UUID
+    TARGET_NAMES = config.BLE_TARGET_NAMES
+    sessions = {} # 보드 이름 -> 세션 태스크
     
-    # TCP 서버 스레드 시작
-    tcp_thread = threading.Thread(target=tcp_server_thread, daemon=True)
-    tcp_thread.start()
-    
-    while True:
-        print(f"\n블루투스 찾는중 {' or '.join(TARGET_NAMES)}...")
-        try:
-            devices = await BleakScanner.discover(timeout=5.0)
-        except Exception as e:
-            print(f"BLE Error: Scanner failed ({e}). Retrying...")
-            await asyncio.sleep(5)
-            continue
-            
-        target = None
-        # ⭐⭐ 타겟 이름 목록을 순회하며 일치하는 기기를 찾습니다. ⭐⭐
-        for d in devices:
-            if d.name in TARGET_NAMES:
-                target = d
-                break
+    try:
+        while True:
+            # 끝난(연결이 끊긴) 세션 정리
+            for name, task in list(sessions.items()):
+                if task.done():
+                    del sessions[name]
 
-        if target is None:
-            print(f"블루투스 검색 실패. 5초후 재시도")
-            await asyncio.sleep(5)
-            continue
+            missing = [name for name in TARGET_NAMES if name not in sessions]
+            if not missing:
+                await asyncio.sleep(1)
+                continue
 
-        try:
-            # target 변수에 일치하는 기기가 저장되어 있습니다.
-            async with BleakClient(target.address) as client:
-                print(f"블루투스 연결 성공\n이름 : {target.name}\n주소 : {target.address}\n")
+            log.info("블루투스 찾는중 %s...", ' or '.join(missing))
+            try:
+                devices = await BleakScanner.discover(timeout=5.0)
+            except Exception as e:
+                log.error("BLE Error: Scanner failed (%s). Retrying...", e)
+                await asyncio.sleep(5)
+                continue
                 
-                await client.start_notify(BLE_CHARACTERISTIC_UUID, ble_data_callback)
-                print(f"블루투스로 데이터 받는중... \nctrl+C로 종료")
+            # ⭐⭐ 타겟 이름 목록을 순회하며 일치하는 기기마다 세션을 시작합니다. ⭐⭐
+            for d in devices:
+                if d.name in missing and d.name not in sessions:
+                    sessions[d.name] = asyncio.create_task(ble_session(d, sp.get_state(d.name)))
 
-                while client.is_connected:
-                    await asyncio.sleep(1)
-            
-            print("BLE: Disconnected. Reconnecting...")
-            
-        except Exception as e:
-            print(f"BLE Error: Connection failed ({e}). Retrying in 5s...")
-            await asyncio.sleep(5)
+            if not any(name in sessions for name in missing):
+                log.warning("블루투스 검색 실패. 5초후 재시도")
+                await asyncio.sleep(5)
+    finally:
+        for task in sessions.values():
+            task.cancel()
+        await asyncio.gather(*sessions.values(), return_exceptions=True)
+
+
+# --- 6. 녹화 로그 재생 (블루투스 장비 없이 실행) ---
+def map_replay_devices(log_devices, device_map=None):
+    """
+    로그의 장치 이름 -> 재생할 보드 상태(board_states 항목). 전송되는 보드만 대상으로 합니다.
+    1. device_map({로그 이름: 보드 이름}, --map)으로 지정한 이름
+    2. config.BLE_TARGET_NAMES에 있는 이름은 그대로
+    3. 나머지는 로그에 나온 순서대로 아직 배정되지 않은 보드(채널 순서)에 배정 (경고)
+    남는 보드가 없는 장치는 None (재생하지 않음, 경고)
+    """
+    device_map = device_map or {}
+    mapping = {}
+    used = set()
+    for name in log_devices:
+        target = device_map.get(name, name)
+        if target in sp.states and sp.states[target] in board_states:
+            mapping[name] = sp.states[target]
+            used.add(target)
+
+    free = [state for state in board_states if state.device_id not in used]
+    for name in log_devices:
+        if name in mapping:
+            continue
+        if free:
+            state = free.pop(0)
+            mapping[name] = state
+            log.warning("REPLAY: 로그 장치 %s는 설정에 없는 보드입니다. 채널 %d(%s)로 재생합니다. (--map으로 지정 가능)",
+                        name, state.channel, state.device_id)
+        else:
+            mapping[name] = None
+            log.warning("REPLAY: 로그 장치 %s를 배정할 보드가 없어 건너뜁니다. (--map으로 지정 가능)", name)
+    return mapping
+
+
+async def replay_run(path, realtime=True, start_offset_s=0.0, device_map=None):
+    """
+    녹화된 로그의 알림을 ble_data_callback에 다시 넣습니다.
+    realtime=True면 녹화 당시 간격대로, False면 가능한 한 빠르게 재생합니다.
+    start_offset_s: 로그 시작 후 몇 초 지점부터 재생할지 (시간 인덱스로 바로 이동)
+    device_map: {로그 장치 이름: 보드 이름} (map_replay_devices 참고)
+    """
+    with sensor_log.SensorLogReader(path) as reader:
+        if reader.start_ms is None:
+            log.warning("REPLAY: 로그에 데이터가 없습니다: %s", path)
+            return
+
+        boards = map_replay_devices([reader.devices[idx] for idx in sorted(reader.devices)], device_map)
+        start_ms = reader.start_ms + start_offset_s * 1000.0
+        log.info("REPLAY: %s (%s, +%.1fs 부터)", path, '실시간' if realtime else '최대 속도', start_offset_s)
+
+        first_ms = None
+        wall_start = time.monotonic()
+        count = 0
+        for t_ms, device_id, payload in reader.records(start_ms=start_ms):
+            if first_ms is None:
+                first_ms = t_ms
+            if realtime:
+                delay = (t_ms - first_ms) / 1000.0 - (time.monotonic() - wall_start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif count % 64 == 0:
+                await asyncio.sleep(0) # TCP 전송 태스크가 돌 수 있도록 양보
+
+            if device_id not in boards: # 인덱스에 없던 장치 (손상된 로그 등)
+                boards.update(map_replay_devices([device_id], device_map))
+            state = boards[device_id]
+            if state is None:
+                continue
+            ble_data_callback(None, payload, state=state, arrival_ms=t_ms)
+            count += 1
+
+        elapsed = time.monotonic() - wall_start
+        log.info("REPLAY: 완료. 알림 %d개, %.2fs", count, elapsed)
+
+
+async def main(replay_path=None, realtime=True, start_offset_s=0.0, device_map=None):
+    """BLE 수신(또는 로그 재생)과 TCP 서버를 하나의 이벤트 루프에서 실행합니다."""
+    tcp_task = asyncio.create_task(tcp_server())
+    try:
+        if replay_path:
+            await replay_run(replay_path, realtime, start_offset_s, device_map)
+        else:
+            await ble_run()
+    finally:
+        tcp_task.cancel()
+        await asyncio.gather(tcp_task, return_exceptions=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="RunningGame 센서 서버")
+    parser.add_argument("--record", action="store_true", help="모든 BLE 알림을 로그 파일로 녹화")
+    parser.add_argument("--replay", metavar="LOG", help="블루투스 대신 녹화된 로그를 재생")
+    parser.add_argument("--fast", action="store_true", help="재생 시 실시간 대신 최대 속도로 재생")
+    parser.add_argument("--from", dest="start", type=float, default=0.0, metavar="SEC",
+                        help="재생 시작 지점 (로그 시작 후 초)")
+    parser.add_argument("--map", action="append", default=[], metavar="LOG=BOARD",
+                        help="재생 시 로그의 장치 이름을 설정된 보드 이름으로 바꿔 재생 (여러 번 지정 가능)")
+    parser.add_argument("--filter", metavar="PRESET", choices=list(config.SPEED_FILTER_PRESETS),
+                        help="속도 필터 체인 프리셋 (기본: config.SPEED_FILTER_CHAIN)")
+    parser.add_argument("--host", metavar="ADDR",
+                        help="TCP(와 UDP) 서버 주소 (기본: config.TCP_HOST). 다른 PC의 게임이 접속하려면 0.0.0.0")
+    parser.add_argument("--udp-host", metavar="ADDR",
+                        help="UDP 구독 소켓 주소만 따로 지정 (기본: config.UDP_HOST, 없으면 TCP 주소)")
+    args = parser.parse_args()
+    args.device_map = {}
+    for item in args.map:
+        log_name, sep, board = item.partition("=")
+        if not sep or board not in config.BLE_TARGET_NAMES:
+            parser.error(f"--map {item}: LOG=BOARD 형식이어야 하고 BOARD는 {', '.join(config.BLE_TARGET_NAMES)} 중 하나여야 합니다.")
+        args.device_map[log_name] = board
+    return args
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    log_utils.setup_logging(config.LOG_LEVEL, config.LOG_MODULE_LEVELS, config.LOG_FILE)
+    if args.host:
+        config.TCP_HOST = args.host
+    if args.udp_host:
+        config.UDP_HOST = args.udp_host
+    if args.filter:
+        config.SPEED_FILTER_CHAIN = args.filter
+        speed_control.configure()
+    log.info("속도 필터 체인: %s (%s)",
+             config.SPEED_FILTER_CHAIN if isinstance(config.SPEED_FILTER_CHAIN, str) else 'custom',
+             ' -> '.join(speed_control.compute_applied_speed.stages))
+    if (args.record or config.RECORD_ENABLED) and not args.replay:
+        recorder = sensor_log.SensorLogWriter(sensor_log.new_log_path())
+        log.info("REC: 센서 데이터 녹화 중 -> %s", recorder.path)
     try:
-        asyncio.run(ble_run())
+        asyncio.run(main(args.replay, not args.fast, args.start, args.device_map))
     except KeyboardInterrupt:
-        print("\nProgram interrupted by user. Shutting down...")
+        log.info("Program interrupted by user. Shutting down...")
     except Exception as e:
-        print(f"Main program crashed: {e}")
\ No newline at end of file
+        log.critical("Main program crashed: %s", e)
+    finally:
+        if recorder is not None:
+            recorder.close()
+            log.info("REC: 알림 %d개 저장 완료.", recorder.record_count)
+        log_utils.shutdown_logging()
\ No newline at end of file
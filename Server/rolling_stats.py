@@ -0,0 +1,232 @@
+# rolling_stats.py
+
+import math
+import time
+from array import array
+
+
+class RollingWindow:
+    """
+    미리 할당된 배열 기반 링 버퍼입니다.
+    누적 합과 제곱합을 유지하여 mean / variance / RMS를 샘플당 O(1)로 갱신합니다.
+
+    - window_ms가 None이면 최근 capacity개 샘플 윈도우
+    - window_ms가 주어지면 최근 window_ms 밀리초 윈도우 (capacity는 최대 보관 샘플 수)
+    """
+
+    def __init__(self, capacity, window_ms=None):
+        capacity = int(capacity)
+        if capacity <= 0:
+            raise ValueError(f"capacity는 1 이상이어야 합니다: {capacity}")
+
+        self.capacity = capacity
+        self.window_ms = window_ms
+        self._values = array('d', bytes(8 * capacity))
+        self._times = array('d', bytes(8 * capacity)) if window_ms is not None else None
+
+        self._head = 0   # 가장 오래된 샘플 위치
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._evictions = 0 # 누적 오차 보정(resync) 주기 계산용
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._evictions = 0
+
+    def _pop_oldest(self):
+        old = self._values[self._head]
+        self._sum -= old
+        self._sum_sq -= old * old
+        self._head += 1
+        if self._head == self.capacity:
+            self._head = 0
+        self._count -= 1
+        self._evictions += 1
+
+    def _resync(self):
+        """뺄셈이 반복되며 쌓인 부동소수점 오차를 버퍼 전체 재합산으로 제거합니다. (capacity회마다 1번 -> 분할상환 O(1))"""
+        total = 0.0
+        total_sq = 0.0
+        idx = self._head
+        for _ in range(self._count):
+            v = self._values[idx]
+            total += v
+            total_sq += v * v
+            idx += 1
+            if idx == self.capacity:
+                idx = 0
+        self._sum = total
+        self._sum_sq = total_sq
+        self._evictions = 0
+
+    def push(self, value, t_ms=None):
+        """새 샘플을 추가하고 윈도우 밖으로 밀려난 샘플을 제거합니다."""
+        if self._times is not None:
+            if t_ms is None:
+                t_ms = time.monotonic() * 1000.0
+            cutoff = t_ms - self.window_ms
+            while self._count and self._times[self._head] <= cutoff:
+                self._pop_oldest()
+
+        if self._count == self.capacity:
+            self._pop_oldest()
+
+        tail = self._head + self._count
+        if tail >= self.capacity:
+            tail -= self.capacity
+        self._values[tail] = value
+        if self._times is not None:
+            self._times[tail] = t_ms
+        self._count += 1
+        self._sum += value
+        self._sum_sq += value * value
+
+        if self._evictions >= self.capacity:
+            self._resync()
+
+    def mean(self):
+        if self._count == 0:
+            return 0.0
+        return self._sum / self._count
+
+    def variance(self):
+        """모분산 (E[x^2] - E[x]^2)"""
+        if self._count == 0:
+            return 0.0
+        m = self._sum / self._count
+        return max(0.0, self._sum_sq / self._count - m * m)
+
+    def rms(self):
+        if self._count == 0:
+            return 0.0
+        return math.sqrt(max(0.0, self._sum_sq / self._count))
+
+
+class MultiWindow:
+    """
+    같은 샘플 스트림에 대해 길이가 다른 여러 RollingWindow를 동시에 유지합니다.
+    spec 형식: {이름: ("samples", N) 또는 ("ms", 밀리초)}
+    """
+
+    def __init__(self, spec, ms_capacity):
+        self.windows = {}
+        for name, (unit, length) in spec.items():
+            if unit == "samples":
+                self.windows[name] = RollingWindow(length)
+            elif unit == "ms":
+                self.windows[name] = RollingWindow(ms_capacity, window_ms=float(length))
+            else:
+                raise ValueError(f"알 수 없는 윈도우 단위: {unit} ({name})")
+        self._window_list = list(self.windows.values())
+
+    def __getitem__(self, name):
+        return self.windows[name]
+
+    def push(self, value, t_ms=None):
+        if t_ms is None:
+            t_ms = time.monotonic() * 1000.0
+        for window in self._window_list:
+            window.push(value, t_ms)
+
+    def clear(self):
+        for window in self._window_list:
+            window.clear()
+
+    def rms(self, name):
+        return self.windows[name].rms()
+
+
+class P2Quantile:
+    """
+    P² 알고리즘(Jain & Chlamtac, 1985)으로 스트림의 p 분위수를 추정합니다.
+    샘플을 저장하지 않고 마커 5개(높이, 위치)만 유지하므로 메모리/갱신 모두 O(1)입니다.
+    """
+
+    def __init__(self, p):
+        if not 0.0 < p < 1.0:
+            raise ValueError(f"p는 0 < p < 1 이어야 합니다: {p}")
+        self.p = p
+        self._dn = (0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0) # 샘플당 목표 위치 증가량
+        self.q = [0.0] * 5 # 마커 높이
+        self.reset()
+
+    def reset(self):
+        p = self.p
+        self.count = 0
+        self._n = [0.0, 1.0, 2.0, 3.0, 4.0] # 마커 실제 위치
+        self._np = [0.0, 2.0 * p, 4.0 * p, 2.0 + 2.0 * p, 4.0] # 마커 목표 위치
+
+    def __len__(self):
+        return self.count
+
+    def add(self, x):
+        q = self.q
+        count = self.count
+        if count < 5:
+            # 처음 5개는 그대로 모아 정렬한 것이 초기 마커
+            q[count] = x
+            self.count = count + 1
+            if count == 4:
+                q.sort()
+            return
+        self.count = count + 1
+
+        # 1. x가 들어갈 구간 k 찾기 (양 끝 마커는 최소/최대로 갱신)
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        elif x < q[2]:
+            k = 0 if x < q[1] else 1
+        else:
+            k = 2 if x < q[3] else 3
+
+        n = self._n
+        if k == 0:
+            n[1] += 1.0
+        if k <= 1:
+            n[2] += 1.0
+        if k <= 2:
+            n[3] += 1.0
+        n[4] += 1.0
+        np_ = self._np
+        dn = self._dn
+        np_[1] += dn[1]
+        np_[2] += dn[2]
+        np_[3] += dn[3]
+        np_[4] += 1.0
+
+        # 2. 가운데 마커 3개를 목표 위치 쪽으로 1칸씩 조정 (포물선 보간, 벗어나면 선형)
+        for i in (1, 2, 3):
+            d = np_[i] - n[i]
+            if (d >= 1.0 and n[i + 1] - n[i] > 1.0) or (d <= -1.0 and n[i - 1] - n[i] < -1.0):
+                s = 1.0 if d > 0.0 else -1.0
+                ni, nm, np1 = n[i], n[i - 1], n[i + 1]
+                qi, qm, qp1 = q[i], q[i - 1], q[i + 1]
+                candidate = qi + s / (np1 - nm) * ((ni - nm + s) * (qp1 - qi) / (np1 - ni)
+                                                   + (np1 - ni - s) * (qi - qm) / (ni - nm))
+                if qm < candidate < qp1:
+                    q[i] = candidate
+                else:
+                    j = i + 1 if s > 0.0 else i - 1
+                    q[i] = qi + s * (q[j] - qi) / (n[j] - ni)
+                n[i] = ni + s
+
+    def value(self):
+        """현재 분위수 추정값 (샘플이 없으면 0.0, 5개 미만이면 정렬한 값에서 선택)"""
+        count = self.count
+        if count >= 5:
+            return self.q[2]
+        if count == 0:
+            return 0.0
+        values = sorted(self.q[:count])
+        return values[min(count - 1, int(round(self.p * (count - 1))))]
@@ -0,0 +1,209 @@
+# sensor_log.py
+# BLE 원본 알림을 그대로 저장하는 추가 전용(append-only) 바이너리 로그와 mmap 기반 리더입니다.
+#
+# --- 로그 파일 (*.rglog) ---
+# 파일 헤더: magic(4s) | 버전(u16) | 예약(u16)
+# 레코드   : 도착 시각 ms(f64, epoch) | 종류(u8) | 장치 번호(u8) | 길이(u16) | payload
+#            종류 0 = BLE 알림 원본, 종류 1 = 장치 정의 (payload = 장치 이름 utf-8)
+#
+# --- 인덱스 파일 (*.rglog.idx) ---
+# 엔트리: 종류(u8) | 장치 번호(u8) | 시각 ms(f64) | 레코드 오프셋(u64)
+#         종류 0 = 시간 인덱스 (LOG_INDEX_INTERVAL_MS마다 1개), 종류 1 = 장치 정의 레코드 위치
+# 인덱스가 없거나 손상되면 로그 전체를 한 번 읽어 다시 만듭니다. (로그만으로도 완결됨)
+
+import bisect
+import mmap
+import os
+import struct
+import time
+import config
+import log_utils
+
+log = log_utils.get_logger(__name__)
+
+LOG_MAGIC = b"RGSL"
+LOG_VERSION = 1
+FILE_HEADER = struct.Struct("<4sHH")
+RECORD_HEADER = struct.Struct("<dBBH")
+INDEX_ENTRY = struct.Struct("<BBdQ")
+
+KIND_DATA = 0
+KIND_DEVICE = 1
+
+
+class SensorLogWriter:
+    """BLE 알림을 도착 시각, 장치 이름과 함께 로그에 추가합니다."""
+
+    def __init__(self, path, index_interval_ms=config.LOG_INDEX_INTERVAL_MS):
+        self.path = path
+        self.index_interval_ms = index_interval_ms
+        self._log = open(path, "xb")
+        self._index = open(path + ".idx", "xb")
+        self._log.write(FILE_HEADER.pack(LOG_MAGIC, LOG_VERSION, 0))
+        self._offset = FILE_HEADER.size
+        self._devices = {} # 장치 이름 -> 장치 번호
+        self._next_index_ms = None
+        self.record_count = 0
+
+    def _append(self, kind, device_idx, t_ms, payload):
+        offset = self._offset
+        self._log.write(RECORD_HEADER.pack(t_ms, kind, device_idx, len(payload)))
+        self._log.write(payload)
+        self._offset += RECORD_HEADER.size + len(payload)
+        return offset
+
+    def _device_index(self, device_id, t_ms):
+        idx = self._devices.get(device_id)
+        if idx is None:
+            idx = len(self._devices)
+            if idx > 0xFF:
+                raise ValueError("로그 하나에 기록할 수 있는 장치는 최대 256개입니다.")
+            self._devices[device_id] = idx
+            offset = self._append(KIND_DEVICE, idx, t_ms, str(device_id).encode("utf-8"))
+            self._index.write(INDEX_ENTRY.pack(KIND_DEVICE, idx, t_ms, offset))
+        return idx
+
+    def write(self, device_id, payload, t_ms=None):
+        if t_ms is None:
+            t_ms = time.time() * 1000.0
+        device_idx = self._device_index(device_id, t_ms)
+
+        if self._next_index_ms is None or t_ms >= self._next_index_ms:
+            # 💡 시간 인덱스는 레코드 경계에만 기록하고, 이때 디스크로 flush 합니다.
+            self._log.flush()
+            self._index.write(INDEX_ENTRY.pack(KIND_DATA, 0, t_ms, self._offset))
+            self._index.flush()
+            self._next_index_ms = t_ms + self.index_interval_ms
+
+        self._append(KIND_DATA, device_idx, t_ms, bytes(payload))
+        self.record_count += 1
+
+    def close(self):
+        for f in (self._log, self._index):
+            try:
+                f.close()
+            except Exception:
+                pass
+
+
+class SensorLogReader:
+    """mmap으로 로그를 읽습니다. 시간 인덱스로 중간 지점에 바로 접근할 수 있습니다."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < FILE_HEADER.size:
+            self._file.close()
+            raise ValueError(f"로그 파일이 너무 짧습니다: {path}")
+
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        magic, version, _ = FILE_HEADER.unpack_from(self._view)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            self.close()
+            raise ValueError(f"지원하지 않는 로그 형식입니다: {path} ({magic!r}, v{version})")
+
+        self.devices = {} # 장치 번호 -> 장치 이름
+        self._index_times = []
+        self._index_offsets = []
+        if not self._load_index():
+            self._rebuild_index()
+
+    def close(self):
+        try:
+            self._view.release()
+            self._mm.close()
+        except BufferError:
+            pass # 아직 사용 중인 payload가 있으면 GC가 정리하도록 둠
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _iter_raw(self, offset):
+        """offset부터 (시각, 종류, 장치 번호, payload memoryview, 다음 오프셋)을 읽습니다. 잘린 마지막 레코드는 무시합니다."""
+        view = self._view
+        end = len(view)
+        header_size = RECORD_HEADER.size
+        while offset + header_size <= end:
+            t_ms, kind, device_idx, length = RECORD_HEADER.unpack_from(view, offset)
+            start = offset + header_size
+            if start + length > end:
+                break
+            offset = start + length
+            yield t_ms, kind, device_idx, view[start:offset], offset
+
+    def _load_index(self):
+        try:
+            with open(self.path + ".idx", "rb") as f:
+                data = f.read()
+        except OSError:
+            return False
+
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        for kind, device_idx, t_ms, offset in INDEX_ENTRY.iter_unpack(data[:usable]):
+            if offset + RECORD_HEADER.size > len(self._view):
+                break # 로그보다 앞서 기록된 인덱스 (비정상 종료)
+            if kind == KIND_DEVICE:
+                _, _, _, length = RECORD_HEADER.unpack_from(self._view, offset)
+                start = offset + RECORD_HEADER.size
+                self.devices[device_idx] = bytes(self._view[start:start + length]).decode("utf-8")
+            else:
+                self._index_times.append(t_ms)
+                self._index_offsets.append(offset)
+        return bool(self._index_offsets)
+
+    def _rebuild_index(self):
+        log.warning("[LOG] 인덱스가 없거나 비어 있어 다시 만듭니다: %s", self.path)
+        self.devices.clear()
+        self._index_times.clear()
+        self._index_offsets.clear()
+        next_index_ms = None
+        offset = FILE_HEADER.size
+        for t_ms, kind, device_idx, payload, next_offset in self._iter_raw(offset):
+            if kind == KIND_DEVICE:
+                self.devices[device_idx] = bytes(payload).decode("utf-8")
+            elif next_index_ms is None or t_ms >= next_index_ms:
+                self._index_times.append(t_ms)
+                self._index_offsets.append(offset)
+                next_index_ms = t_ms + config.LOG_INDEX_INTERVAL_MS
+            offset = next_offset
+
+    @property
+    def start_ms(self):
+        return self._index_times[0] if self._index_times else None
+
+    def records(self, start_ms=None, end_ms=None):
+        """
+        (도착 시각 ms, 장치 이름, payload memoryview)를 시간 순으로 돌려줍니다.
+        start_ms가 주어지면 시간 인덱스로 그 직전 지점부터 읽기 시작합니다.
+        payload는 mmap을 직접 가리키므로 리더를 닫기 전에만 유효합니다.
+        """
+        if not self._index_offsets:
+            return
+
+        offset = self._index_offsets[0]
+        if start_ms is not None:
+            pos = bisect.bisect_right(self._index_times, start_ms) - 1
+            if pos > 0:
+                offset = self._index_offsets[pos]
+
+        devices = self.devices
+        for t_ms, kind, device_idx, payload, _ in self._iter_raw(offset):
+            if kind != KIND_DATA:
+                continue
+            if start_ms is not None and t_ms < start_ms:
+                continue
+            if end_ms is not None and t_ms > end_ms:
+                break
+            yield t_ms, devices.get(device_idx, str(device_idx)), payload
+
+
+def new_log_path(directory=config.RECORD_DIR):
+    """녹화 폴더에 시작 시각으로 이름 붙인 새 로그 경로를 만듭니다."""
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, time.strftime("sensor_%Y%m%d_%H%M%S.rglog"))
@@ -1,8 +1,14 @@
 # sensor_processor.py
 
 import math
-from collections import deque
+import time
+import logging
 import config # ⭐ config 파일 import
+import log_utils
+from rolling_stats import RollingWindow, MultiWindow
+from calibration import RmsCalibrator
+
+log = log_utils.get_logger(__name__)
 
 # --- MPU6050 및 RMS 상수 (config에서 가져옴) ---
 ACCEL_SCALE_FACTOR = config.ACCEL_SCALE_FACTOR
@@ -10,9 +16,95 @@ G_CONSTANT = config.G_CONSTANT
 RMS_N_SAMPLES = config.RMS_N_SAMPLES
 
 # --- 전역 상태 변수 ---
-# 💡 RMS 계산을 위한 Movement_A 버퍼
-RMS_BUFFER = deque(maxlen=RMS_N_SAMPLES) 
-latest_rms_score = 0.0 # RMS 필터링 후의 최종 Score (main_server에서 접근)
+# 💡 보드(장치 이름)별 처리 상태. 보드끼리 RMS 버퍼가 섞이지 않도록 분리합니다.
+states = {}
+
+
+class SensorState:
+    """보드 1개의 RMS 버퍼, 추가 윈도우, 최신 스냅샷, 자동 보정, 속도 모멘텀 상태를 보관합니다."""
+
+    def __init__(self, device_id, channel=0):
+        self.device_id = device_id
+        self.channel = channel # TCP 메시지의 speeds 목록에서의 위치
+        # 💡 RMS 계산을 위한 Movement_A 링 버퍼 (누적 제곱합 유지 -> O(1) 갱신)
+        self.rms_buffer = RollingWindow(RMS_N_SAMPLES)
+        # 💡 추가 윈도우 (config.RMS_WINDOWS, 샘플/밀리초 단위)
+        self.windows = MultiWindow(config.RMS_WINDOWS, config.RMS_WINDOW_MS_CAPACITY)
+        self.latest_rms_score = 0.0 # RMS 필터링 후의 최종 Score
+        # 💡 이벤트 기반 전송용: (rms, 샘플 seq, 시각 ms) 튜플을 한 번에 교체하여 원자적으로 읽을 수 있게 합니다.
+        self.latest_snapshot = (0.0, 0, 0.0)
+        # 💡 Dead Zone / MAX Score 온라인 보정 (config.CALIB_ENABLED)
+        self.calibration = RmsCalibrator(device_id) if config.CALIB_ENABLED else None
+
+        # --- 속도 모멘텀 상태 (main_server에서 사용) ---
+        self.previous_applied_speed = 0.0
+        self.filter_state = None # speed_filters 체인의 단계별 상태 (EMA 등, 첫 계산 때 생성)
+        self.published_seq = 0 # 마지막으로 속도 계산에 반영한 샘플 seq
+
+        # --- 지연 추적 (monotonic ms): 마지막 알림의 BLE 수신 시각, RMS 계산 완료 시각 ---
+        self.trace_recv_ms = 0.0
+        self.trace_rms_ms = 0.0
+
+    def reset(self):
+        """연결이 끊겼을 때 버퍼와 속도를 0으로 되돌립니다. (seq는 계속 증가)"""
+        self.rms_buffer.clear()
+        self.windows.clear()
+        self.latest_rms_score = 0.0
+        self.previous_applied_speed = 0.0
+        self.filter_state = None
+        if self.calibration is not None:
+            self.calibration.start_session() # 다음 연결은 새 세션으로 보정
+        self._publish_snapshot(0.0, time.monotonic() * 1000.0)
+
+    def calculate_rms_score(self, movement_a, t_ms=None):
+        """
+        rms_buffer에 새로운 movement_a를 추가하고 RMS Score를 계산합니다.
+        링 버퍼가 제곱합을 유지하므로 윈도우 길이와 무관하게 O(1)입니다.
+        t_ms: 샘플 도착 시각 (ms). ms 단위 윈도우에 사용되며 None이면 현재 시각을 사용합니다.
+        """
+        if t_ms is None:
+            t_ms = time.monotonic() * 1000.0
+
+        # 1. 버퍼 업데이트
+        self.rms_buffer.push(movement_a)
+        self.windows.push(movement_a, t_ms)
+        
+        # 2. RMS 계산
+        try:
+            current_rms = self.rms_buffer.rms()
+        except Exception as e:
+            log_utils.log_once_per(log, logging.ERROR, "RMS Calculation Error: %s", e)
+            current_rms = 0.0
+
+        self.latest_rms_score = current_rms
+        if self.calibration is not None:
+            self.calibration.add(current_rms)
+        self._publish_snapshot(current_rms, t_ms)
+        return current_rms
+
+    def _publish_snapshot(self, rms, t_ms):
+        """새 샘플 스냅샷을 튜플 하나로 교체합니다."""
+        self.latest_snapshot = (rms, self.latest_snapshot[1] + 1, t_ms)
+
+    def get_window_stats(self, name):
+        """추가 윈도우의 (mean, variance, rms)를 반환합니다."""
+        window = self.windows[name]
+        return window.mean(), window.variance(), window.rms()
+
+
+def init_states(device_ids):
+    """설정된 보드 목록 순서대로 상태를 만들어 채널 번호를 고정합니다."""
+    for device_id in device_ids:
+        get_state(device_id)
+    return list(states.values())
+
+
+def get_state(device_id):
+    state = states.get(device_id)
+    if state is None:
+        state = SensorState(device_id, channel=len(states))
+        states[device_id] = state
+    return state
 
 
 def calculate_movement_a(raw_data):
@@ -21,11 +113,22 @@ def calculate_movement_a(raw_data):
     Movement_A = |가속도 벡터 크기 - 1.0g|
     """
     
-    # 1. 가속도 성분 계산 (g 단위)
+    # 1. 가속도 성분 (raw 정수값)
     ax = raw_data.get('ax', 0)
     ay = raw_data.get('ay', 0)
     az = raw_data.get('az', 0)
 
+    magnitude_g, movement_a = calculate_movement_a_xyz(ax, ay, az)
+    
+    return {'magnitude': magnitude_g, 'movement_a': movement_a}
+
+
+def calculate_movement_a_xyz(ax, ay, az):
+    """
+    calculate_movement_a의 dict를 만들지 않는 버전입니다. (바이너리 페이로드용)
+    (magnitude_g, movement_a) 튜플을 반환합니다.
+    """
+    # 1. 가속도 성분 계산 (g 단위)
     ax_g = ax / ACCEL_SCALE_FACTOR
     ay_g = ay / ACCEL_SCALE_FACTOR
     az_g = az / ACCEL_SCALE_FACTOR
@@ -37,34 +140,11 @@ def calculate_movement_a(raw_data):
     # 3. 순수한 운동 가속도 (Movement_A) 계산
     movement_a = abs(magnitude_g - G_CONSTANT)
     
-    return {'magnitude': magnitude_g, 'movement_a': movement_a}
+    return magnitude_g, movement_a
 
 
-def calculate_rms_score(movement_a):
-    """
-    RMS_BUFFER의 데이터와 새로운 movement_a를 사용하여 RMS Score를 계산합니다.
-    """
-    global RMS_BUFFER, latest_rms_score
-    
-    # 1. 버퍼 업데이트
-    RMS_BUFFER.append(movement_a)
-    
-    # 2. 현재 유효 데이터 개수 (M) 확인
-    current_M = len(RMS_BUFFER)
-    
-    if current_M == 0:
-        latest_rms_score = 0.0
-        return 0.0
-    
-    # 3. RMS 계산
-    try:
-        sum_of_squares = sum(x**2 for x in RMS_BUFFER)
-        current_rms = math.sqrt(sum_of_squares / current_M)
-        
-        latest_rms_score = current_rms
-        return current_rms
-        
-    except Exception as e:
-        print(f"RMS Calculation Error: {e}")
-        latest_rms_score = 0.0
-        return 0.0
\ No newline at end of file
+def calculate_rms_score(movement_a, t_ms=None, device_id=None):
+    """보드 상태(device_id, 생략 시 첫 번째 설정 보드)에 샘플을 추가하고 RMS Score를 반환합니다."""
+    if device_id is None:
+        device_id = config.BLE_TARGET_NAMES[0]
+    return get_state(device_id).calculate_rms_score(movement_a, t_ms)
@@ -0,0 +1,110 @@
+# speed_control.py
+# RMS Score -> 게임 속도 변환 (speed_filters 체인: Dead Zone, 모멘텀 등)과 전송 메시지(JSON 라인 / 바이너리 프레임) 생성.
+# main_server와 벤치마크/시뮬레이터가 같은 코드를 쓰도록 분리했습니다.
+
+import json
+import logging
+import time
+import config
+import log_utils
+import speed_filters
+import game_protocol
+
+log = log_utils.get_logger(__name__)
+
+
+# 💡 compute_applied_speed(state, current_rms_score) -> (target_speed, applied_speed)
+#    config.SPEED_FILTER_CHAIN을 speed_filters가 함수 1개로 컴파일한 것입니다. (보드 state의 모멘텀/필터 상태 갱신)
+#    config 값을 실행 중에 바꾼 경우(튜닝 등) configure()를 다시 호출해야 반영됩니다.
+compute_applied_speed = None
+
+
+def configure(chain=None):
+    """속도 필터 체인을 다시 만듭니다. chain: 프리셋 이름 또는 단계 목록 (None이면 config.SPEED_FILTER_CHAIN)"""
+    global compute_applied_speed
+    compute_applied_speed = speed_filters.build_chain(config.SPEED_FILTER_CHAIN if chain is None else chain)
+    return compute_applied_speed
+
+
+configure()
+
+
+class SpeedUpdate:
+    """
+    한 번 계산한 속도 값을 필요한 형식으로만 인코딩합니다. (클라이언트별 JSON / 바이너리, 형식마다 1번만 생성)
+    keepalive 재전송은 같은 객체를 다시 보내므로 seq/서버 시각도 그대로입니다.
+    """
+    __slots__ = ("seq", "server_ms", "speeds", "rms_scores", "trace", "_json", "_frame")
+
+    def __init__(self, seq, server_ms, speeds, rms_scores, trace):
+        self.seq = seq
+        self.server_ms = server_ms
+        self.speeds = speeds
+        self.rms_scores = rms_scores
+        self.trace = trace # (BLE 수신 ms, RMS 계산 ms) 또는 None
+        self._json = None
+        self._frame = None
+
+    def as_json(self):
+        """
+        JSON 라인 (버전 1, 기존 형식)
+        speed: 첫 번째 보드 (기존 게임 호환), speeds: 채널 순서대로 모든 보드의 속도
+        t: (TRACE_ENABLED) 가장 최근에 갱신된 보드의 [BLE 수신, RMS 계산, 전송] 시각
+        """
+        if self._json is None:
+            data_to_send = {"speed": self.speeds[0], "speeds": self.speeds}
+            if self.trace is not None:
+                data_to_send["t"] = [round(self.trace[0], 3), round(self.trace[1], 3), round(self.server_ms, 3)]
+            self._json = (json.dumps(data_to_send) + '\n').encode('utf-8')
+        return self._json
+
+    def as_frame(self):
+        """바이너리 SPEED 프레임 (버전 2, common/game_protocol.py)"""
+        if self._frame is None:
+            self._frame = game_protocol.encode_speed(self.seq, self.server_ms, self.speeds, self.rms_scores, self.trace)
+        return self._frame
+
+
+_update_seq = 0 # 새 속도 계산마다 +1 (바이너리 프레임의 seq)
+
+
+def build_speed_update(board_states, step_all=False):
+    """
+    모든 보드(board_states)의 속도를 계산하여 SpeedUpdate를 만듭니다.
+    새 샘플이 들어온 보드만 모멘텀을 한 단계 진행합니다. (step_all=True면 전부 진행: interval 모드)
+    """
+    global _update_seq
+    speeds = []
+    rms_scores = []
+    trace_state = None
+    for state in board_states:
+        current_rms_score, seq, _ = state.latest_snapshot
+        if step_all or seq != state.published_seq:
+            state.published_seq = seq
+            if trace_state is None or state.trace_recv_ms > trace_state.trace_recv_ms:
+                trace_state = state
+            target_speed, current_applied_speed = compute_applied_speed(state, current_rms_score)
+
+            # ⭐️ 실시간 출력 (DEBUG 레벨에서 보드별 초당 1번)
+            log_utils.log_once_per(log, logging.DEBUG,
+                                   "TCP -> [%s] RMS Score: %.4f | Target Speed: %.4f | Applied Speed: %.4f",
+                                   state.device_id, current_rms_score, target_speed, current_applied_speed,
+                                   key=state.device_id)
+        speeds.append(state.previous_applied_speed)
+        rms_scores.append(current_rms_score)
+
+    trace = None
+    if config.TRACE_ENABLED and trace_state is not None:
+        trace = (trace_state.trace_recv_ms, trace_state.trace_rms_ms)
+    _update_seq = (_update_seq + 1) & game_protocol.SEQ_MASK
+    return SpeedUpdate(_update_seq, time.monotonic() * 1000.0, speeds, rms_scores, trace)
+
+
+def build_speed_message(board_states, step_all=False):
+    """속도를 계산하여 JSON 라인(bytes)을 만듭니다. (build_speed_update(...).as_json())"""
+    return build_speed_update(board_states, step_all).as_json()
+
+
+def build_speed_frame(board_states, step_all=False):
+    """속도를 계산하여 바이너리 SPEED 프레임(bytes)을 만듭니다. (build_speed_update(...).as_frame())"""
+    return build_speed_update(board_states, step_all).as_frame()
@@ -0,0 +1,229 @@
+# speed_filters.py
+# RMS Score -> 속도 변환을 설정 가능한 필터 체인으로 구성합니다.
+#
+# 체인은 config.SPEED_FILTER_PRESETS / SPEED_FILTER_CHAIN에 (단계 이름, 파라미터) 목록으로 적습니다.
+# 파라미터 값이 문자열이면 config의 같은 이름 상수 값으로 바꿉니다. (예: "RMS_DEAD_ZONE")
+#
+# 💡 build_chain()은 단계들을 파이썬 소스 한 덩어리로 이어 붙여 함수 1개로 컴파일합니다. (fusion)
+#    -> 샘플마다 단계별 함수 호출/객체/dict 생성이 없고, 상수는 컴파일 시점에 코드에 박힙니다.
+#    단계 상태(EMA, One-Euro, slew)는 보드 state.filter_state 리스트 1개에 슬롯으로 보관합니다.
+#
+# 단계 목록:
+#   threshold(limit)              : limit 이상이면 비정상 값으로 보고 0 (ERROR 로그, 초당 1번)
+#   dead_zone(zone)               : zone 이하면 0, 아니면 x - zone
+#   clamp(low, high)              : low ~ high로 제한
+#   linear(scale, divisor, offset): x / divisor * scale + offset
+#   momentum(up, down)            : 직전 적용 속도 대비 가속은 up배, 감속은 down배 (기존 모멘텀 로직)
+#   ema(alpha)                    : 지수 이동 평균
+#   one_euro(min_cutoff, beta, d_cutoff, rate_hz): One-Euro 필터 (느릴 때 부드럽게, 빠를 때 지연 적게)
+#   slew(up, down)                : 샘플당 최대 증가/감소량 제한
+#   lut(points, size)             : (x, y) 꺾은선 곡선을 균일 테이블로 미리 계산해 보간
+
+import logging
+import math
+import config
+import log_utils
+
+log = log_utils.get_logger("speed_control") # 기존과 같은 로거 (config.LOG_MODULE_LEVELS["speed_control"])
+
+# 상태를 가지는 단계: 첫 상태 단계 직전 값이 target_speed (로그/디버그용 목표 속도)
+STATEFUL_STAGES = ("momentum", "ema", "one_euro", "slew")
+LUT_SIZE = 256 # lut 단계의 기본 테이블 구간 수
+
+
+def _log_error_score(score):
+    log_utils.log_once_per(log, logging.ERROR, "[SERVER_ERROR] 비정상적인 RMS Score (%.4f) 감지. 0.00 처리.", score)
+
+
+def resolve_chain(chain):
+    """
+    체인 설정을 (단계 이름, {파라미터: 값}) 목록으로 풉니다.
+    chain이 문자열이면 config.SPEED_FILTER_PRESETS의 프리셋 이름입니다.
+    """
+    if isinstance(chain, str):
+        try:
+            chain = config.SPEED_FILTER_PRESETS[chain]
+        except KeyError:
+            raise ValueError(f"알 수 없는 속도 필터 프리셋: {chain} (가능: {', '.join(config.SPEED_FILTER_PRESETS)})")
+    stages = []
+    for name, params in chain:
+        values = {}
+        for key, value in (params or {}).items():
+            if isinstance(value, str):
+                if not hasattr(config, value):
+                    raise ValueError(f"{name}.{key}: config에 {value}가 없습니다.")
+                value = getattr(config, value)
+            values[key] = value
+        stages.append((name, values))
+    return stages
+
+
+# ----------------- 단계별 코드 생성 -----------------
+# 각 함수는 (코드 줄 목록, 상태 슬롯 초기값 목록)을 반환합니다.
+# 입력/출력 값은 지역 변수 x, 상태 슬롯은 fs[base], fs[base + 1], ...
+
+def _stage_threshold(consts, base, limit):
+    return [f"if x >= {limit!r}:",
+            "    _log_error_score(x)",
+            "    x = 0.0"], []
+
+
+def _stage_dead_zone(consts, base, zone):
+    return [f"x = x - {zone!r} if x > {zone!r} else 0.0"], []
+
+
+def _stage_clamp(consts, base, low=None, high=None):
+    lines = []
+    if high is not None:
+        lines += [f"if x > {high!r}:", f"    x = {high!r}"]
+    if low is not None:
+        lines += [f"{'elif' if lines else 'if'} x < {low!r}:", f"    x = {low!r}"]
+    return lines, []
+
+
+def _stage_linear(consts, base, scale=1.0, divisor=1.0, offset=0.0):
+    expr = "x"
+    if divisor != 1.0:
+        expr += f" / {divisor!r}"
+    if scale != 1.0:
+        expr += f" * {scale!r}"
+    if offset != 0.0:
+        expr += f" + {offset!r}"
+    return ([f"x = {expr}"] if expr != "x" else []), []
+
+
+def _stage_momentum(consts, base, up=1.0, down=1.0):
+    # 기존 로직과 같게 직전 '최종 적용 속도'를 기준으로 합니다.
+    return ["p = state.previous_applied_speed",
+            "d = x - p",
+            "if d > 0:",
+            f"    x = p + d * {up!r}" if up != 1.0 else "    x = p + d",
+            "else:",
+            f"    x = p + d * {down!r}" if down != 1.0 else "    x = p + d"], []
+
+
+def _stage_ema(consts, base, alpha):
+    if not 0.0 < alpha <= 1.0:
+        raise ValueError(f"ema.alpha는 0 < alpha <= 1 이어야 합니다: {alpha}")
+    return [f"s = fs[{base}]",
+            f"x = fs[{base}] = s + (x - s) * {alpha!r}"], [0.0]
+
+
+def _stage_one_euro(consts, base, min_cutoff=1.0, beta=0.0, d_cutoff=1.0, rate_hz=None):
+    rate = float(rate_hz or config.SPEED_FILTER_RATE_HZ)
+    k = rate / (2.0 * math.pi) # alpha(fc) = fc / (fc + k)
+    a_d = d_cutoff / (d_cutoff + k)
+    # 슬롯: 직전 출력, 미분 EMA
+    return [f"s = fs[{base}]",
+            f"e = fs[{base + 1}]",
+            f"e = fs[{base + 1}] = e + ((x - s) * {rate!r} - e) * {a_d!r}",
+            f"c = {min_cutoff!r} + {beta!r} * (e if e >= 0.0 else -e)",
+            f"x = fs[{base}] = s + (x - s) * (c / (c + {k!r}))"], [0.0, 0.0]
+
+
+def _stage_slew(consts, base, up, down=None):
+    down = up if down is None else down
+    return [f"s = fs[{base}]",
+            "d = x - s",
+            f"if d > {up!r}:",
+            f"    x = s + {up!r}",
+            f"elif d < {-down!r}:",
+            f"    x = s - {down!r}",
+            f"fs[{base}] = x"], [0.0]
+
+
+def _stage_lut(consts, base, points, size=LUT_SIZE):
+    points = sorted((float(px), float(py)) for px, py in points)
+    if len(points) < 2:
+        raise ValueError("lut.points에는 점이 2개 이상 필요합니다.")
+    x0, y0 = points[0]
+    xn, yn = points[-1]
+    step = (xn - x0) / size
+
+    def curve(v):
+        for (ax, ay), (bx, by) in zip(points, points[1:]):
+            if v <= bx:
+                return ay if bx == ax else ay + (by - ay) * (v - ax) / (bx - ax)
+        return yn
+
+    table = [curve(x0 + step * i) for i in range(size + 1)]
+    slopes = [table[i + 1] - table[i] for i in range(size)]
+    # 테이블은 튜플 상수로 함수 전역에 바인딩 (샘플마다 새 객체 없음)
+    t_name, s_name = f"_lut{base}_{len(consts)}", f"_slope{base}_{len(consts)}"
+    consts[t_name] = tuple(table)
+    consts[s_name] = tuple(slopes)
+    return [f"if x <= {x0!r}:",
+            f"    x = {y0!r}",
+            f"elif x >= {xn!r}:",
+            f"    x = {yn!r}",
+            "else:",
+            f"    f = (x - {x0!r}) * {1.0 / step!r}",
+            "    j = int(f)",
+            f"    if j >= {size}:",
+            f"        j = {size - 1}",
+            f"    x = {t_name}[j] + {s_name}[j] * (f - j)"], []
+
+
+STAGES = {
+    "threshold": _stage_threshold,
+    "dead_zone": _stage_dead_zone,
+    "clamp": _stage_clamp,
+    "linear": _stage_linear,
+    "momentum": _stage_momentum,
+    "ema": _stage_ema,
+    "one_euro": _stage_one_euro,
+    "slew": _stage_slew,
+    "lut": _stage_lut,
+}
+
+
+def build_chain(chain):
+    """
+    체인 설정(프리셋 이름 또는 단계 목록)을 함수 1개로 컴파일합니다.
+    반환: apply(state, rms_score) -> (target_speed, applied_speed)
+          최종 값은 state.previous_applied_speed에 저장됩니다. (apply.source에 생성된 코드)
+    """
+    stages = resolve_chain(chain)
+    consts = {"_log_error_score": _log_error_score}
+    body = []
+    slots = []
+    target_marked = False
+    for name, params in stages:
+        builder = STAGES.get(name)
+        if builder is None:
+            raise ValueError(f"알 수 없는 속도 필터 단계: {name} (가능: {', '.join(STAGES)})")
+        if name in STATEFUL_STAGES and not target_marked:
+            body.append("t = x")
+            target_marked = True
+        try:
+            lines, init = builder(consts, len(slots) + 1, **params)
+        except TypeError as e:
+            raise ValueError(f"{name} 단계 파라미터 오류: {e}")
+        body.append(f"# {name} {params}")
+        body.extend(lines)
+        slots.extend(init)
+    if not target_marked:
+        body.append("t = x")
+
+    src = ["def apply(state, x):"]
+    if slots:
+        # 슬롯 0은 체인 식별자: 체인이 바뀌었거나 state.reset() 후면 상태를 새로 만듭니다.
+        consts["_CHAIN_ID"] = object()
+        init = ", ".join(repr(v) for v in slots)
+        src += ["    try:",
+                "        fs = state.filter_state",
+                "        if fs[0] is not _CHAIN_ID:",
+                "            raise TypeError",
+                "    except (AttributeError, TypeError, IndexError):",
+                f"        fs = state.filter_state = [_CHAIN_ID, {init}]"]
+    src += ["    " + line for line in body]
+    src += ["    state.previous_applied_speed = x",
+            "    return t, x"]
+    source = "\n".join(src) + "\n"
+
+    namespace = dict(consts)
+    exec(compile(source, f"<speed_filters:{chain if isinstance(chain, str) else 'custom'}>", "exec"), namespace)
+    apply = namespace["apply"]
+    apply.source = source
+    apply.stages = [name for name, _ in stages]
+    return apply
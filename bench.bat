@@ -0,0 +1,6 @@
+@echo off
+REM 배치 파일이 위치한 폴더(루트 폴더)를 현재 작업 디렉토리(CWD)로 설정합니다.
+cd /d "%~dp0"
+
+REM 서버 파이프라인 벤치마크를 실행하고 기준값 대비 성능 회귀를 검사합니다.
+python benchmarks\bench_pipeline.py --check %*
\ No newline at end of file
@@ -0,0 +1,356 @@
+# bench_pipeline.py
+# 서버 파이프라인(센서 계산 -> 속도 변환 -> JSON 인코딩)과 게임 수신 파싱의 마이크로벤치마크입니다.
+#
+# 사용법 (프로젝트 루트에서):
+#   python benchmarks\bench_pipeline.py                       # 합성 데이터로 측정
+#   python benchmarks\bench_pipeline.py --log recordings\x.rglog  # 녹화 로그로 측정
+#   python benchmarks\bench_pipeline.py --save-baseline       # 결과를 기준값(JSON)으로 저장
+#   python benchmarks\bench_pipeline.py --check               # 기준값 대비 THRESHOLD 이상 느려지면 실패(exit 1)
+#
+# 기준값은 측정한 PC에서만 의미가 있으므로 저장소에 올리지 않습니다.
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "common"))
+sys.path.insert(0, os.path.join(ROOT, "Server"))
+sys.path.insert(0, os.path.join(ROOT, "pygame"))
+
+import config
+import sensor_processor as sp
+import ble_protocol as bp
+import speed_control
+import speed_filters
+import network_client
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+DEFAULT_THRESHOLD = 0.25 # 25% 이상 느려지면 회귀로 판단
+ALLOC_SAMPLE_OPS = 200 # 할당량 측정에 사용할 호출 수
+
+BENCHMARKS = {} # 이름 -> 팩토리(stream) -> op()
+
+
+def benchmark(name):
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+# ----------------- 입력 스트림 -----------------
+def synthetic_stream(count=5000, seed=42):
+    """정지(노이즈) -> 흔들기 -> 정지를 반복하는 합성 (ax, ay, az) raw 샘플."""
+    rng = random.Random(seed)
+    one_g = int(config.ACCEL_SCALE_FACTOR)
+    samples = []
+    for i in range(count):
+        phase = (i // 200) % 2 # 200샘플마다 정지/흔들기 전환
+        amp = 0.05 if phase == 0 else 1.2
+        shake = amp * math.sin(i * 0.9) * one_g
+        samples.append((
+            int(rng.gauss(0, 40) + shake * 0.3),
+            int(rng.gauss(0, 40) + shake * 0.2),
+            int(one_g + rng.gauss(0, 40) + shake),
+        ))
+    return samples
+
+
+def recorded_stream(path):
+    """녹화 로그(sensor_log)의 모든 알림을 (ax, ay, az) 샘플 목록으로 펼칩니다."""
+    import sensor_log
+    samples = []
+    with sensor_log.SensorLogReader(path) as reader:
+        for _, _, payload in reader.records():
+            try:
+                _, _, count, values = bp.decode_notification(payload)
+            except ValueError:
+                continue
+            for i in range(count):
+                base = i * bp.SAMPLE_FIELDS
+                samples.append((values[base], values[base + 1], values[base + 2]))
+    return samples
+
+
+def cycle(items):
+    """op마다 다음 항목을 돌려주는 가벼운 순환자."""
+    n = len(items)
+    state = [0]
+
+    def next_item():
+        i = state[0]
+        state[0] = i + 1 if i + 1 < n else 0
+        return items[i]
+    return next_item
+
+
+# ----------------- 벤치마크 대상 -----------------
+@benchmark("calculate_movement_a")
+def bench_movement_a(stream):
+    dicts = cycle([{"ax": ax, "ay": ay, "az": az} for ax, ay, az in stream])
+    return lambda: sp.calculate_movement_a(dicts())
+
+
+@benchmark("calculate_movement_a_xyz")
+def bench_movement_a_xyz(stream):
+    samples = cycle(stream)
+
+    def op():
+        ax, ay, az = samples()
+        sp.calculate_movement_a_xyz(ax, ay, az)
+    return op
+
+
+@benchmark("calculate_rms_score")
+def bench_rms(stream):
+    state = sp.SensorState("bench")
+    values = cycle([sp.calculate_movement_a_xyz(*s)[1] for s in stream])
+    t = [0.0]
+
+    def op():
+        t[0] += 45.0
+        state.calculate_rms_score(values(), t[0])
+    return op
+
+
+@benchmark("decode_binary_notification")
+def bench_decode_binary(stream):
+    payloads = cycle([bp.encode_binary(i, i * 45, [s + (0, 0, 0)]) for i, s in enumerate(stream)])
+    return lambda: bp.decode_notification(payloads())
+
+
+@benchmark("decode_json_notification")
+def bench_decode_json(stream):
+    payloads = cycle([json.dumps({"ax": ax, "ay": ay, "az": az, "gx": 0, "gy": 0, "gz": 0}).encode()
+                      for ax, ay, az in stream])
+    return lambda: bp.decode_notification(payloads())
+
+
+@benchmark("compute_applied_speed")
+def bench_speed_mapping(stream):
+    state = sp.SensorState("bench")
+    rms_values = []
+    for s in stream:
+        rms_values.append(state.calculate_rms_score(sp.calculate_movement_a_xyz(*s)[1], 0.0))
+    values = cycle(rms_values)
+    return lambda: speed_control.compute_applied_speed(state, values())
+
+
+def _bench_filter_chain(preset):
+    """필터 체인 프리셋 1개를 컴파일한 함수의 샘플당 비용 (체인별 A/B 비교용)"""
+    def factory(stream):
+        state = sp.SensorState("bench")
+        rms_values = []
+        for s in stream:
+            rms_values.append(state.calculate_rms_score(sp.calculate_movement_a_xyz(*s)[1], 0.0))
+        values = cycle(rms_values)
+        apply = speed_filters.build_chain(preset)
+        return lambda: apply(state, values())
+    return factory
+
+
+for _preset in config.SPEED_FILTER_PRESETS:
+    benchmark(f"speed_filter[{_preset}]")(_bench_filter_chain(_preset))
+
+
+@benchmark("build_speed_message")
+def bench_message(stream):
+    states = [sp.SensorState(f"bench{i}", i) for i in range(len(config.BLE_TARGET_NAMES))]
+    values = cycle([sp.calculate_movement_a_xyz(*s)[1] for s in stream])
+
+    def op():
+        for state in states:
+            state.calculate_rms_score(values(), 0.0)
+        speed_control.build_speed_message(states)
+    return op
+
+
+@benchmark("network_client.process_chunk")
+def bench_client_framing(stream):
+    """수신 스레드가 청크 1개(서버 메시지 1줄)를 프레이밍하고 파싱하는 비용."""
+    states = [sp.SensorState(f"bench{i}", i) for i in range(len(config.BLE_TARGET_NAMES))]
+    lines = []
+    for s in stream[:1000]:
+        for state in states:
+            state.calculate_rms_score(sp.calculate_movement_a_xyz(*s)[1], 0.0)
+        lines.append(speed_control.build_speed_message(states))
+    lines = cycle(lines)
+
+    recv_buf = bytearray(network_client.RECV_BUFFER_SIZE)
+    recv_view = memoryview(recv_buf)
+    partial = bytearray()
+
+    def op():
+        line = lines()
+        n = len(line)
+        recv_buf[:n] = line
+        network_client.process_chunk(recv_buf, recv_view, n, partial)
+    return op
+
+
+@benchmark("build_speed_frame")
+def bench_frame(stream):
+    """build_speed_message와 같은 계산 + 바이너리 프레임 인코딩 (common/game_protocol.py)"""
+    states = [sp.SensorState(f"bench{i}", i) for i in range(len(config.BLE_TARGET_NAMES))]
+    values = cycle([sp.calculate_movement_a_xyz(*s)[1] for s in stream])
+
+    def op():
+        for state in states:
+            state.calculate_rms_score(values(), 0.0)
+        speed_control.build_speed_frame(states)
+    return op
+
+
+@benchmark("network_client.process_frames")
+def bench_client_frames(stream):
+    """수신 스레드가 청크 1개(바이너리 SPEED 프레임 1개)를 프레이밍하고 푸는 비용."""
+    states = [sp.SensorState(f"bench{i}", i) for i in range(len(config.BLE_TARGET_NAMES))]
+    frames = []
+    for s in stream[:1000]:
+        for state in states:
+            state.calculate_rms_score(sp.calculate_movement_a_xyz(*s)[1], 0.0)
+        frames.append(speed_control.build_speed_frame(states))
+    frames = cycle(frames)
+
+    recv_buf = bytearray(network_client.RECV_BUFFER_SIZE)
+    recv_view = memoryview(recv_buf)
+    partial = bytearray()
+
+    def op():
+        frame = frames()
+        n = len(frame)
+        recv_buf[:n] = frame
+        network_client.last_frame_seq = None # 같은 프레임이 반복되어도 매번 풀도록
+        network_client.process_frames(recv_buf, recv_view, n, partial)
+    return op
+
+
+@benchmark("network_client.get_player_data")
+def bench_client_read(stream):
+    """렌더 루프가 매 프레임 최신 속도를 읽는 비용."""
+    return network_client.get_player_data
+
+
+# ----------------- 측정 -----------------
+def time_ops(op, n):
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        op()
+    return time.perf_counter_ns() - start
+
+
+def measure(op, min_round_ns=50_000_000, rounds=5):
+    """round당 최소 시간을 채우도록 반복 횟수를 정하고, 여러 round 중 최소 ns/op를 사용합니다."""
+    n = 1
+    while True:
+        elapsed = time_ops(op, n)
+        if elapsed >= min_round_ns or n >= 1 << 24:
+            break
+        n = min(1 << 24, max(n * 2, int(n * 1.1 * min_round_ns / max(elapsed, 1))))
+    best = min(time_ops(op, n) for _ in range(rounds))
+    return best / n
+
+
+def measure_alloc(op, ops=ALLOC_SAMPLE_OPS):
+    """op 1회 동안 새로 할당된 메모리의 최대량 평균 (tracemalloc 기준, bytes/op)."""
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(ops):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            op()
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / ops
+
+
+def run(stream, only=None):
+    results = {}
+    # 측정 대상의 콘솔 출력이 결과 표를 덮지 않도록 stdout을 버립니다. (출력 비용은 포함됨)
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        for name, factory in BENCHMARKS.items():
+            if only and not any(key in name for key in only):
+                continue
+            op = factory(stream)
+            with contextlib.redirect_stdout(devnull):
+                ns = measure(op)
+                alloc = measure_alloc(op)
+            results[name] = {"ns_per_op": round(ns, 1), "alloc_bytes_per_op": round(alloc, 1)}
+            print(f"{name:<34}{ns:>12.1f} ns/op{alloc:>12.1f} B/op")
+    return results
+
+
+def check(results, baseline, threshold):
+    """기준값 대비 threshold 이상 느려진 항목 목록을 반환합니다."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        ratio = result["ns_per_op"] / max(base["ns_per_op"], 1e-9)
+        if ratio > 1.0 + threshold:
+            regressions.append(f"{name}: {base['ns_per_op']:.1f} -> {result['ns_per_op']:.1f} ns/op (x{ratio:.2f})")
+        grown = result["alloc_bytes_per_op"] - base["alloc_bytes_per_op"]
+        if grown > 64 and result["alloc_bytes_per_op"] > base["alloc_bytes_per_op"] * (1.0 + threshold):
+            regressions.append(f"{name}: {base['alloc_bytes_per_op']:.0f} -> {result['alloc_bytes_per_op']:.0f} B/op")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="서버 파이프라인 마이크로벤치마크")
+    parser.add_argument("--log", metavar="RGLOG", help="합성 데이터 대신 녹화 로그 사용")
+    parser.add_argument("--only", nargs="*", help="이름에 해당 문자열이 들어간 벤치마크만 실행")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="기준값 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="결과를 기준값으로 저장")
+    parser.add_argument("--check", action="store_true", help="기준값 대비 회귀 시 exit 1")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="허용 비율 (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    if args.log:
+        stream = recorded_stream(args.log)
+        source = os.path.basename(args.log)
+    else:
+        stream = synthetic_stream()
+        source = "synthetic"
+    if not stream:
+        print(f"[BENCH] 샘플이 없습니다: {source}")
+        return 1
+
+    print(f"[BENCH] stream={source} ({len(stream)} samples), Python {platform.python_version()}")
+    results = run(stream, args.only)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"stream": source, "python": platform.python_version(),
+                       "machine": platform.node(), "results": results}, f, indent=2)
+        print(f"[BENCH] 기준값 저장: {args.baseline}")
+
+    if args.check:
+        try:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except OSError:
+            print(f"[BENCH] 기준값 파일이 없습니다: {args.baseline} (--save-baseline 먼저 실행)")
+            return 1
+        regressions = check(results, baseline, args.threshold)
+        if regressions:
+            print(f"[BENCH] ❌ 성능 회귀 {len(regressions)}건 (허용 {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"[BENCH] ✅ 회귀 없음 (허용 {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+# race_tuning.py
+# 화면 없이 경주를 대량으로 시뮬레이션해 난이도 파라미터를 튜닝합니다.
+#
+# 센서 트레이스(녹화 로그 또는 합성 플레이어)를
+#   sensor_processor (movement_a -> RMS) -> speed_control (Dead Zone, 모멘텀) -> race_sim (경주 규칙)
+# 순서로 그대로 흘려 보내고, 파라미터 조합마다 승률과 완주 시간 분포를 출력합니다.
+#
+# 사용법 (프로젝트 루트에서):
+#   python benchmarks\race_tuning.py                                   # 현재 설정, 합성 플레이어 200명
+#   python benchmarks\race_tuning.py --grid AI_SPEED=1.2,1.5,1.8 --grid ACCELERATION_RATE=1.0,1.5
+#   python benchmarks\race_tuning.py --log recordings\x.rglog --target-win-rate 0.6 --csv result.csv
+#   python benchmarks\race_tuning.py --filter legacy ema one_euro                  # 속도 필터 A/B
+
+import argparse
+import bisect
+import concurrent.futures
+import csv
+import itertools
+import math
+import os
+import random
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "common"))
+sys.path.insert(0, os.path.join(ROOT, "Server"))
+sys.path.insert(0, os.path.join(ROOT, "pygame"))
+
+import config
+import sensor_processor as sp
+import ble_protocol as bp
+import speed_control
+import race_sim
+
+# 튜닝 대상 파라미터 -> 기본값 (서버 config / 게임 config_utils와 같은 값)
+SERVER_PARAMS = ["TARGET_MAX_SPEED", "ACCELERATION_RATE", "RMS_DEAD_ZONE", "RMS_MAX_SCORE"]
+GAME_PARAMS = {"AI_SPEED": 0.5 * 3, "PLAYER_SPEED_CORRECTION": 0.22} # config_utils는 pygame이 필요하므로 값만 복사
+# 경주 시간 기준 트랙 (config_utils.race_track_px: RACE_REFERENCE_WIDTH, BOX_SIZE, TRACK_START/FINISH_RATIO 값 복사)
+TRACK_PX = race_sim.track_length_px(1920, 50 * 9, 0.00, 0.95)
+SYNTHETIC_DURATION_S = 60.0
+
+
+# ----------------- 트레이스 (시각 s, RMS Score) -----------------
+def rms_trace(samples):
+    """(t_ms, ax, ay, az) 목록을 sensor_processor로 처리해 (시각 s 목록, RMS 목록)을 만듭니다."""
+    state = sp.SensorState("tuning")
+    times, scores = [], []
+    t0 = samples[0][0] if samples else 0.0
+    for t_ms, ax, ay, az in samples:
+        _, movement_a = sp.calculate_movement_a_xyz(ax, ay, az)
+        times.append((t_ms - t0) / 1000.0)
+        scores.append(state.calculate_rms_score(movement_a, t_ms))
+    return times, scores
+
+
+def synthetic_player(seed, duration_s=SYNTHETIC_DURATION_S):
+    """
+    합성 플레이어 1명의 raw 샘플. 사람마다 흔드는 세기/빠르기, 반응 시간, 지치는 정도가 다릅니다.
+    """
+    rng = random.Random(seed)
+    one_g = config.ACCEL_SCALE_FACTOR
+    amplitude = rng.uniform(0.2, 1.4) # 흔드는 세기 (g)
+    cadence_hz = rng.uniform(1.5, 3.5)
+    reaction_s = rng.uniform(0.2, 1.0)
+    fatigue = rng.uniform(0.0, 0.03) # 초당 세기 감소 비율
+    interval_ms = config.BLE_SAMPLE_INTERVAL_MS
+    samples = []
+    for i in range(int(duration_s * 1000 / interval_ms)):
+        t = i * interval_ms / 1000.0
+        amp = 0.0 if t < reaction_s else amplitude * max(0.2, 1.0 - fatigue * (t - reaction_s))
+        shake = amp * math.sin(2 * math.pi * cadence_hz * t) * one_g
+        samples.append((
+            i * interval_ms,
+            int(rng.gauss(0, 40) + shake * 0.3),
+            int(rng.gauss(0, 40) + shake * 0.2),
+            int(one_g + rng.gauss(0, 40) + shake),
+        ))
+    return samples
+
+
+def recorded_players(path):
+    """녹화 로그의 보드마다 트레이스 1개 (알림 도착 시각 + 샘플 간격으로 샘플 시각 추정)."""
+    import sensor_log
+    per_device = {}
+    with sensor_log.SensorLogReader(path) as reader:
+        for t_ms, device, payload in reader.records():
+            try:
+                _, _, count, values = bp.decode_notification(payload)
+            except ValueError:
+                continue
+            samples = per_device.setdefault(device, [])
+            for i in range(count):
+                base = i * bp.SAMPLE_FIELDS
+                sample_ms = t_ms - (count - 1 - i) * config.BLE_SAMPLE_INTERVAL_MS
+                samples.append((sample_ms, values[base], values[base + 1], values[base + 2]))
+    return list(per_device.values())
+
+
+# ----------------- 워커 -----------------
+_traces = None
+
+
+def _init_worker(traces):
+    global _traces
+    _traces = traces
+
+
+def apply_params(params):
+    """서버 파라미터는 config 모듈 값을 바꾼 뒤 속도 필터 체인을 다시 컴파일합니다. (상수가 코드에 박히므로)"""
+    for name in SERVER_PARAMS:
+        if name in params:
+            setattr(config, name, params[name])
+    config.RMS_ACTIVE_RANGE = config.RMS_MAX_SCORE - config.RMS_DEAD_ZONE
+    speed_control.configure(params.get("FILTER"))
+
+
+def simulate_race(times, scores, params, max_time_s):
+    """트레이스 1개로 경주 1번. (winner, finish_time)"""
+    sim = race_sim.RaceSimulation(params["AI_SPEED"], params["PLAYER_SPEED_CORRECTION"], TRACK_PX)
+
+    # 💡 AI가 도착하는 시각 이후의 샘플은 결과에 영향이 없으므로 속도 계산을 생략
+    end_time = min(max_time_s, 1.0 / sim.ai_ups if sim.ai_ups > 0 else max_time_s) + sim.dt
+    n = bisect.bisect_right(times, end_time)
+    momentum = types.SimpleNamespace(previous_applied_speed=0.0)
+    compute = speed_control.compute_applied_speed
+    applied = [compute(momentum, scores[i])[1] for i in range(n)]
+
+    # 서버 event 모드: 샘플이 처리될 때마다 최신 속도가 게임에 반영됨
+    cursor = [0, 0.0]
+
+    def speed_at(t):
+        i, speed = cursor
+        while i < n and times[i] <= t:
+            speed = applied[i]
+            i += 1
+        cursor[0], cursor[1] = i, speed
+        return speed
+
+    return sim.run_headless(speed_at, max_time_s)
+
+
+def run_config(params, max_time_s):
+    apply_params(params)
+    results = [simulate_race(times, scores, params, max_time_s) for times, scores in _traces]
+    return params, results
+
+
+# ----------------- 집계 -----------------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float("nan")
+    idx = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def summarize(params, results):
+    wins = sorted(t for winner, t in results if winner == "PLAYER")
+    unfinished = sum(1 for winner, _ in results if winner is None)
+    return {
+        **params,
+        "races": len(results),
+        "win_rate": len(wins) / len(results) if results else 0.0,
+        "unfinished": unfinished,
+        "finish_p10": percentile(wins, 10),
+        "finish_p50": percentile(wins, 50),
+        "finish_p90": percentile(wins, 90),
+        "ai_time": 1.0 / race_sim.per_frame_to_ups(params["AI_SPEED"], TRACK_PX) if params["AI_SPEED"] > 0 else float("inf"),
+    }
+
+
+def parse_grid(items, filters=None):
+    """
+    ["AI_SPEED=1.2,1.5", ...] -> 파라미터 조합 목록 (지정하지 않은 값은 현재 설정)
+    filters: 비교할 속도 필터 프리셋 이름 목록 (FILTER 축)
+    """
+    base = {name: getattr(config, name) for name in SERVER_PARAMS}
+    base.update(GAME_PARAMS)
+    axes = {}
+    if filters:
+        unknown = [name for name in filters if name not in config.SPEED_FILTER_PRESETS]
+        if unknown:
+            raise SystemExit(f"[TUNE] 알 수 없는 필터 프리셋: {', '.join(unknown)} "
+                             f"(가능: {', '.join(config.SPEED_FILTER_PRESETS)})")
+        axes["FILTER"] = list(filters)
+    for item in items or []:
+        name, _, values = item.partition("=")
+        name = name.strip().upper()
+        if name not in base:
+            raise SystemExit(f"[TUNE] 알 수 없는 파라미터: {name} (가능: {', '.join(base)})")
+        axes[name] = [float(v) for v in values.split(",") if v.strip()]
+    names = list(axes)
+    combos = []
+    for values in itertools.product(*(axes[name] for name in names)):
+        params = dict(base)
+        params.update(zip(names, values))
+        combos.append(params)
+    return combos, names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="헤드리스 경주 시뮬레이션 파라미터 튜닝")
+    parser.add_argument("--log", nargs="*", metavar="RGLOG", help="녹화 로그 (보드마다 트레이스 1개)")
+    parser.add_argument("--synthetic", type=int, default=None, help="합성 플레이어 수 (기본: --log가 없으면 200, 있으면 0)")
+    parser.add_argument("--seed", type=int, default=1, help="합성 플레이어 시드")
+    parser.add_argument("--grid", action="append", metavar="NAME=v1,v2", help="파라미터 값 목록 (여러 번 지정 가능)")
+    parser.add_argument("--filter", nargs="+", metavar="PRESET", help="비교할 속도 필터 프리셋 (config.SPEED_FILTER_PRESETS)")
+    parser.add_argument("--max-time", type=float, default=120.0, help="경주 최대 시간 (초)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--target-win-rate", type=float, default=None, help="이 승률에 가까운 순으로 정렬")
+    parser.add_argument("--csv", metavar="PATH", help="결과를 CSV로 저장")
+    args = parser.parse_args()
+
+    combos, axes = parse_grid(args.grid, args.filter)
+
+    start = time.perf_counter()
+    players = []
+    for path in args.log or []:
+        players.extend(recorded_players(path))
+    synthetic = args.synthetic if args.synthetic is not None else (0 if args.log else 200)
+    players.extend(synthetic_player(args.seed * 100003 + i) for i in range(synthetic))
+    traces = [rms_trace(samples) for samples in players if samples]
+    if not traces:
+        print("[TUNE] 트레이스가 없습니다.")
+        return 1
+    print(f"[TUNE] 트레이스 {len(traces)}개, 조합 {len(combos)}개 -> 경주 {len(traces) * len(combos)}번 "
+          f"(준비 {time.perf_counter() - start:.2f}s)")
+
+    start = time.perf_counter()
+    rows = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                                initargs=(traces,)) as pool:
+        futures = [pool.submit(run_config, params, args.max_time) for params in combos]
+        for future in concurrent.futures.as_completed(futures):
+            rows.append(summarize(*future.result()))
+    elapsed = time.perf_counter() - start
+    print(f"[TUNE] 완료: {elapsed:.2f}s ({len(traces) * len(combos) / max(elapsed, 1e-9):.0f} 경주/초)")
+
+    if args.target_win_rate is not None:
+        rows.sort(key=lambda r: abs(r["win_rate"] - args.target_win_rate))
+    else:
+        rows.sort(key=lambda r: [r[name] for name in axes])
+
+    shown = axes or ["AI_SPEED"]
+    header = "".join(f"{name:>26}" for name in shown)
+
+    def cell(value):
+        return f"{value:>26}" if isinstance(value, str) else f"{value:>26.4g}"
+    print(f"{header}{'win%':>8}{'p10':>8}{'p50':>8}{'p90':>8}{'AI(s)':>8}{'미완주':>6}")
+    for row in rows:
+        values = "".join(cell(row[name]) for name in shown)
+        print(f"{values}{row['win_rate'] * 100:>7.1f}%{row['finish_p10']:>8.2f}{row['finish_p50']:>8.2f}"
+              f"{row['finish_p90']:>8.2f}{row['ai_time']:>8.2f}{row['unfinished']:>6}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"[TUNE] CSV 저장: {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
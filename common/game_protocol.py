@@ -0,0 +1,150 @@
+# game_protocol.py
+# 서버 -> 게임 바이너리 프레임 형식 (서버 speed_control / main_server와 게임 network_client가 함께 사용)
+#
+# 💡 버전 협상: 게임이 연결 직후 {"hello": {"versions": [1, 2]}} JSON 라인을 보내면
+#    서버가 지원하는 가장 높은 버전을 {"proto": N} JSON 라인으로 답하고, 그 다음 바이트부터 해당 형식으로 보냅니다.
+#    hello를 보내지 않는 클라이언트(이전 게임, testserver 등)와 hello에 답하지 않는 서버는 계속 JSON 라인(버전 1)입니다.
+#
+# 프레임 형식 (little-endian)
+#   헤더: magic(2s "RG") | 버전(u8) | 종류(u8) | 프레임 전체 길이(u16) | seq(u32) | 서버 monotonic 시각 ms(f64)
+#   SPEED: flags(u8) | 플레이어 수 N(u8) | N x (speed f32, rms f32) | [flags & TRACE: BLE 수신 ms(f64), RMS 계산 ms(f64)]
+#   PONG : ping 시각(게임 시계 ms, f64)    (서버 시각은 헤더의 시각)
+#
+# seq는 새 속도 프레임마다 1씩 증가합니다. keepalive 재전송은 같은 seq/시각 그대로이므로
+# 게임은 seq 차이로 누락을, (현재 시각 - 서버 시각)으로 데이터가 얼마나 오래됐는지를 알 수 있습니다.
+# UDP(데이터그램 1개 = 프레임 1개)에서는 seq가 이전 이하인 프레임을 버려 늦게 도착한 값이 최신 값을 덮지 않게 합니다.
+
+import struct
+
+PROTO_JSON = 1
+PROTO_BINARY = 2
+SUPPORTED_VERSIONS = (PROTO_JSON, PROTO_BINARY)
+
+MAGIC = b"RG"
+FRAME_VERSION = 1 # 바이너리 프레임 자체의 형식 버전 (헤더에 기록)
+
+TYPE_SPEED = 1
+TYPE_PONG = 2
+
+FLAG_TRACE = 0x01
+
+HEADER_FORMAT = "<2sBBHId"
+HEADER = struct.Struct(HEADER_FORMAT)
+SPEED_INFO = struct.Struct("<BB") # flags, 플레이어 수 (헤더 바로 뒤)
+SEQ_MASK = 0xFFFFFFFF
+REORDER_WINDOW = 256 # 이만큼까지 뒤로 간 seq는 늦게 도착한 오래된 프레임으로 보고 버림
+
+# (플레이어 수, trace 여부) -> 프레임 전체를 한 번에 pack/unpack 하는 Struct
+_speed_structs = {}
+_pong_struct = struct.Struct(HEADER_FORMAT + "d")
+_seq_struct = struct.Struct("<I")
+_length_struct = struct.Struct("<H")
+LENGTH_OFFSET = 4 # 헤더 안 길이 위치 (magic 2 + 버전 1 + 종류 1)
+SEQ_OFFSET = 6 # 헤더 안 seq 위치 (magic 2 + 버전 1 + 종류 1 + 길이 2)
+
+
+def speed_struct(players, trace):
+    key = (players, trace)
+    s = _speed_structs.get(key)
+    if s is None:
+        s = struct.Struct(HEADER_FORMAT + f"BB{players * 2}f" + ("dd" if trace else ""))
+        _speed_structs[key] = s
+    return s
+
+
+def encode_speed(seq, server_ms, speeds, rms_scores, trace=None):
+    """
+    SPEED 프레임(bytes)을 만듭니다.
+    trace: (BLE 수신 ms, RMS 계산 ms) 또는 None
+    """
+    players = len(speeds)
+    s = speed_struct(players, trace is not None)
+    values = []
+    for speed, rms in zip(speeds, rms_scores):
+        values.append(speed)
+        values.append(rms)
+    if trace is not None:
+        values.extend(trace)
+    return s.pack(MAGIC, FRAME_VERSION, TYPE_SPEED, s.size, seq & SEQ_MASK, server_ms,
+                  FLAG_TRACE if trace is not None else 0, players, *values)
+
+
+def encode_pong(server_ms, ping_ms):
+    return _pong_struct.pack(MAGIC, FRAME_VERSION, TYPE_PONG, _pong_struct.size, 0, server_ms, ping_ms)
+
+
+def frame_length(buf, offset=0):
+    """
+    buf[offset:]에서 시작하는 프레임의 전체 길이. 헤더가 다 오지 않았으면 0.
+    magic이 맞지 않으면 ValueError (스트림이 어긋난 경우)
+    """
+    if len(buf) - offset < HEADER.size:
+        return 0
+    magic, _, _, length, _, _ = HEADER.unpack_from(buf, offset)
+    if magic != MAGIC or length < HEADER.size:
+        raise ValueError("잘못된 프레임 헤더")
+    return length
+
+
+def _checked_length(buf, offset, min_size):
+    """헤더의 프레임 길이. 프레임이 buf 안에 다 있지 않거나 min_size보다 짧으면 ValueError"""
+    if len(buf) - offset < HEADER.size:
+        raise ValueError("잘린 프레임 헤더")
+    length = _length_struct.unpack_from(buf, offset + LENGTH_OFFSET)[0]
+    if length < min_size or len(buf) - offset < length:
+        raise ValueError(f"잘못된 프레임 길이: {length} (버퍼 {len(buf) - offset} bytes)")
+    return length
+
+
+def decode_speed(buf, offset=0):
+    """
+    SPEED 프레임을 (seq, 서버 시각 ms, speeds, rms_scores, trace 또는 None)으로 풉니다.
+    speeds/rms_scores는 튜플 슬라이스입니다.
+    헤더의 길이가 플레이어 수/flags에 맞지 않거나 프레임이 buf 안에 다 있지 않으면 ValueError
+    """
+    length = _checked_length(buf, offset, HEADER.size + SPEED_INFO.size)
+    if buf[offset + 3] != TYPE_SPEED:
+        raise ValueError(f"SPEED 프레임이 아닙니다: {buf[offset + 3]}")
+    flags, players = SPEED_INFO.unpack_from(buf, offset + HEADER.size)
+    trace = bool(flags & FLAG_TRACE)
+    s = speed_struct(players, trace)
+    if length != s.size:
+        raise ValueError(f"SPEED 프레임 길이 불일치: {length} (플레이어 {players}명이면 {s.size})")
+    values = s.unpack_from(buf, offset)
+    seq, server_ms = values[4], values[5]
+    body = values[8:8 + players * 2]
+    return seq, server_ms, body[0::2], body[1::2], (values[-2:] if trace else None)
+
+
+def decode_pong(buf, offset=0):
+    """PONG 프레임을 (서버 시각 ms, ping 시각 ms)로 풉니다. 길이가 맞지 않으면 ValueError"""
+    length = _checked_length(buf, offset, HEADER.size)
+    if length != _pong_struct.size:
+        raise ValueError(f"PONG 프레임 길이 불일치: {length}")
+    values = _pong_struct.unpack_from(buf, offset)
+    return values[5], values[6]
+
+
+def frame_type(buf, offset=0):
+    return buf[offset + 3]
+
+
+def frame_seq(buf, offset=0):
+    """프레임 전체를 풀지 않고 헤더의 seq만 읽습니다."""
+    return _seq_struct.unpack_from(buf, offset + SEQ_OFFSET)[0]
+
+
+def seq_gap(prev_seq, seq):
+    """
+    seq가 prev_seq 다음에서 몇 개 건너뛰었는지 (u32 wrap 고려)
+    중복(keepalive)이거나 REORDER_WINDOW 안쪽의 오래된 프레임(UDP 순서 뒤바뀜)이면 -1,
+    그보다 더 뒤로 간 seq는 서버가 다시 시작한 것으로 보고 0 (새 스트림의 첫 프레임)
+    """
+    diff = (seq - prev_seq) & SEQ_MASK
+    if diff == 0:
+        return -1 # 같은 프레임 재전송 (keepalive)
+    if diff > SEQ_MASK // 2:
+        if SEQ_MASK + 1 - diff <= REORDER_WINDOW:
+            return -1 # 오래된 프레임
+        return 0 # 서버 재시작 (seq가 처음부터 다시 시작)
+    return diff - 1
@@ -0,0 +1,107 @@
+# log_utils.py
+# 서버(Server/)와 게임(pygame/)이 함께 쓰는 로깅 설정입니다.
+#
+# - 모든 모듈은 log = log_utils.get_logger(__name__) 로 로거를 얻습니다.
+# - setup_logging()을 프로세스 시작 시 1번 호출하면 로그 레코드는 큐에만 들어가고,
+#   콘솔/파일 출력은 백그라운드 스레드(QueueListener)가 처리합니다.
+#   -> 렌더 스레드와 BLE 콜백이 콘솔 I/O 때문에 멈추지 않습니다.
+# - 샘플마다 찍는 진단 로그는 every_n() / once_per() 로 빈도를 제한합니다.
+
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+import atexit
+
+LOG_FORMAT = "%(asctime)s.%(msecs)03d %(levelname)-7s [%(name)s] %(message)s"
+DATE_FORMAT = "%H:%M:%S"
+
+_listener = None
+_counters = {} # every_n 호출 위치별 카운터
+_last_times = {} # once_per 호출 위치별 마지막 통과 시각
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    기본 QueueHandler는 큐에 넣기 전에 호출한 스레드에서 메시지를 포맷합니다.
+    포맷까지 백그라운드 스레드로 넘기기 위해 레코드를 그대로 큐에 넣습니다.
+    (로그 인자로 넘긴 객체는 이후에 수정하지 않는다고 가정)
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level="INFO", module_levels=None, log_file=None):
+    """
+    루트 로거를 큐 기반으로 설정합니다.
+    level: 기본 레벨, module_levels: {모듈 이름: 레벨} 모듈별 스위치, log_file: 추가로 기록할 파일 경로
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(formatter)
+    handlers = [console]
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [_DeferredQueueHandler(log_queue)]
+    root.setLevel(level)
+
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+
+
+def shutdown_logging():
+    """남은 로그를 모두 출력하고 백그라운드 스레드를 종료합니다."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name):
+    return logging.getLogger(name)
+
+
+# ----------------- 빈도 제한 헬퍼 -----------------
+def every_n(key, n):
+    """key별로 n번 호출마다 1번 True를 반환합니다. (첫 호출은 True)"""
+    count = _counters.get(key, 0)
+    _counters[key] = count + 1
+    return count % n == 0
+
+
+def once_per(key, interval=1.0):
+    """key별로 interval초에 1번만 True를 반환합니다."""
+    now = time.monotonic()
+    if now - _last_times.get(key, float("-inf")) >= interval:
+        _last_times[key] = now
+        return True
+    return False
+
+
+def log_every_n(logger, level, n, msg, *args, key=None):
+    """n번에 1번만 기록합니다. 레벨이 꺼져 있으면 카운터도 건드리지 않습니다."""
+    if logger.isEnabledFor(level) and every_n(key or msg, n):
+        logger.log(level, msg, *args)
+
+
+def log_once_per(logger, level, msg, *args, interval=1.0, key=None):
+    """interval초에 1번만 기록합니다. (기본: 초당 1번)"""
+    if logger.isEnabledFor(level) and once_per(key or msg, interval):
+        logger.log(level, msg, *args)
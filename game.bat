@@ -5,8 +5,8 @@ cd /d "%~dp0"
 REM ⭐️ 1. pygame 폴더를 PYTHONPATH에 추가하여 main_game.py가 'countdown'을 찾도록 합니다.
 set PYTHONPATH=%CD%\pygame;%PYTHONPATH%
 
-REM ⭐️ 2. CWD를 'pygame' 폴더로 다시 설정하여 high_scores.txt 접근 문제를 해결합니다.
-REM high_scores.txt는 pygame 폴더 안에 있으므로, CWD를 pygame으로 변경해야 합니다.
+REM ⭐️ 2. CWD를 'pygame' 폴더로 다시 설정합니다. (기존 실행 환경 유지)
+REM 랭킹 DB(pygame\leaderboard.db)와 예전 랭킹 파일(루트의 high_scores.txt)은 config_utils가 파일 위치 기준으로 찾으므로 CWD와 무관합니다.
 cd pygame
 
 REM CWD(pygame 폴더)를 기준으로 main_game.py를 실행합니다.
@@ -0,0 +1,108 @@
+import pygame
+
+# =====================================================================
+# 🚀 스프라이트 애니메이션 저장소
+# =====================================================================
+# - 서로 다른 프레임 Surface만 1번씩 보관합니다. (같은 이미지를 프레임 수만큼 복사하지 않음)
+#   메모리 = 고유 프레임 수 x 프레임 크기
+# - 스프라이트 시트(한 PNG에 격자로 배치된 프레임)를 잘라 애니메이션으로 등록할 수 있습니다.
+# - 프레임별 재생 시간을 지정할 수 있고, 재생 속도(rate)를 곱해 캐릭터 속도에 맞출 수 있습니다.
+
+_animations = {} # 이름 -> Animation
+
+
+class Animation:
+    """고유 프레임 목록 + 프레임별 재생 시간(ms). 여러 AnimationPlayer가 공유합니다."""
+
+    def __init__(self, frames, frame_duration_ms):
+        if not frames:
+            raise ValueError("애니메이션에는 프레임이 1개 이상 필요합니다.")
+        self.frames = list(frames)
+        if isinstance(frame_duration_ms, (int, float)):
+            self.durations = [float(frame_duration_ms)] * len(self.frames)
+        else:
+            self.durations = [float(d) for d in frame_duration_ms]
+            if len(self.durations) != len(self.frames):
+                raise ValueError("프레임 수와 재생 시간 수가 다릅니다.")
+        self.cycle_ms = sum(self.durations)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+
+class AnimationPlayer:
+    """애니메이션의 현재 프레임 위치를 기록합니다. (캐릭터마다 1개)"""
+
+    def __init__(self, animation):
+        self.animation = animation
+        self.index = 0
+        self.elapsed_ms = 0.0
+
+    def reset(self):
+        self.index = 0
+        self.elapsed_ms = 0.0
+
+    def advance(self, dt_ms, rate=1.0):
+        """dt_ms만큼 진행합니다. rate가 0이면 멈추고, 2면 2배 빠르게 재생합니다."""
+        animation = self.animation
+        if len(animation.frames) < 2 or rate <= 0.0 or animation.cycle_ms <= 0.0:
+            return self.current
+        elapsed = self.elapsed_ms + dt_ms * rate
+        if elapsed >= animation.cycle_ms:
+            elapsed %= animation.cycle_ms # 긴 멈춤 후에도 루프 1바퀴 이내로만 돌도록
+        durations = animation.durations
+        index = self.index
+        while elapsed >= durations[index]:
+            elapsed -= durations[index]
+            index = (index + 1) % len(durations)
+        self.index = index
+        self.elapsed_ms = elapsed
+        return animation.frames[index]
+
+    @property
+    def current(self):
+        return self.animation.frames[self.index]
+
+
+# ----------------- 프레임 만들기 -----------------
+def slice_sprite_sheet(sheet, columns, rows, frame_count=None, size=None):
+    """
+    격자형 스프라이트 시트를 왼쪽 위부터 행 순서로 잘라 프레임 목록을 만듭니다.
+    size가 주어지면 (size, size)로 스케일하고, 아니면 시트를 공유하는 subsurface를 그대로 씁니다.
+    """
+    frame_w = sheet.get_width() // columns
+    frame_h = sheet.get_height() // rows
+    total = columns * rows if frame_count is None else min(frame_count, columns * rows)
+    frames = []
+    for i in range(total):
+        col, row = i % columns, i // columns
+        frame = sheet.subsurface((col * frame_w, row * frame_h, frame_w, frame_h))
+        if size is not None:
+            frame = pygame.transform.scale(frame, (size, size))
+        frames.append(frame)
+    return frames
+
+
+# ----------------- 저장소 -----------------
+def register(name, animation):
+    _animations[name] = animation
+    return animation
+
+
+def get(name):
+    return _animations.get(name)
+
+
+def memory_bytes():
+    """저장된 모든 고유 프레임의 픽셀 메모리 합계 (bytes)"""
+    seen = set()
+    total = 0
+    for animation in _animations.values():
+        for frame in animation.frames:
+            if id(frame) not in seen:
+                seen.add(id(frame))
+                total += frame.get_bytesize() * frame.get_width() * frame.get_height()
+    return total
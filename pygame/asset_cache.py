@@ -0,0 +1,164 @@
+import hashlib
+import io
+import mmap
+import os
+import struct
+import pygame
+import log_utils
+
+log = log_utils.get_logger(__name__)
+
+# =====================================================================
+# 🚀 디코딩/스케일/픽셀 형식 변환이 끝난 에셋의 디스크 캐시
+# =====================================================================
+# PNG 디코딩 + convert_alpha() + transform.scale 결과를 원시 픽셀 버퍼(*.raw)로 저장해 두고,
+# 다음 실행부터는 mmap + pygame.image.frombuffer로 바로 Surface를 만듭니다.
+# 캐시 키: 원본 파일 내용 해시 + 목표 크기 + 픽셀 형식 + CACHE_VERSION
+# -> 원본 PNG가 바뀌면 해시가 달라져 자동으로 다시 만들고, 이전 캐시 파일은 지웁니다.
+#
+# 파일 형식: magic(4s) | 버전(u16) | 픽셀 형식(4s) | 폭(u32) | 높이(u32) | 원본 해시(16s) | 0 채움 | 픽셀...
+#   픽셀은 48바이트 위치부터 (16바이트 정렬: 정렬되지 않은 픽셀 버퍼에 fill 하면 SDL이 segfault)
+
+CACHE_ENABLED = True
+CACHE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".asset_cache"))
+CACHE_VERSION = 2 # 저장 방식이 바뀌면 올립니다. (이전 버전 캐시는 자동으로 무시/교체)
+
+CACHE_MAGIC = b"RGAC"
+HEADER = struct.Struct("<4sH4sII16s14x") # 48 bytes
+
+_mapped = [] # frombuffer Surface가 가리키는 mmap (copy-on-write, 프로세스 종료까지 유지)
+hits = 0
+misses = 0
+
+
+def _tobytes(surf, fmt):
+    tobytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+    return tobytes(surf, fmt)
+
+
+def _pixel_format(alpha):
+    """
+    화면 픽셀 형식과 같은 바이트 순서를 고릅니다.
+    (같으면 frombuffer 결과를 convert 없이 그대로 blit에 사용할 수 있음)
+    """
+    display = pygame.display.get_surface()
+    bgr = display is not None and display.get_masks()[0] == 0xFF0000
+    if alpha:
+        return "BGRA" if bgr else "RGBA"
+    return "BGRA" if bgr else "RGBX" # pygame에는 BGRX가 없으므로 불투명도 BGRA로 저장
+
+
+def _needs_convert(surf, alpha):
+    display = pygame.display.get_surface()
+    if display is None:
+        return False
+    if alpha:
+        return surf.get_masks()[:3] != display.get_masks()[:3]
+    # 불투명 Surface가 픽셀별 알파를 가지면 blit이 느려지므로 화면 형식으로 변환
+    return bool(surf.get_flags() & pygame.SRCALPHA) or surf.get_masks() != display.get_masks()
+
+
+def _cache_path(path, size, fmt, digest):
+    stem = os.path.basename(path)
+    size_text = f"{size[0]}x{size[1]}" if size else "orig"
+    return os.path.join(CACHE_DIR, f"{stem}.{size_text}.{fmt}.v{CACHE_VERSION}.{digest.hex()}.raw")
+
+
+def _decode(source, size, alpha, namehint=""):
+    surf = pygame.image.load(source, namehint)
+    surf = surf.convert_alpha() if alpha else surf.convert()
+    if size and surf.get_size() != tuple(size):
+        surf = pygame.transform.scale(surf, size)
+    return surf
+
+
+def _read_cached(cache_path, fmt, digest):
+    try:
+        f = open(cache_path, "rb")
+    except OSError:
+        return None
+    with f:
+        try:
+            # 💡 copy-on-write: Surface에 fill/set_at/draw로 써도 (읽기 전용 페이지라 죽지 않고) 캐시 파일은 그대로
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return None # 빈 파일 등
+    try:
+        magic, version, file_fmt, width, height, file_digest = HEADER.unpack_from(mm)
+        if (magic != CACHE_MAGIC or version != CACHE_VERSION or file_fmt != fmt.encode("ascii")
+                or file_digest != digest or len(mm) != HEADER.size + width * height * 4):
+            mm.close()
+            return None
+        surf = pygame.image.frombuffer(memoryview(mm)[HEADER.size:], (width, height), fmt)
+    except (struct.error, ValueError, pygame.error):
+        mm.close()
+        return None
+    _mapped.append(mm)
+    return surf
+
+
+def _write_cached(cache_path, surf, fmt, digest):
+    """임시 파일에 쓴 뒤 교체하여 중간에 종료돼도 깨진 캐시가 남지 않게 합니다."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    prefix = os.path.basename(cache_path).rsplit(".", 3)[0] # stem.size.fmt (버전/해시 제외)
+    tmp_path = cache_path + ".tmp"
+    width, height = surf.get_size()
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, fmt.encode("ascii"), width, height, digest))
+        f.write(_tobytes(surf, fmt))
+    os.replace(tmp_path, cache_path)
+
+    # 원본이 바뀌기 전의 캐시 파일 정리
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix + ".") and name.endswith(".raw") and os.path.join(CACHE_DIR, name) != cache_path:
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except OSError:
+                pass
+
+
+def load_image(path, size=None, alpha=True):
+    """
+    이미지를 로드합니다. (캐시 적중 시 PNG 디코딩/스케일 없이 mmap에서 바로 생성)
+    size: (폭, 높이) 또는 None(원본 크기), alpha: True면 convert_alpha, False면 convert 결과와 같은 Surface
+    실패 시 pygame.error / OSError를 그대로 올립니다.
+    """
+    global hits, misses
+    if not CACHE_ENABLED:
+        return _decode(path, size, alpha)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    fmt = _pixel_format(alpha)
+    cache_path = _cache_path(path, size, fmt, digest)
+
+    surf = _read_cached(cache_path, fmt, digest)
+    if surf is not None:
+        hits += 1
+        log.debug("[CACHE] 적중: %s", os.path.basename(cache_path))
+    else:
+        misses += 1
+        surf = _decode(io.BytesIO(data), size, alpha, os.path.basename(path))
+        try:
+            _write_cached(cache_path, surf, fmt, digest)
+            log.info("[CACHE] 생성: %s", os.path.basename(cache_path))
+        except OSError as e:
+            log.warning("[CACHE] 캐시 저장 실패 (%s). 캐시 없이 계속합니다.", e)
+        return surf
+
+    if _needs_convert(surf, alpha):
+        surf = surf.convert_alpha() if alpha else surf.convert()
+    return surf
+
+
+def clear_cache():
+    """캐시 폴더의 모든 캐시 파일을 지웁니다."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith(".raw") or name.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except OSError:
+                pass
@@ -3,9 +3,33 @@ import os
 import sys
 import io 
 import base64 
+import log_utils
+import animation
+import asset_cache
+import leaderboard
+import race_sim
 
-# ----------------- 랭킹 파일 설정 -----------------
-HIGH_SCORE_FILE = "high_scores.txt"
+log = log_utils.get_logger(__name__)
+
+# ----------------- 로그 설정 (common/log_utils.py) -----------------
+LOG_LEVEL = "INFO" # 기본 레벨: DEBUG / INFO / WARNING / ERROR
+LOG_MODULE_LEVELS = {
+    "config_utils": "INFO", # 에셋 경로 등 상세 내용은 "DEBUG"
+    "network_client": "INFO",
+}
+LOG_FILE = None # 파일로도 남기려면 경로 지정 (예: "game.log")
+
+# ----------------- 서버 연결 설정 (network_client.py) -----------------
+# 💡 서버(Server/main_server.py)를 다른 PC에서 실행하면 그 PC의 IP로 바꾸세요. (서버는 --host 0.0.0.0으로 실행)
+SERVER_HOST = "127.0.0.1"
+
+# ----------------- 랭킹 설정 (leaderboard.py, SQLite) -----------------
+# 💡 실행 위치(CWD)와 무관하게 이 파일 기준 경로를 사용합니다.
+_GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+LEADERBOARD_DB = os.path.join(_GAME_DIR, "leaderboard.db") # 모든 경주 기록 (pygame 폴더)
+HIGH_SCORE_FILE = os.path.join(os.path.dirname(_GAME_DIR), "high_scores.txt") # 예전 랭킹 파일 (프로젝트 루트): DB를 처음 만들 때 1번만 가져옴
+PLAYER_BOARD_ID = "RUNNIG_BOARD_1" # 플레이어 속도("speed")를 보내는 보드 (서버 BLE_TARGET_NAMES 첫 번째)
+TOP_N = 3
 INITIAL_HIGH_SCORES = [99999.0, 99999.0, 99999.0] 
 
 # ----------------- 색상 및 상수 설정 -----------------
@@ -17,14 +41,24 @@ RED = (255, 0, 0)
 # 💡 캐릭터 크기를 50 * 4 (200px)에서 50 * 6 (300px)로 키웠습니다.
 BOX_SIZE = 50 * 9 
 box_center_offset = (BOX_SIZE / 2)
+
+# 트랙: 출발선/결승선 위치 (화면 폭 비율)
+TRACK_START_RATIO = 0.00
+TRACK_FINISH_RATIO = 0.95
+# 💡 경주 시간 기준 화면 폭: AI_SPEED / PLAYER_SPEED_CORRECTION(프레임당 픽셀)이 튜닝된 화면 폭입니다.
+#    이 폭의 트랙 길이로 속도를 환산하므로 해상도와 관계없이 경주 시간이 같습니다. (1920px 기준 트랙 1374px, AI 90px/s -> 약 15.3초)
+#    None이면 실제 화면 폭을 사용합니다. -> 예전처럼 화면이 넓을수록 경주가 길어짐
+RACE_REFERENCE_WIDTH = 1920
 AI_SPEED = 0.5 * 3
 PLAYER_SPEED_CORRECTION = 0.22
 
 # ----------------- 💡 에셋 전역 변수 -----------------
 ai_image = None
 player_image = None
-ai_frames = []
+ai_frames = [] # 고유 프레임 목록 (ai_animation.frames와 같은 리스트)
 player_frames = [] 
+ai_animation = None # animation.Animation
+player_animation = None
 AI_FRAME_DURATION_MS = 0
 
 # ----------------- ⭐️ 로컬 파일 로딩 설정 (단일 이미지 사용) -----------------
@@ -36,12 +70,23 @@ BACKGROUND_IMAGE = None # 이미지가 로드될 변수
 # 💡 AI 이미지 경로: resource/Gyeongdong.png 가정
 RESOURCE_FOLDER = os.path.join("resource") 
 AI_IMAGE_FILE = "Gyeongdong.png" # AI 캐릭터의 단일 이미지 파일명
-FRAME_COUNT_REPLICATE = 67 # main_game.py의 인덱스 접근 오류 방지를 위해 복제할 프레임 수 (AI_FRAME_END_INDEX + 1)
+FRAME_COUNT_REPLICATE = 67 # 기존 애니메이션 한 바퀴의 프레임 수 (기본 프레임 재생 시간 계산에만 사용, 복제하지 않음)
 
 # 💡 플레이어 이미지 경로: resource/Ghost.png 가정
 PLAYER_RESOURCE_FOLDER = os.path.join("resource")
 PLAYER_IMAGE_FILE = "Ghost.png" # 플레이어 캐릭터의 단일 이미지 파일명
 
+# ----------------- ⭐️ 애니메이션 설정 -----------------
+ANIMATION_CYCLE_MS = 300 # 단일 이미지/컬러 박스 애니메이션 한 바퀴 시간 (총 0.3초)
+DEFAULT_FRAME_DURATION_MS = ANIMATION_CYCLE_MS / FRAME_COUNT_REPLICATE
+# 💡 스프라이트 시트 (resource 폴더의 격자형 PNG): (파일명, 열 수, 행 수, 프레임당 ms 또는 ms 리스트)
+#    None이면 위의 단일 이미지를 사용합니다. 예: ("Ghost_sheet.png", 4, 2, 80)
+AI_SPRITE_SHEET = None
+PLAYER_SPRITE_SHEET = None
+# 💡 플레이어 애니메이션 재생 속도를 현재 이동 속도에 맞춤 (AI_SPEED로 달릴 때 1배속)
+PLAYER_ANIMATION_FOLLOWS_SPEED = True
+ANIMATION_MAX_RATE = 3.0
+
 # ----------------- ⭐️ Base64 폴백 이미지 (단일 이미지) -----------------
 # 🚨 이 Base64는 여전히 더미 이미지이므로, 실제 유령/사자 캐릭터의 Base64 데이터로 교체해야 합니다.
 AI_BASE64_IMAGE = "iVBORw0KGgoAAAANSUhEUgAAABAAAAAQCAYAAAAf8/9hAAAADElEQVR42mP4z8BQMAH+gYDFGBkAAIkBAj8Vd+sAAAAASUVORK5CYII="
@@ -59,28 +104,25 @@ def load_local_single_image(folder_path, file_name, size):
     # 만약 resource 폴더가 config_utils.py와 같은 폴더에 있다면 "..", 를 제거하세요.
     full_path = os.path.join(current_dir, "..", folder_path, file_name) 
     
-    print("-" * 50)
-    print(f"1. config_utils.py 위치: {current_dir}")
+    log.debug("1. config_utils.py 위치: %s", current_dir)
     normalized_path = os.path.normpath(full_path)
-    print(f"2. 계산된 에셋 경로 (정규화): {normalized_path}")
-    print("-" * 50)
+    log.debug("2. 계산된 에셋 경로 (정규화): %s", normalized_path)
 
     if not os.path.exists(normalized_path):
-        print(f"[ERROR] 🚫 파일을 찾을 수 없음: {normalized_path}. Base64 폴백 시도.")
+        log.error("[ERROR] 🚫 파일을 찾을 수 없음: %s. Base64 폴백 시도.", normalized_path)
         return None
     
     try:
-        surf = pygame.image.load(normalized_path).convert_alpha()
-        # 로드된 이미지를 지정된 크기(size)로 스케일링합니다.
-        scaled_surf = pygame.transform.scale(surf, (size, size))
-        print(f"[SUCCESS] 로컬 파일 시스템에서 단일 이미지 로드 완료: {file_name}")
+        # 로드된 이미지를 지정된 크기(size)로 스케일링합니다. (디스크 캐시가 있으면 디코딩/스케일 생략)
+        scaled_surf = asset_cache.load_image(normalized_path, (size, size))
+        log.debug("[SUCCESS] 로컬 파일 시스템에서 단일 이미지 로드 완료: %s", file_name)
         return scaled_surf
     
     except pygame.error as e:
-        print(f"[FALLBACK] ❌ 로컬 파일 로드 실패 (Pygame 에러: {e}). Base64 로드 시도.")
+        log.warning("[FALLBACK] ❌ 로컬 파일 로드 실패 (Pygame 에러: %s). Base64 로드 시도.", e)
         return None
     except Exception as e:
-        print(f"[ERROR] ❌ 로컬 파일 로드 중 기타 예외 발생: {e}")
+        log.error("[ERROR] ❌ 로컬 파일 로드 중 기타 예외 발생: %s", e)
         return None
 
 # ----------------- Base64 단일 이미지 로딩 함수 -----------------
@@ -99,7 +141,7 @@ def load_base64_single_image(base64_data, size):
         return scaled_surf
 
     except Exception as e:
-        print(f"[ERROR] Base64 이미지 로드 실패: {e}. 컬러 박스로 대체됩니다.")
+        log.error("[ERROR] Base64 이미지 로드 실패: %s. 컬러 박스로 대체됩니다.", e)
         return None
 
 # ----------------- 컬러 박스 프레임 생성 함수 (최후의 폴백) -----------------
@@ -124,8 +166,8 @@ def create_temp_frames(colors, texts, size, frame_count=FRAME_COUNT_REPLICATE):
         temp_colors = ai_temp_colors
         temp_texts = ai_temp_texts
     
-    # 🚨 프레임 수 계산 (FRAME_COUNT_REPLICATE)
-    for i in range(frame_count): 
+    # 🚨 색상/텍스트 조합마다 고유 프레임 1개만 생성 (frame_count는 그 이상 만들지 않음)
+    for i in range(min(frame_count, len(temp_colors))): 
         surf = pygame.Surface(size_tuple, pygame.SRCALPHA)
         surf.fill(temp_colors[i % len(temp_colors)])
         text_surface = font.render(temp_texts[i % len(temp_colors)], True, WHITE)
@@ -134,70 +176,92 @@ def create_temp_frames(colors, texts, size, frame_count=FRAME_COUNT_REPLICATE):
         frames.append(surf)
     return frames
     
+# ----------------- 스프라이트 시트 로딩 함수 -----------------
+def load_local_sprite_sheet(folder_path, sheet_spec, size):
+    """격자형 스프라이트 시트를 로드해 (프레임 목록, 프레임 재생 시간)을 반환합니다. 실패 시 None."""
+    file_name, columns, rows, frame_ms = sheet_spec
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    normalized_path = os.path.normpath(os.path.join(current_dir, "..", folder_path, file_name))
+
+    if not os.path.exists(normalized_path):
+        log.error("[ERROR] 🚫 스프라이트 시트를 찾을 수 없음: %s. 단일 이미지 사용.", normalized_path)
+        return None
+    try:
+        sheet = asset_cache.load_image(normalized_path)
+        frames = animation.slice_sprite_sheet(sheet, columns, rows, size=size)
+        if not isinstance(frame_ms, (int, float)):
+            frames = frames[:len(frame_ms)]
+        log.debug("[SUCCESS] 스프라이트 시트 로드 완료: %s (%d 프레임)", file_name, len(frames))
+        return frames, frame_ms
+    except (pygame.error, ValueError) as e:
+        log.warning("[FALLBACK] ❌ 스프라이트 시트 로드 실패 (%s). 단일 이미지 사용.", e)
+        return None
+
 # ----------------- 💡 핵심 에셋 초기화 함수 -----------------
 
+def load_character_animation(name, sheet_spec, folder_path, file_name, base64_data, size, temp_colors, temp_texts):
+    """
+    캐릭터 애니메이션을 로드해 저장소에 등록합니다.
+    (스프라이트 시트 > 로컬 단일 이미지 > Base64 > 컬러 박스 순)
+    단일 이미지는 복제하지 않고 프레임 1개짜리 애니메이션으로 등록합니다.
+    """
+    # 0. 스프라이트 시트
+    if sheet_spec is not None:
+        loaded = load_local_sprite_sheet(folder_path, sheet_spec, size)
+        if loaded is not None:
+            try:
+                sheet_animation = animation.Animation(*loaded)
+            except (ValueError, TypeError) as e: # 재생 시간 목록이 프레임 수와 맞지 않는 등 설정 오류
+                log.warning("[FALLBACK] ❌ %s 스프라이트 시트 설정 오류 (%s). 단일 이미지 사용.", name, e)
+            else:
+                log.info("[SUCCESS] %s 프레임: 스프라이트 시트 로드 성공.", name)
+                return animation.register(name, sheet_animation)
+
+    # 1. 로컬 파일 로드 시도
+    surf = load_local_single_image(folder_path, file_name, size)
+    if surf is not None:
+        log.info("[SUCCESS] %s 프레임: 로컬 단일 이미지 로드 성공.", name)
+        return animation.register(name, animation.Animation([surf], DEFAULT_FRAME_DURATION_MS))
+
+    # 2. Base64 폴백 시도
+    surf = load_base64_single_image(base64_data, size)
+    if surf is not None:
+        log.warning("[FALLBACK] %s 프레임: Base64 이미지 사용", name)
+        return animation.register(name, animation.Animation([surf], DEFAULT_FRAME_DURATION_MS))
+
+    # 3. 최후의 폴백: 컬러 박스 생성
+    log.critical("[CRITICAL FALLBACK] %s 프레임: 컬러 박스 사용", name)
+    frames = create_temp_frames(temp_colors, temp_texts, size, FRAME_COUNT_REPLICATE)
+    return animation.register(name, animation.Animation(frames, DEFAULT_FRAME_DURATION_MS))
+
 def init_assets(ai_size):
     """모든 에셋을 로드하고 config_utils 모듈의 전역 변수에 할당합니다."""
     global ai_image, player_image, ai_frames, player_frames, AI_FRAME_DURATION_MS
+    global ai_animation, player_animation
     global BACKGROUND_IMAGE
-    # 1. AI 단일 이미지 로드 (로컬 파일 > Base64 > 컬러 박스 순)
-    
-    # 1.1 로컬 파일 로드 시도
-    ai_surf = load_local_single_image(RESOURCE_FOLDER, AI_IMAGE_FILE, ai_size)
-    
-    if ai_surf is None:
-        # 1.2 Base64 폴백 시도
-        ai_surf = load_base64_single_image(AI_BASE64_IMAGE, ai_size)
-        
-        if ai_surf is None:
-            # 1.3 최후의 폴백: 컬러 박스 생성
-            print("[CRITICAL FALLBACK] AI 프레임: 컬러 박스 사용")
-            ai_frames = create_temp_frames([(255, 0, 0), (200, 50, 0)], ["AI", "GO"], ai_size, FRAME_COUNT_REPLICATE)
-        else:
-            print("[FALLBACK] AI 프레임: Base64 이미지 사용")
-            # 단일 이미지를 필요한 프레임 수만큼 복제하여 리스트에 채웁니다.
-            ai_frames = [ai_surf.copy() for _ in range(FRAME_COUNT_REPLICATE)]
-    else:
-        print("[SUCCESS] AI 프레임: 로컬 단일 이미지 로드 성공.")
-        # 단일 이미지를 필요한 프레임 수만큼 복제하여 리스트에 채웁니다.
-        ai_frames = [ai_surf.copy() for _ in range(FRAME_COUNT_REPLICATE)]
-    
-    
-    # 2. 플레이어 단일 이미지 로드 (로컬 파일 > Base64 > 컬러 박스 순)
-    
-    # 2.1 로컬 파일 로드 시도
-    player_surf = load_local_single_image(PLAYER_RESOURCE_FOLDER, PLAYER_IMAGE_FILE, ai_size)
-    
-    if player_surf is None:
-        # 2.2 Base64 폴백 시도
-        player_surf = load_base64_single_image(PLAYER_BASE64_IMAGE, ai_size)
-        
-        if player_surf is None:
-            # 2.3 최후의 폴백: 컬러 박스 생성
-            print("[CRITICAL FALLBACK] 플레이어 프레임: 컬러 박스 사용")
-            player_frames = create_temp_frames([(0, 0, 255), (0, 100, 255)], ["YOU", "RUN"], ai_size, FRAME_COUNT_REPLICATE)
-        else:
-            print("[FALLBACK] 플레이어 프레임: Base64 이미지 사용")
-            # 단일 이미지를 필요한 프레임 수만큼 복제하여 리스트에 채웁니다.
-            player_frames = [player_surf.copy() for _ in range(FRAME_COUNT_REPLICATE)]
-    else:
-        print("[SUCCESS] 플레이어 프레임: 로컬 단일 이미지 로드 성공.")
-        # 단일 이미지를 필요한 프레임 수만큼 복제하여 리스트에 채웁니다.
-        player_frames = [player_surf.copy() for _ in range(FRAME_COUNT_REPLICATE)]
-    
-    # 3. 각 프레임당 지속 시간 계산 (총 0.3초)
-    total_frames = len(ai_frames)
-    if total_frames > 0:
-        AI_FRAME_DURATION_MS = (300 / total_frames) 
-    else:
-        AI_FRAME_DURATION_MS = 1000 
+    # 1. AI 애니메이션 로드
+    ai_animation = load_character_animation(
+        "ai", AI_SPRITE_SHEET, RESOURCE_FOLDER, AI_IMAGE_FILE, AI_BASE64_IMAGE,
+        ai_size, [(255, 0, 0), (200, 50, 0)], ["AI", "GO"])
+
+    # 2. 플레이어 애니메이션 로드
+    player_animation = load_character_animation(
+        "player", PLAYER_SPRITE_SHEET, PLAYER_RESOURCE_FOLDER, PLAYER_IMAGE_FILE, PLAYER_BASE64_IMAGE,
+        ai_size, [(0, 0, 255), (0, 100, 255)], ["YOU", "RUN"])
+
+    ai_frames = ai_animation.frames
+    player_frames = player_animation.frames
+
+    # 3. 첫 프레임 재생 시간 (이전 코드 호환용)
+    AI_FRAME_DURATION_MS = ai_animation.durations[0]
         
-    # 4. 단일 이미지 변수 설정 (복제된 프레임의 첫 번째 요소 사용)
-    ai_image = ai_frames[0] if ai_frames else pygame.Surface((ai_size, ai_size))
-    player_image = player_frames[0] if player_frames else pygame.Surface((ai_size, ai_size))
+    # 4. 단일 이미지 변수 설정 (첫 번째 프레임 사용)
+    ai_image = ai_frames[0]
+    player_image = player_frames[0]
+    log.info("애니메이션 프레임 메모리: %.1f MB", animation.memory_bytes() / (1024 * 1024))
 
     # ----------------- 5. ⭐️ 배경 이미지 로드 로직 추가 ⭐️ -----------------
-    print("--- 5. 배경 이미지 로드 시도 ---")
+    log.debug("--- 5. 배경 이미지 로드 시도 ---")
     
     current_dir = os.path.dirname(os.path.abspath(__file__))
     
@@ -211,15 +275,18 @@ def init_assets(ai_size):
     ) 
     normalized_path = os.path.normpath(full_path)
     
-    print(f"DEBUG: 배경 이미지 예상 경로: {normalized_path}")
+    log.debug("배경 이미지 예상 경로: %s", normalized_path)
+    
+    # 💡 배경은 화면 크기로 미리 스케일해 캐시합니다. (투명도 처리가 불필요하여 .convert() 형식)
+    screen_surface = pygame.display.get_surface()
+    background_size = screen_surface.get_size() if screen_surface is not None else None
     
     if os.path.exists(normalized_path):
         try:
-            # 배경 이미지는 크기 조정 없이 원본을 로드하고 투명도 처리가 불필요하여 .convert() 사용
-            BACKGROUND_IMAGE = pygame.image.load(normalized_path).convert()
-            print(f"[SUCCESS] 배경 이미지 로컬 로드 완료: {normalized_path}")
-        except pygame.error as e:
-            print(f"[ERROR] ❌ 배경 이미지 로드 실패 (Pygame 에러: {e}). 배경 없음.")
+            BACKGROUND_IMAGE = asset_cache.load_image(normalized_path, background_size, alpha=False)
+            log.info("[SUCCESS] 배경 이미지 로컬 로드 완료: %s", normalized_path)
+        except (pygame.error, OSError) as e:
+            log.error("[ERROR] ❌ 배경 이미지 로드 실패 (Pygame 에러: %s). 배경 없음.", e)
             BACKGROUND_IMAGE = None
     else:
         # 🚨 폴백: 만약 resource 폴더가 config_utils.py와 같은 폴더에 있다면 (상위 폴더 참조 불필요)
@@ -228,45 +295,73 @@ def init_assets(ai_size):
         
         if os.path.exists(normalized_path_no_up):
              try:
-                BACKGROUND_IMAGE = pygame.image.load(normalized_path_no_up).convert()
-                print(f"[SUCCESS] 배경 이미지 로컬 로드 완료 (폴백 경로).")
-             except pygame.error as e:
-                print(f"[ERROR] ❌ 배경 이미지 로드 실패 (Pygame 에러: {e}). 배경 없음.")
+                BACKGROUND_IMAGE = asset_cache.load_image(normalized_path_no_up, background_size, alpha=False)
+                log.info("[SUCCESS] 배경 이미지 로컬 로드 완료 (폴백 경로).")
+             except (pygame.error, OSError) as e:
+                log.error("[ERROR] ❌ 배경 이미지 로드 실패 (Pygame 에러: %s). 배경 없음.", e)
                 BACKGROUND_IMAGE = None
         else:
-            print(f"[ERROR] 🚫 배경 이미지 파일을 찾을 수 없음: {normalized_path} 또는 {normalized_path_no_up}. 배경 없음.")
+            log.error("[ERROR] 🚫 배경 이미지 파일을 찾을 수 없음: %s 또는 %s. 배경 없음.",
+                      normalized_path, normalized_path_no_up)
             BACKGROUND_IMAGE = None
     # -----------------------------------------------------------------
 
 
-# ----------------- 랭킹 파일 처리 함수 -----------------
-def load_high_scores():
-    if not os.path.exists(HIGH_SCORE_FILE):
-        return INITIAL_HIGH_SCORES[:]
-    scores = []
+def race_track_px(screen_width):
+    """경주 속도 환산에 쓰는 트랙 길이 (픽셀, race_sim.RaceSimulation의 track_px)"""
+    width = RACE_REFERENCE_WIDTH if RACE_REFERENCE_WIDTH else screen_width
+    return race_sim.track_length_px(width, BOX_SIZE, TRACK_START_RATIO, TRACK_FINISH_RATIO)
+
+
+# ----------------- 랭킹 처리 함수 (leaderboard.py) -----------------
+def _open_leaderboard():
+    return leaderboard.open_db(LEADERBOARD_DB, legacy_file=HIGH_SCORE_FILE)
+
+def load_high_scores(day=None):
+    """현재 시즌 TOP_N 기록 (day를 주면 그 날짜의 기록만). 빈 자리는 99999.0"""
     try:
-        with open(HIGH_SCORE_FILE, 'r') as f:
-            for line in f:
-                scores.append(float(line.strip()))
-        scores = sorted([s for s in scores if s < 99999.0])[:3]
-        while len(scores) < 3: scores.append(99999.0)
-    except Exception:
+        _open_leaderboard()
+        scores = list(leaderboard.top_times(TOP_N, day))
+    except Exception as e:
+        log.error("[기록 오류] 랭킹 조회 중 예외 발생: %s", e)
         return INITIAL_HIGH_SCORES[:]
+    while len(scores) < TOP_N: scores.append(99999.0)
     return scores
 
-def save_high_scores(scores):
+def save_race_result(time_record, is_win):
+    """
+    경주 1번을 기록하고 (전체 순위, 오늘 순위)를 반환합니다.
+    순위는 기록 전에 "더 빠른 승리 기록 수 + 1"로 계산합니다. (패배는 모든 승리 기록 다음)
+    저장에 실패하면 (get_race_rank처럼) TOP_N 밖의 순위를 반환합니다.
+    """
+    try:
+        _open_leaderboard()
+        finish_time = time_record if is_win else None
+        rank = leaderboard.rank_of(finish_time)
+        day_rank = leaderboard.rank_of(finish_time, leaderboard.today())
+        leaderboard.record_race(time_record, is_win, PLAYER_BOARD_ID)
+        return rank, day_rank
+    except Exception as e:
+        log.error("[기록 오류] 랭킹 저장 중 예외 발생: %s", e)
+        return TOP_N + 1, TOP_N + 1
+
+def get_race_rank(time_record, is_win, day=None):
+    """
+    이미 저장된 경주의 현재 시즌 순위 (day를 주면 그 날짜 기준). 랭킹 초기화 후 다시 계산할 때 사용합니다.
+    조회에 실패하면 TOP_N 밖의 순위를 반환합니다.
+    """
     try:
-        valid_scores = sorted([s for s in scores if s < 99999.0])[:3]
-        with open(HIGH_SCORE_FILE, 'w') as f:
-            for score in valid_scores:
-                f.write(f"{score:.2f}\n") 
+        _open_leaderboard()
+        return leaderboard.rank_of(time_record if is_win else None, day)
     except Exception as e:
-        print(f"[기록 오류] 파일 저장 중 예외 발생: {e}")
+        log.error("[기록 오류] 순위 조회 중 예외 발생: %s", e)
+        return TOP_N + 1
 
 def clear_high_scores():
+    """랭킹을 초기화합니다. (새 시즌 시작, 지난 경주 기록은 DB에 그대로 남음)"""
     try:
-        with open(HIGH_SCORE_FILE, 'w') as f:
-            pass
-        print("--- 🗑️ 최고 기록이 초기화되었습니다. ---")
+        _open_leaderboard()
+        leaderboard.reset_board()
+        log.info("--- 🗑️ 최고 기록이 초기화되었습니다. (이전 기록은 보존) ---")
     except Exception as e:
-        print(f"[기록 오류] 초기화 중 예외 발생: {e}")
+        log.error("[기록 오류] 초기화 중 예외 발생: %s", e)
@@ -1,7 +1,9 @@
 import pygame
-import sys
 import time
-# import os # os 모듈은 더 이상 필요하지 않아 제거하거나 주석 처리합니다.
+import log_utils
+import text_cache
+
+log = log_utils.get_logger(__name__)
 
 # ----------------- 전역 변수 설정 -----------------
 
@@ -12,83 +14,93 @@ COUNTDOWN_SIZE = 400 # ⭐️ 크기를 400으로 키움 (기존 300)
 GO_SIZE = 300          # ⭐️ GO! 텍스트 크기 추가
 OUTLINE_OFFSET = 5     # ⭐️ 테두리 효과를 위한 픽셀 오프셋
 
-# ----------------- 로딩 헬퍼 함수 (제거 또는 주석 처리) -----------------
-# def load_and_scale_image(path, size, fallback_color):
-#     """
-#     이미지 로드 로직은 제거하고 폰트 대체 로직만 사용합니다.
-#     """
-#     # ... 기존 이미지 로딩 및 대체 로직 제거 ...
-#     pass
+# 💡 단계별 표시 시간 (초): 3-2-1은 1초씩, GO!는 0.5초 후 경주 시작
+DIGIT_DURATION_S = 1.0
+GO_DURATION_S = 0.5
+COUNTDOWN_FPS = 60 # 단계 전환 시각을 확인하는 주기 (화면은 단계가 바뀔 때만 다시 그림)
+
+_outlined_cache = {} # (텍스트, 크기) -> 테두리까지 합성된 Surface
 
 
-def run_countdown_scene(screen, draw_track_func):
+def get_outlined_text(text, size, color=RED, outline_color=BLACK, offset=OUTLINE_OFFSET):
     """
-    3-2-1 카운트다운 씬을 실행하고 게임 시작 시간을 반환합니다.
+    ⭐️ 테두리 텍스트를 1장의 Surface로 미리 합성합니다. (프로세스당 1번)
+    외곽선(검은색)을 대각선 4방향으로 offset만큼 이동해 그리고, 본문(빨간색)을 가운데 덮어씁니다.
     """
-    
-    # 💡 폰트 설정 (기존 None 폰트 사용)
-    FONT_LARGE = pygame.font.Font(None, COUNTDOWN_SIZE) # 3, 2, 1 폰트
-    GO_FONT = pygame.font.Font(None, GO_SIZE)             # ⭐️ GO! 폰트 크기 변경
-    
-    # 3, 2, 1 카운트다운 텍스트 Surface 생성
-    # Note: 테두리 구현을 위해 '본문'과 '외곽선용' 텍스트를 모두 만듭니다.
-    COUNTDOWN_SURFACES_BODY = [
-        FONT_LARGE.render("3", True, RED),
-        FONT_LARGE.render("2", True, RED),
-        FONT_LARGE.render("1", True, RED)
-    ]
-    # 외곽선용 (검은색) 텍스트 생성
-    COUNTDOWN_SURFACES_OUTLINE = [
-        FONT_LARGE.render("3", True, BLACK),
-        FONT_LARGE.render("2", True, BLACK),
-        FONT_LARGE.render("1", True, BLACK)
-    ]
-        
-    screen_width, screen_height = screen.get_size()
-    # ⭐️ GO! 텍스트를 빨간색(RED)으로 변경 ⭐️
-    go_text = GO_FONT.render("GO!", True, RED) 
-    go_rect = go_text.get_rect(center=(screen_width // 2, screen_height // 2))
-
-    # 1. 3-2-1 카운트다운
-    for i, body_surface in enumerate(COUNTDOWN_SURFACES_BODY): 
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                return None
-
-        draw_track_func() 
-        
-        outline_surface = COUNTDOWN_SURFACES_OUTLINE[i]
-        
-        # ⭐️ 테두리 구현 로직 ⭐️
-        
-        # 1. 외곽선(검은색)을 먼저 그립니다.
-        # 중심을 기준으로 상하좌우로 OUTLINE_OFFSET 만큼 이동하여 4개의 외곽선 서피스를 그립니다.
-        center_x, center_y = screen_width // 2, screen_height // 2
-        
-        for dx in [-OUTLINE_OFFSET, OUTLINE_OFFSET]:
-            for dy in [-OUTLINE_OFFSET, OUTLINE_OFFSET]:
-                outline_rect = outline_surface.get_rect(center=(center_x + dx, center_y + dy))
-                screen.blit(outline_surface, outline_rect)
-
-        # 2. 본문(빨간색)을 중앙에 덮어씁니다.
-        body_rect = body_surface.get_rect(center=(center_x, center_y))
-        screen.blit(body_surface, body_rect)
-        
+    key = (text, size, tuple(color), tuple(outline_color), offset)
+    surf = _outlined_cache.get(key)
+    if surf is None:
+        body = text_cache.render(None, size, text, color)
+        outline = text_cache.render(None, size, text, outline_color)
+        w, h = body.get_size()
+        surf = pygame.Surface((w + offset * 2, h + offset * 2), pygame.SRCALPHA)
+        for dx in (0, offset * 2):
+            for dy in (0, offset * 2):
+                surf.blit(outline, (dx, dy))
+        surf.blit(body, (offset, offset))
+        _outlined_cache[key] = surf
+    return surf
+
+
+class CountdownScene:
+    """
+    3-2-1-GO! 카운트다운 장면 (scene_scheduler에서 실행, sleep 없음)
+    - 단계는 장면 시작 후 흐른 시간(perf_counter, 단조 시계)으로 결정합니다.
+    - 매 루프 poll_func()를 호출해 서버 데이터를 계속 받아 두므로 첫 경주 프레임이 최신 속도를 사용합니다.
+    - 끝나면 start_time(= GO! 표시가 끝난 perf_counter 시각)에 경주 시작 시각이 기록됩니다.
+    """
+    target_fps = COUNTDOWN_FPS
+
+    def __init__(self, screen_size, draw_track_func, poll_func=None):
+        self.draw_track_func = draw_track_func
+        self.poll_func = poll_func
+        self.is_running = True
+        self.start_time = None
+        center = (screen_size[0] // 2, screen_size[1] // 2)
+
+        # (Surface, 화면 위치, 표시 종료 시각(장면 시작 기준 s))
+        self.phases = []
+        end = 0.0
+        for digit in "321":
+            end += DIGIT_DURATION_S
+            surf = get_outlined_text(digit, COUNTDOWN_SIZE)
+            self.phases.append((surf, surf.get_rect(center=center), end))
+        # ⭐️ GO! 텍스트는 빨간색(RED), 테두리 없음 ⭐️
+        go_text = text_cache.render(None, GO_SIZE, "GO!", RED)
+        self.phases.append((go_text, go_text.get_rect(center=center), end + GO_DURATION_S))
+
+        self.phase = 0
+        self._drawn_phase = None # 마지막으로 화면에 그린 단계 (같으면 다시 그리지 않음)
+        self._t0 = time.perf_counter()
+
+    def process_input(self, events):
+        # 종료 키는 scheduler의 공통 이벤트 처리에서 다룹니다. 화면이 지워진 경우만 다시 그림
+        for event in events:
+            if event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE):
+                self._drawn_phase = None
+
+    def update(self):
+        if self.poll_func is not None:
+            self.poll_func()
+
+        now = time.perf_counter()
+        elapsed = now - self._t0
+        phases = self.phases
+        while self.phase < len(phases) and elapsed >= phases[self.phase][2]:
+            self.phase += 1
+        if self.phase >= len(phases):
+            # 다음 루프 지연과 무관하게 정확히 GO! 종료 시각부터 경주 시간을 잽니다.
+            self.start_time = self._t0 + phases[-1][2]
+            self.is_running = False
+            log.info("--- GO! 게임 시작! ---")
+            return False
+        return self.phase != self._drawn_phase
+
+    def render(self, screen):
+        if self.phase == self._drawn_phase or self.phase >= len(self.phases):
+            return
+        surf, rect, _ = self.phases[self.phase]
+        self.draw_track_func()
+        screen.blit(surf, rect)
         pygame.display.flip()
-        
-        time.sleep(1.0) 
-        
-    # 2. 'GO!' 표시
-    draw_track_func()
-    screen.blit(go_text, go_rect)
-    pygame.display.flip()
-    time.sleep(0.5) 
-
-    print("--- GO! 게임 시작! ---")
-    
-    return time.time()
-
-# ----------------- 로딩 헬퍼 함수 호출은 이제 필요 없습니다. -----------------
-
-# (참고: 기존에 있던 load_and_scale_image 함수는 이 수정 방안에서는 제거하거나 주석 처리해야 합니다.)
\ No newline at end of file
+        self._drawn_phase = self.phase
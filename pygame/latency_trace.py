@@ -0,0 +1,129 @@
+import time
+import json
+from collections import deque
+import log_utils
+
+log = log_utils.get_logger(__name__)
+
+# =====================================================================
+# 🚀 보드 흔들림 -> 화면 반영까지 구간별 지연 추적
+# =====================================================================
+# 서버 메시지의 "t": [BLE 수신, RMS 계산, 전송] (서버 monotonic ms)에
+# 게임 쪽 [수신 파싱, 속도 적용, display.flip] 시각을 이어 붙여 구간별 지연을 기록합니다.
+# 서버/게임 시계 차이는 ping/pong 핸드셰이크로 측정한 오프셋으로 보정합니다.
+
+STAGES = ["ble->rms", "rms->send", "send->parse", "parse->apply", "apply->flip", "total"]
+HISTORY_SIZE = 2000 # 구간별로 보관할 최근 샘플 수
+OFFSET_SAMPLES = 8 # 시계 오프셋 추정에 사용할 최근 pong 수 (RTT가 가장 짧은 것을 사용)
+
+# ----------------- 전역 상태 -----------------
+clock_offset_ms = None # 서버 시각 - 게임 시각
+_offset_samples = deque(maxlen=OFFSET_SAMPLES) # (rtt, offset)
+_samples = {stage: deque(maxlen=HISTORY_SIZE) for stage in STAGES}
+
+# 💡 mark_parsed는 수신 스레드, mark_applied/mark_frame은 렌더 스레드에서 호출되므로
+#    상태를 튜플 하나로 교체하는 방식으로만 공유합니다. (락 없이 찢어진 값을 읽지 않음)
+_pending = None # (trace [recv, rms, send] (서버 시계), 파싱 시각)
+_applied = None # (_pending 튜플, 적용 시각)
+_last_trace_key = None
+
+
+def now_ms():
+    return time.monotonic() * 1000.0
+
+
+# ----------------- 시계 오프셋 핸드셰이크 -----------------
+def make_ping():
+    """서버로 보낼 ping 라인(bytes)을 만듭니다."""
+    return (json.dumps({"ping": now_ms()}) + "\n").encode("utf-8")
+
+
+def on_pong(msg):
+    """
+    pong 수신 시 오프셋을 갱신합니다. (NTP 방식: 서버 시각 - 왕복 중간 시각)
+    RTT가 짧을수록 오차가 작으므로 최근 샘플 중 RTT 최소값의 오프셋을 사용합니다.
+    """
+    global clock_offset_ms
+    t_sent = msg["pong"]
+    t_recv = now_ms()
+    rtt = t_recv - t_sent
+    if rtt < 0:
+        return
+    _offset_samples.append((rtt, msg["server"] - (t_sent + t_recv) / 2.0))
+    clock_offset_ms = min(_offset_samples)[1]
+
+
+def reset_clock():
+    """재연결 시 (서버가 바뀌었을 수 있으므로) 오프셋을 다시 측정합니다."""
+    global clock_offset_ms
+    clock_offset_ms = None
+    _offset_samples.clear()
+
+
+# ----------------- 구간 시각 기록 -----------------
+def mark_parsed(trace, parse_ms=None):
+    """서버 메시지의 "t" 필드를 파싱한 시각을 기록합니다. (keepalive 재전송은 무시)"""
+    global _pending, _last_trace_key
+    if not trace or len(trace) < 3 or trace[0] == _last_trace_key:
+        return
+    _last_trace_key = trace[0]
+    _pending = (trace, now_ms() if parse_ms is None else parse_ms)
+
+
+def mark_applied():
+    """수신한 속도가 플레이어 이동에 처음 적용된 시각을 기록합니다."""
+    global _applied
+    pending = _pending
+    if pending is not None and (_applied is None or _applied[0] is not pending):
+        _applied = (pending, now_ms())
+
+
+def mark_frame():
+    """display.flip 직후 호출합니다. 적용된 샘플이 있으면 전 구간 지연을 기록합니다."""
+    global _applied
+    applied = _applied
+    if applied is None or applied[1] is None:
+        return
+
+    flip_ms = now_ms()
+    (trace, parse_ms), applied_ms = applied
+    recv_ms, rms_ms, send_ms = trace[0], trace[1], trace[2]
+
+    _samples["ble->rms"].append(rms_ms - recv_ms)
+    _samples["rms->send"].append(send_ms - rms_ms)
+    _samples["parse->apply"].append(applied_ms - parse_ms)
+    _samples["apply->flip"].append(flip_ms - applied_ms)
+
+    # 프로세스 간 구간은 시계 오프셋이 측정된 뒤에만 기록
+    if clock_offset_ms is not None:
+        _samples["send->parse"].append(parse_ms + clock_offset_ms - send_ms)
+        _samples["total"].append(flip_ms + clock_offset_ms - recv_ms)
+
+    # 같은 샘플을 다시 기록하지 않도록 표시 (적용 시각 None)
+    _applied = (applied[0], None)
+
+
+# ----------------- 리포트 -----------------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def get_report():
+    """구간별 {stage: (샘플 수, p50, p95, p99)} (ms)"""
+    report = {}
+    for stage in STAGES:
+        values = sorted(_samples[stage])
+        report[stage] = (len(values), percentile(values, 50), percentile(values, 95), percentile(values, 99))
+    return report
+
+
+def print_report():
+    offset_text = f"{clock_offset_ms:.3f}ms" if clock_offset_ms is not None else "미측정"
+    lines = [f"[LATENCY] 구간별 지연 (ms), 시계 오프셋: {offset_text}",
+             f"{'stage':<14}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}"]
+    for stage, (n, p50, p95, p99) in get_report().items():
+        lines.append(f"{stage:<14}{n:>6}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}")
+    log.info("\n".join(lines))
@@ -0,0 +1,178 @@
+import os
+import sqlite3
+import time
+import log_utils
+
+log = log_utils.get_logger(__name__)
+
+# =====================================================================
+# 🚀 랭킹 저장소 (SQLite, WAL 모드)
+# =====================================================================
+# - 모든 경주를 races 테이블에 남깁니다: 시각, 날짜, 보드 ID, 완주 시간, 결과(WIN/LOSE)
+# - 랭킹 초기화는 기록을 지우지 않고 시즌(epoch)만 올립니다. -> 이전 기록은 그대로 보존
+# - TOP N과 순위는 (epoch, outcome, finish_time) 인덱스로 조회합니다.
+#   새 기록의 순위 = "이 시즌에서 더 빠른 승리 기록 수 + 1" (인덱스 범위 COUNT 1번)
+# - TOP N 결과는 프로세스 안에 캐시하고, 기록/초기화 시 비웁니다.
+
+OUTCOME_WIN = "WIN"
+OUTCOME_LOSE = "LOSE"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS races (
+    id          INTEGER PRIMARY KEY,
+    ts          REAL NOT NULL,           -- 경주 종료 시각 (epoch 초)
+    day         TEXT NOT NULL,           -- 로컬 날짜 YYYY-MM-DD (일별 랭킹)
+    board       TEXT NOT NULL,           -- 플레이어 보드 ID
+    finish_time REAL,                    -- 완주 시간 (초), 패배 시 NULL
+    outcome     TEXT NOT NULL,           -- WIN / LOSE
+    epoch       INTEGER NOT NULL         -- 랭킹 시즌 (초기화할 때마다 +1)
+);
+CREATE INDEX IF NOT EXISTS idx_races_best ON races (epoch, outcome, finish_time);
+CREATE INDEX IF NOT EXISTS idx_races_day_best ON races (epoch, day, outcome, finish_time);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_conn = None
+_db_path = None
+_epoch = 0
+_top_cache = {} # (epoch, day, n) -> [완주 시간, ...]
+
+
+def today():
+    return time.strftime("%Y-%m-%d", time.localtime())
+
+
+def open_db(path, legacy_file=None):
+    """
+    랭킹 DB를 엽니다. (이미 같은 경로로 열려 있으면 그대로 사용)
+    DB가 새로 만들어졌고 legacy_file(예전 high_scores.txt)이 있으면 그 기록을 가져옵니다.
+    """
+    global _conn, _db_path, _epoch
+    if _conn is not None and _db_path == path:
+        return _conn
+    close()
+
+    conn = sqlite3.connect(path)
+    # 💡 WAL: 기록 중에도 읽기가 막히지 않고, 경주마다의 작은 INSERT가 빠릅니다.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    is_new = conn.execute("SELECT name FROM sqlite_master WHERE name='races'").fetchone() is None
+    conn.executescript(SCHEMA)
+    row = conn.execute("SELECT value FROM meta WHERE key='epoch'").fetchone()
+    if row is None:
+        conn.execute("INSERT INTO meta (key, value) VALUES ('epoch', '0')")
+        conn.commit()
+    _epoch = int(row[0]) if row is not None else 0
+    _conn, _db_path = conn, path
+    _top_cache.clear()
+
+    if is_new and legacy_file and os.path.exists(legacy_file):
+        _import_legacy(legacy_file)
+    return conn
+
+
+def _import_legacy(legacy_file):
+    """예전 텍스트 랭킹 파일의 기록을 승리 기록으로 가져옵니다. (보드/시각 정보 없음)"""
+    times = []
+    try:
+        with open(legacy_file, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    times.append(float(line))
+    except (OSError, ValueError) as e:
+        log.warning("[랭킹] 이전 기록 파일을 읽지 못했습니다 (%s: %s)", legacy_file, e)
+        return
+    mtime = os.path.getmtime(legacy_file)
+    day = time.strftime("%Y-%m-%d", time.localtime(mtime))
+    with _conn:
+        _conn.executemany(
+            "INSERT INTO races (ts, day, board, finish_time, outcome, epoch) VALUES (?, ?, 'legacy', ?, ?, ?)",
+            [(mtime, day, t, OUTCOME_WIN, _epoch) for t in times])
+    _top_cache.clear()
+    log.info("[랭킹] 이전 기록 %d개를 가져왔습니다: %s", len(times), legacy_file)
+
+
+def _db():
+    if _conn is None:
+        raise RuntimeError("leaderboard.open_db()를 먼저 호출해야 합니다.")
+    return _conn
+
+
+def close():
+    global _conn, _db_path
+    if _conn is not None:
+        _conn.close()
+    _conn = None
+    _db_path = None
+    _top_cache.clear()
+
+
+def rank_of(finish_time, day=None):
+    """
+    finish_time이 현재 시즌(day를 주면 그 날짜)에서 몇 위인지 반환합니다.
+    (더 빠른 승리 기록 수 + 1, finish_time이 None이면 모든 승리 기록 다음 순위)
+    """
+    sql = "SELECT COUNT(*) FROM races WHERE epoch = ?"
+    args = [_epoch]
+    if day is not None:
+        sql += " AND day = ?"
+        args.append(day)
+    sql += " AND outcome = ?"
+    args.append(OUTCOME_WIN)
+    if finish_time is not None:
+        sql += " AND finish_time < ?"
+        args.append(finish_time)
+    return _db().execute(sql, args).fetchone()[0] + 1
+
+
+def record_race(finish_time, is_win, board, ts=None):
+    """경주 1번을 기록하고 race id를 반환합니다. (패배 시 finish_time은 저장하지 않음)"""
+    ts = time.time() if ts is None else ts
+    day = time.strftime("%Y-%m-%d", time.localtime(ts))
+    conn = _db()
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO races (ts, day, board, finish_time, outcome, epoch) VALUES (?, ?, ?, ?, ?, ?)",
+            (ts, day, board, finish_time if is_win else None, OUTCOME_WIN if is_win else OUTCOME_LOSE, _epoch))
+    _top_cache.clear()
+    return cur.lastrowid
+
+
+def top_times(n=3, day=None):
+    """현재 시즌의 빠른 순 완주 시간 n개 (day를 주면 그 날짜의 기록만). 캐시된 리스트이므로 수정하지 마세요."""
+    key = (_epoch, day, n)
+    cached = _top_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if day is None:
+        rows = _db().execute(
+            "SELECT finish_time FROM races WHERE epoch = ? AND outcome = ? ORDER BY finish_time LIMIT ?",
+            (_epoch, OUTCOME_WIN, n))
+    else:
+        rows = _db().execute(
+            "SELECT finish_time FROM races WHERE epoch = ? AND day = ? AND outcome = ? ORDER BY finish_time LIMIT ?",
+            (_epoch, day, OUTCOME_WIN, n))
+    result = [row[0] for row in rows]
+    _top_cache[key] = result
+    return result
+
+
+def reset_board():
+    """랭킹을 초기화합니다. 기록은 지우지 않고 새 시즌을 시작합니다."""
+    global _epoch
+    conn = _db()
+    with conn:
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'epoch'", (str(_epoch + 1),))
+    _epoch += 1
+    _top_cache.clear()
+    return _epoch
+
+
+def race_count():
+    """저장된 전체 경주 수 (모든 시즌)"""
+    return _db().execute("SELECT COUNT(*) FROM races").fetchone()[0]
@@ -3,13 +3,28 @@ import sys
 import time
 import os
 import random 
+
+# 💡 공용 모듈(common/log_utils.py) 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import log_utils
+
 import config_utils 
+import latency_trace
+import render_cache
+import animation
+import text_cache
+import scene_scheduler
+import race_sim
+import leaderboard
 
 # network_client, result_scene, countdown 모듈이 있다고 가정합니다.
-from network_client import setup_client_socket, get_player_data, get_client_socket, close_client_socket
+from network_client import start_connection, request_reconnect, is_connected, get_connection_state, get_player_data, close_client_socket, get_link_stats
 from result_scene import ResultScene 
 import countdown 
 
+log = log_utils.get_logger("main_game")
+log_utils.setup_logging(config_utils.LOG_LEVEL, config_utils.LOG_MODULE_LEVELS, config_utils.LOG_FILE)
+
 pygame.init()
 
 # ----------------- 💡 화면 및 트랙 크기 설정 -----------------
@@ -21,8 +36,9 @@ FPS = 60
 y_ai = SCREEN_HEIGHT * 0.3 
 y_player = SCREEN_HEIGHT * 0.75 
 LINE_THICKNESS = 3
-start_x = SCREEN_WIDTH * 0.00 
-end_x = SCREEN_WIDTH * 0.95 
+start_x = SCREEN_WIDTH * config_utils.TRACK_START_RATIO
+end_x = SCREEN_WIDTH * config_utils.TRACK_FINISH_RATIO
+RACE_TRACK_PX = config_utils.race_track_px(SCREEN_WIDTH) # 속도 환산 기준 (config_utils.RACE_REFERENCE_WIDTH)
 
 # 상수 가져오기
 BOX_SIZE = config_utils.BOX_SIZE
@@ -34,39 +50,33 @@ PLAYER_SPEED_CORRECTION = config_utils.PLAYER_SPEED_CORRECTION
 
 INITIAL_BOX_POS = {'ai': start_x, 'player': start_x}
 LAST_APPLIED_SPEED = 0.0 
-clock = pygame.time.Clock()
 
 current_scene = None 
-small_font = pygame.font.Font(None, 48) 
+# 💡 타이머는 글자별로 미리 렌더해 두고 조합만 합니다. (반투명 배경 포함)
+connection_text = text_cache.render(None, 40, "SERVER: RECONNECTING...", config_utils.RED)
+timer_text = text_cache.GlyphText(None, 48, config_utils.BLACK, background=(200, 200, 200, 150), prefix="TIME: ", preload="0123456789.s")
 
 # ----------------- 에셋 초기화 (config_utils에서 로드) -----------------
 
-print("에셋 초기화 중: config_utils.py를 통해 로드 시도...")
+log.info("에셋 초기화 중: config_utils.py를 통해 로드 시도...")
 
 config_utils.init_assets(ai_size=BOX_SIZE)
 
-print(f"로드된 AI 프레임 수: {len(config_utils.ai_frames)}")
-print(f"로드된 Player 프레임 수: {len(config_utils.player_frames)}")
-
+log.info("로드된 AI 프레임 수: %d", len(config_utils.ai_frames))
+log.info("로드된 Player 프레임 수: %d", len(config_utils.player_frames))
 
-if get_client_socket() is None:
-    setup_client_socket()
 
-last_reconnect_attempt_time = 0.0
-RECONNECT_COOLDOWN = 1.0 
-PLAYER_FRAME_DURATION_MS = config_utils.AI_FRAME_DURATION_MS 
+# 💡 연결/재연결은 network_client의 백그라운드 스레드가 맡습니다. (게임 루프는 상태만 확인)
+start_connection(config_utils.SERVER_HOST)
 
 # ----------------- 게임 핵심 함수 -----------------
 
+def get_track_background():
+    """해상도별로 한 번만 스케일해 둔 배경을 돌려줍니다. (배경 이미지가 없으면 흰색 배경)"""
+    return render_cache.get_scaled_background(config_utils.BACKGROUND_IMAGE, (SCREEN_WIDTH, SCREEN_HEIGHT), config_utils.WHITE)
+
 def draw_track():
-    if config_utils.BACKGROUND_IMAGE:
-        
-        scaled_bg = pygame.transform.scale(config_utils.BACKGROUND_IMAGE, (SCREEN_WIDTH, SCREEN_HEIGHT))
-        screen.blit(scaled_bg, (0, 0))
-            
-    else:
-        # 배경 이미지가 없으면 기본 흰색 배경으로 설정
-        screen.fill(config_utils.WHITE)
+    screen.blit(get_track_background(), (0, 0))
 
     # 2. ⭐️ 트랙 라인 그리기 (배경 위에) ⭐️
     '''pygame.draw.line(screen, config_utils.RED, (end_x, 0), (end_x, SCREEN_HEIGHT), LINE_THICKNESS + 2) 
@@ -74,166 +84,108 @@ def draw_track():
     pygame.draw.line(screen, config_utils.BLACK, (start_x, y_player), (end_x, y_player), LINE_THICKNESS)'''
 
 def reset_game():
-    """게임 상태를 초기 상태로 되돌리고 카운트다운을 시작합니다."""
-    global current_scene, box_pos, LAST_APPLIED_SPEED, start_time, player_finish_time, last_reconnect_attempt_time
+    """게임 상태를 초기 상태로 되돌립니다. (서버 데이터는 다음 장면인 카운트다운 동안 계속 수신)"""
+    global current_scene, box_pos, LAST_APPLIED_SPEED, player_finish_time
     
     current_scene = None
     box_pos = INITIAL_BOX_POS.copy() 
     player_finish_time = None
-
-    last_reconnect_attempt_time = 0.0 
-    setup_client_socket() 
-    
-    print("--- 게임이 초기화되었습니다. 서버 데이터 수신 대기 중... ---")
-    draw_track()
-    loading_font = pygame.font.Font(None, 80)
-    loading_text_surface = loading_font.render("서버 데이터 동기화 중...", True, (50, 50, 50))
-    screen.blit(loading_text_surface, loading_text_surface.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2)))
-    pygame.display.flip()
-    
-    max_wait_attempts = 50 
-    wait_delay = 0.2       
-    received_valid_speed = False
-    
-    for attempt in range(max_wait_attempts):
-        pygame.event.pump() 
-        client_socket = get_client_socket()
-        
-        if client_socket is None:
-            setup_client_socket()
-            client_socket = get_client_socket() 
-            if client_socket is None:
-                time.sleep(wait_delay)
-                continue
-        
-        server_data = get_player_data()
-        
-        if get_client_socket() is None:
-            time.sleep(wait_delay)
-            continue
-
-        if server_data and 'speed' in server_data:
-            raw_speed = server_data['speed']
-            if raw_speed > 0.00:
-                global LAST_APPLIED_SPEED
-                LAST_APPLIED_SPEED = raw_speed * PLAYER_SPEED_CORRECTION 
-                received_valid_speed = True
-                break
-        
-        time.sleep(wait_delay) 
-
-    if received_valid_speed:
-        print(f"--- ✅ 데이터 동기화 성공! 초기 속도: {LAST_APPLIED_SPEED:.2f} (총 {attempt+1}회 시도) ---")
-    else:
-        LAST_APPLIED_SPEED = 0.0
-        print(f"--- ⚠️ 데이터 동기화 실패 (유효 속도 미수신). 게임 시작! ---")
-        
-    start_time = countdown.run_countdown_scene(screen, draw_track) 
-
-def move_ai(current_x):
-    new_x = current_x + AI_SPEED
-    if new_x + BOX_SIZE >= end_x: 
-        new_x = end_x - BOX_SIZE 
-        return new_x
-    return new_x
-
-def move_player_with_network(current_x):
-    global LAST_APPLIED_SPEED, last_reconnect_attempt_time
-    
-    client_socket = get_client_socket()
-    
-    if client_socket is None:
-        current_time = time.time()
-        if current_time - last_reconnect_attempt_time > RECONNECT_COOLDOWN:
-            setup_client_socket() 
-            last_reconnect_attempt_time = current_time
-        return current_x 
-    
+    LAST_APPLIED_SPEED = 0.0
+
+    # 연결이 끊겨 재시도 대기 중이면 기다리지 않고 바로 다시 시도
+    request_reconnect()
+    log.info("--- 게임이 초기화되었습니다. 카운트다운 동안 서버 데이터를 수신합니다. ---")
+
+def track_to_x(units):
+    """트랙 단위(0.0 출발 ~ 1.0 결승)를 화면 x 좌표로 변환합니다."""
+    return start_x + units * (end_x - BOX_SIZE - start_x)
+
+def poll_server():
+    """
+    최신 서버 데이터를 반환합니다. 연결되어 있지 않으면 None (재연결은 백그라운드에서 진행)
+    시스템 콜 없이 상태/전역 참조만 읽으므로 프레임을 멈추지 않습니다.
+    (카운트다운 중에도 매 프레임 호출되어 LAST_APPLIED_SPEED를 최신 값으로 유지합니다.)
+    """
+    global LAST_APPLIED_SPEED
+    if not is_connected():
+        return None
     server_data = get_player_data()
-    current_player_speed = LAST_APPLIED_SPEED 
+    if server_data and server_data.get('speed', 0.0) > 0.00:
+        LAST_APPLIED_SPEED = server_data['speed'] * PLAYER_SPEED_CORRECTION
+    return server_data
+
+def get_player_speed():
+    """
+    서버에서 받은 플레이어 원본 속도를 반환합니다. (연결이 없거나 0 이하이면 0.0)
+    시뮬레이션 step마다 호출되며, 보정(PLAYER_SPEED_CORRECTION)은 race_sim이 적용합니다.
+    """
+    server_data = poll_server()
+    raw_speed = 0.0
 
     if server_data and 'speed' in server_data:
         raw_speed = server_data['speed']
-        if raw_speed > 0.00: 
-             current_player_speed = raw_speed * PLAYER_SPEED_CORRECTION
-             LAST_APPLIED_SPEED = current_player_speed 
-        else:
-             current_player_speed = 0.0 
-             
-    else:
-        current_player_speed = 0.0 
-
-    new_x = current_x + current_player_speed 
-    if new_x + BOX_SIZE >= end_x:
-        new_x = end_x - BOX_SIZE 
-        return new_x
-    return new_x
-
-# ----------------- 메인 게임 루프 -----------------
-
-start_time = countdown.run_countdown_scene(screen, draw_track) 
-box_pos = INITIAL_BOX_POS.copy() 
-
-running = True
-player_finish_time = None
-winner = None
-
-if start_time is None:
-    running = False
-
-ai_current_frame_idx = 0
-ai_last_switch_ms = pygame.time.get_ticks()
-
-player_current_frame_idx = 0
-player_last_switch_ms = pygame.time.get_ticks()
-
-while running:
-    events = pygame.event.get()
-    
-    for event in events:
-        if event.type == pygame.QUIT:
-            running = False
-        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-            running = False
-
-    if current_scene is not None:
-        current_scene.process_input(events)
-        current_scene.render(screen)
+        if raw_speed <= 0.00: 
+             raw_speed = 0.0 
+        latency_trace.mark_applied()
+
+    return raw_speed
+
+# ----------------- 경주 장면 -----------------
+
+class RaceScene:
+    """
+    경주 화면: 흐른 시간만큼 고정 간격 시뮬레이션(race_sim)을 진행하고,
+    step 사이를 보간한 위치로 바뀐 영역만 그립니다. (프레임이 떨어져도 경주 결과는 같음)
+    """
+    target_fps = FPS
+
+    def __init__(self, start_time):
+        global last_anim_ms
+        self.is_running = True
+        ai_anim.reset()
+        player_anim.reset()
+        last_anim_ms = pygame.time.get_ticks()
+        self.ai_surf = ai_anim.current
+        self.player_surf = player_anim.current
+        self.sim = race_sim.RaceSimulation(AI_SPEED, PLAYER_SPEED_CORRECTION, RACE_TRACK_PX)
+        # 카운트다운이 끝난 시각(perf_counter)부터 경주 시간을 잽니다.
+        self.last_update = start_time
+        # 카운트다운/결과 화면이 화면 전체를 덮었으므로 첫 경주 프레임은 전체 flip
+        renderer.invalidate()
+
+    def process_input(self, events):
+        pass
+
+    def update(self):
+        global last_anim_ms, player_finish_time, winner, current_scene
         
-        if not current_scene.is_running:
-            reset_game()
-            
-    else:
-        # 1. AI 및 플레이어 움직임
-        box_pos['ai'] = move_ai(box_pos['ai'])
-        box_pos['player'] = move_player_with_network(box_pos['player'])
+        # 1. AI 및 플레이어 움직임 (고정 간격 step + 렌더링용 보간)
+        now = time.perf_counter()
+        sim = self.sim
+        sim.advance(now - self.last_update, get_player_speed)
+        self.last_update = now
+        ai_units, player_units = sim.interpolated()
+        box_pos['ai'] = track_to_x(ai_units)
+        box_pos['player'] = track_to_x(player_units)
         
         # 2. 애니메이션 프레임 업데이트 로직
         now_ms = pygame.time.get_ticks()
-        frame_duration = config_utils.AI_FRAME_DURATION_MS
-        
-        # AI 애니메이션
-        if len(config_utils.ai_frames) > 0 and now_ms - ai_last_switch_ms >= frame_duration:
-            ai_current_frame_idx = (ai_current_frame_idx + 1) % len(config_utils.ai_frames)
-            ai_last_switch_ms = now_ms
-
-        # 플레이어 애니메이션
-        if len(config_utils.player_frames) > 0 and now_ms - player_last_switch_ms >= PLAYER_FRAME_DURATION_MS:
-            player_current_frame_idx = (player_current_frame_idx + 1) % len(config_utils.player_frames)
-            player_last_switch_ms = now_ms
-
-        # 3. 게임 종료 확인
-        game_over_by_ai = box_pos['ai'] >= end_x - BOX_SIZE
-        game_over_by_player = box_pos['player'] >= end_x - BOX_SIZE
+        dt_ms = now_ms - last_anim_ms
+        last_anim_ms = now_ms
         
-        if game_over_by_ai or game_over_by_player:
-            
-            if game_over_by_player:
-                winner = "PLAYER"
-                player_finish_time = time.time() - start_time
-            else:
-                winner = "AI"
-                player_finish_time = 99999.0 
+        # AI 애니메이션 (항상 1배속)
+        self.ai_surf = ai_anim.advance(dt_ms)
+
+        # 플레이어 애니메이션 (AI_SPEED로 달릴 때 1배속, 멈추면 정지)
+        player_rate = 1.0
+        if config_utils.PLAYER_ANIMATION_FOLLOWS_SPEED and sim.ai_ups > 0.0:
+            player_rate = min(config_utils.ANIMATION_MAX_RATE, sim.player_ups / sim.ai_ups)
+        self.player_surf = player_anim.advance(dt_ms, player_rate)
+
+        # 3. 게임 종료 확인 (기록은 결승선을 지난 시뮬레이션 시각)
+        if sim.finished:
+            winner = sim.winner
+            player_finish_time = sim.finish_time
             
             is_win = (winner == "PLAYER")
             screen_size_tuple = (SCREEN_WIDTH, SCREEN_HEIGHT)
@@ -243,35 +195,94 @@ while running:
                 time_record=player_finish_time, 
                 is_win=is_win
             )
+            # 마지막 위치를 그린 뒤 결과 화면으로 전환
+            self.is_running = False
+        return True
 
-        # 4. 게임 화면 그리기
-        draw_track() 
+    def render(self, screen):
+        # 4. 게임 화면 그리기 (이전 프레임에 그린 영역만 배경으로 복원)
+        renderer.begin_frame()
         
         # AI 프레임 그리기
-        ai_surf = config_utils.ai_frames[ai_current_frame_idx] if len(config_utils.ai_frames) > 0 else config_utils.ai_image
-        screen.blit(ai_surf, (box_pos['ai'], y_ai - box_center_offset))
+        renderer.blit(self.ai_surf, (box_pos['ai'], y_ai - box_center_offset))
         
         # 플레이어 프레임 그리기
-        player_surf = config_utils.player_frames[player_current_frame_idx] if len(config_utils.player_frames) > 0 else config_utils.player_image
-        screen.blit(player_surf, (box_pos['player'], y_player - box_center_offset))
-        
-        # 시간 표시
-        current_time = time.time() - start_time
-        time_text_display = f"TIME: {current_time:.2f}s"
-        time_text = small_font.render(time_text_display, True, config_utils.BLACK)
-        time_rect = time_text.get_rect(topright=(SCREEN_WIDTH - 20, 20))
-        # 텍스트가 그려질 영역에 반투명 배경을 그립니다.
-        s = pygame.Surface(time_rect.size, pygame.SRCALPHA)
-        s.fill((200, 200, 200, 150))
-        screen.blit(s, time_rect.topleft)
+        renderer.blit(self.player_surf, (box_pos['player'], y_player - box_center_offset))
         
-        # 💡 (2) 텍스트를 그립니다. 💡
-        screen.blit(time_text, time_rect)
+        # 시간 표시 (반투명 배경 + 텍스트를 재사용 버퍼 하나에 조합)
+        current_time = self.sim.clock
+        time_surface, time_area = timer_text.compose(f"TIME: {current_time:.2f}s")
+        time_rect = time_area.copy()
+        time_rect.topright = (SCREEN_WIDTH - 20, 20)
+        renderer.blit(time_surface, time_rect, time_area)
+
+        # 서버 연결이 끊긴 동안 연결 상태 표시 (재연결은 백그라운드에서 진행)
+        if not is_connected():
+            renderer.blit(connection_text, (20, 20))
         
-        pygame.display.flip()
-        clock.tick(FPS) 
+        # 바뀐 영역만 화면에 반영 (장면 전환 직후에는 전체 flip)
+        renderer.present()
+        latency_trace.mark_frame()
+
+# ----------------- 장면 전환 / 공통 이벤트 -----------------
+
+def start_countdown():
+    return countdown.CountdownScene((SCREEN_WIDTH, SCREEN_HEIGHT), draw_track, poll_server)
+
+def next_scene(finished_scene):
+    """카운트다운 -> 경주 -> 결과 화면 -> (재시작) 카운트다운 -> ..."""
+    if isinstance(finished_scene, countdown.CountdownScene):
+        if LAST_APPLIED_SPEED > 0.0:
+            log.info("--- ✅ 데이터 동기화 성공! 초기 속도: %.2f ---", LAST_APPLIED_SPEED)
+        else:
+            log.warning("--- ⚠️ 유효 속도 미수신 (연결 상태: %s). 게임 시작! ---", get_connection_state())
+        return RaceScene(finished_scene.start_time)
+    if isinstance(finished_scene, RaceScene):
+        return current_scene
+    reset_game()
+    return start_countdown()
+
+def handle_global_event(event):
+    if event.type == pygame.QUIT:
+        scheduler.stop()
+    if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+        scheduler.stop()
+    # F3: 구간별 지연 리포트 (p50/p95/p99) + 프레임 페이싱 통계 출력
+    if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+        latency_trace.print_report()
+        stats = scheduler.pacer.get_stats()
+        log.info("[PACING] 목표 %d FPS, 평균 간격 %.2fms, 지터 p50 %.3fms / p95 %.3fms / max %.3fms, 밀린 프레임 %d (n=%d)",
+                 stats["fps"], stats["mean_ms"], stats["jitter_p50_ms"], stats["jitter_p95_ms"],
+                 stats["jitter_max_ms"], stats["late_frames"], stats["n"])
+        link = get_link_stats()
+        age = link["age_ms"]
+        log.info("[NET] %s, 프로토콜 v%d, 마지막 seq %s, 누락 프레임 %d, 데이터 나이 %s",
+                 link["transport"], link["protocol"], link["last_seq"], link["dropped"], f"{age:.1f}ms" if age is not None else "미측정")
+    # 창이 다시 보이는 등 화면 내용이 사라진 경우 전체 다시 그리기
+    if event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE):
+        renderer.invalidate()
+
+# ----------------- 메인 게임 루프 -----------------
+
+# 💡 경주 화면은 바뀐 영역(스프라이트, HUD)만 갱신합니다.
+renderer = render_cache.DirtyRectRenderer(screen, get_track_background())
+
+# 💡 캐릭터별 재생 위치만 따로 두고 프레임은 config_utils의 애니메이션 저장소와 공유합니다.
+ai_anim = animation.AnimationPlayer(config_utils.ai_animation)
+player_anim = animation.AnimationPlayer(config_utils.player_animation)
+
+box_pos = INITIAL_BOX_POS.copy() 
+last_anim_ms = pygame.time.get_ticks()
+
+player_finish_time = None
+winner = None
+
+# 💡 장면별 목표 프레임레이트로 루프를 돌리고, 결과 화면처럼 멈춰 있는 장면은 입력이 올 때까지 잠듭니다.
+scheduler = scene_scheduler.SceneScheduler(screen, next_scene, handle_global_event)
+scheduler.run(start_countdown())
 
 # ----------------- 종료 -----------------
 close_client_socket()
+leaderboard.close()
 pygame.quit()
-sys.exit()
\ No newline at end of file
+sys.exit()
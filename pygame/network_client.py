@@ -1,148 +1,673 @@
+import os
+import random
+import select
 import socket
+import struct
 import json
-import select
+import logging
+import sys
+import threading
 import time
 
+# 💡 공용 모듈(common/log_utils.py) 경로 추가 (독립 실행 시에도 필요)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import log_utils
+import game_protocol
+import latency_trace
+
+log = log_utils.get_logger("network_client")
+
 # ----------------- 소켓 통신 설정 -----------------
-HOST = '127.0.0.1'
+HOST = '127.0.0.1' # 게임에서는 start_connection(config_utils.SERVER_HOST)로 지정
 PORT = 65432
+UDP_PORT = 65432 # 서버 config.UDP_PORT
+
+# 💡 지연 추적용 시계 오프셋 측정: 연결 직후 짧은 간격으로 몇 번, 이후에는 느린 주기로 ping
+PING_BURST_COUNT = 5
+PING_BURST_INTERVAL = 0.2
+PING_INTERVAL = 5.0
+
+# 💡 수신 스레드 설정
+RECV_BUFFER_SIZE = 4096 # recv_into에 재사용하는 고정 버퍼 크기
+RECV_TIMEOUT = 0.1 # 수신 대기 중 ping 주기를 확인하기 위한 타임아웃 (초)
+MAX_PARTIAL_LINE = 64 * 1024 # 줄바꿈 없이 이만큼 쌓이면 버림
+
+# 💡 프로토콜 협상 (common/game_protocol.py): 연결 직후 hello로 지원 버전을 알리고 서버가 고른 형식으로 받습니다.
+#    서버가 HANDSHAKE_TIMEOUT 안에 답하지 않으면 (이전 서버, testserver) 계속 JSON 라인으로 받습니다.
+PROTOCOL_VERSIONS = (game_protocol.PROTO_JSON, game_protocol.PROTO_BINARY) # PROTO_JSON만 두면 hello를 보내지 않음
+HANDSHAKE_TIMEOUT = 1.0 # (초)
+
+# 💡 UDP 전송 우선: 서버에 UDP로 구독하고, 응답이 없거나 끊기면 기존 TCP로 자동 전환합니다.
+#    UDP는 재전송/순서 대기가 없어 (Wi-Fi 등에서) 오래된 값 뒤에 새 값이 밀리지 않습니다. seq가 이전 이하인 프레임은 버림
+#    재연결할 때마다 UDP부터 다시 시도하고, TCP로 받는 동안에도 UDP_RETRY_INTERVAL마다 구독을 시험해 응답이 오면 UDP로 돌아갑니다.
+USE_UDP = True
+UDP_HEARTBEAT_INTERVAL = 1.0 # 구독(heartbeat) 재전송 주기 (초, 서버 UDP_SUBSCRIBER_TIMEOUT_MS보다 짧게)
+UDP_STALE_TIMEOUT = 2.0 # 구독 후 이 시간 동안 프레임이 없으면 TCP로 전환 (초, 서버 keepalive 0.5초)
+UDP_RETRY_INTERVAL = 10.0 # TCP로 받는 동안 UDP 구독을 다시 시험하는 주기 (초)
+
+# 💡 연결 관리 스레드 설정 (연결/재연결은 모두 백그라운드에서, 게임 루프는 상태만 읽음)
+CONNECT_TIMEOUT = 3.0 # 연결 시도 1번의 최대 시간 (초, 백그라운드 스레드에서만 대기)
+BACKOFF_INITIAL_S = 0.25 # 첫 재시도 대기 시간
+BACKOFF_MAX_S = 5.0 # 재시도 대기 시간 상한
+BACKOFF_MULTIPLIER = 2.0 # 실패할 때마다 대기 시간 배수
+BACKOFF_JITTER = 0.5 # 대기 시간을 [delay*(1-JITTER), delay] 범위에서 무작위로 (여러 클라이언트 동시 재접속 분산)
+
+# 전송 방식
+TRANSPORT_TCP = "TCP"
+TRANSPORT_UDP = "UDP"
+
+# 연결 상태
+STATE_STOPPED = "STOPPED" # 관리 스레드가 실행 중이 아님
+STATE_CONNECTING = "CONNECTING" # 연결 시도 중
+STATE_CONNECTED = "CONNECTED" # 연결됨 (수신 중)
+STATE_BACKOFF = "BACKOFF" # 실패 후 재시도 대기 중
 
 client_socket = None
-data_buffer = ""
+connection_state = STATE_STOPPED
+transport = TRANSPORT_TCP # 현재(또는 마지막) 연결의 전송 방식
+connect_failures = 0 # 연속 연결 실패 횟수 (연결되면 0)
+next_retry_time = 0.0 # BACKOFF 상태에서 다음 시도 시각 (time.monotonic)
 last_data_time = 0.0
+next_ping_time = 0.0
+pings_sent = 0
+
+# 수신 프로토콜 / 프레임 통계 (연결마다 초기화, 수신 스레드만 갱신)
+protocol = game_protocol.PROTO_JSON
+last_frame_seq = None # 마지막으로 받은 SPEED 프레임 seq
+dropped_frames = 0 # seq로 확인한 누락 프레임 수
+last_server_ms = None # 마지막 SPEED 프레임의 서버 시각 (서버 monotonic ms)
+
+# 🌟 수신 스레드가 최신 값을 dict 하나로 통째로 교체합니다.
+#    (참조 대입은 원자적이므로 렌더 스레드는 락 없이 읽기만 하면 됩니다.)
+last_successful_data = {"speed": 0.0}
+_manager_thread = None
+_stop_event = threading.Event() # 관리 스레드 종료 요청
+_wake_event = threading.Event() # 재시도 대기를 건너뛰고 바로 연결 시도
 
 # =====================================================
-# ✅ 서버 연결 설정
+# ✅ 서버 연결 관리 (백그라운드 스레드)
 # =====================================================
-def setup_client_socket():
-    """서버에 연결을 시도하고 성공 시 논블로킹 소켓을 설정합니다."""
-    global client_socket, data_buffer, last_data_time
+def backoff_delay(failures):
+    """연속 failures번 실패 후의 재시도 대기 시간 (지수 증가 + 지터)"""
+    delay = min(BACKOFF_MAX_S, BACKOFF_INITIAL_S * BACKOFF_MULTIPLIER ** max(0, failures - 1))
+    return random.uniform(delay * (1.0 - BACKOFF_JITTER), delay)
+
+
+def _reset_session(proto, kind):
+    """새 연결(TCP 접속 / UDP 구독)마다 시계 오프셋, ping 주기, 프레임 통계를 초기화합니다."""
+    global last_data_time, next_ping_time, pings_sent, protocol, transport
+    global last_frame_seq, dropped_frames, last_server_ms
+    latency_trace.reset_clock()
+    next_ping_time = 0.0
+    pings_sent = 0
+    last_data_time = time.time()
+    protocol = proto
+    transport = kind
+    last_frame_seq = None
+    dropped_frames = 0
+    last_server_ms = None
+
+
+def _connect_once():
+    """TCP 연결 1번 시도 (관리 스레드에서만 호출). 성공 시 소켓, 실패 시 None"""
+    global client_socket, connection_state
+    connection_state = STATE_CONNECTING
+    try:
+        sock = socket.create_connection((HOST, PORT), timeout=CONNECT_TIMEOUT)
+    except OSError as e:
+        if connect_failures == 0:
+            log.warning("❌ 서버 연결 실패: %s (백그라운드에서 재시도)", e)
+        else:
+            log_utils.log_once_per(log, logging.DEBUG, "서버 연결 재시도 실패 (%d회): %s",
+                                   connect_failures + 1, e, interval=5.0, key="reconnect")
+        return None
+    if _stop_event.is_set(): # 연결되는 동안 종료 요청
+        sock.close()
+        return None
+
+    sock.settimeout(RECV_TIMEOUT)
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # ping/hello가 묶여서 늦게 나가지 않도록
+    except OSError:
+        pass
+    _reset_session(game_protocol.PROTO_JSON, TRANSPORT_TCP)
+    client_socket = sock
+    connection_state = STATE_CONNECTED
+    log.info("✅ 서버에 연결 성공: %s:%d", HOST, PORT)
+    return sock
+
+
+def _connection_loop():
+    """
+    연결 -> 수신 -> (끊기면) 지수 백오프 후 재연결을 stop 요청 전까지 반복합니다.
+    USE_UDP면 매 회차 먼저 UDP로 구독하고, 구독이 성립하지 않거나 끊기면 같은 회차에 바로 TCP로 연결합니다.
+    TCP 수신 중 UDP 시험 구독에 응답이 오면 TCP를 닫고 백오프 없이 그 소켓으로 UDP 세션을 엽니다.
+    """
+    global connect_failures, connection_state, next_retry_time
+    udp_sock = None # TCP 수신 중 구독이 확인된 UDP 소켓
+    while not _stop_event.is_set():
+        if USE_UDP:
+            if _udp_session(udp_sock):
+                connect_failures = 0
+            udp_sock = None
+            if _stop_event.is_set():
+                break
+
+        sock = _connect_once()
+        if sock is not None:
+            connect_failures = 0
+            udp_sock = _receive_loop(sock)
+            if _stop_event.is_set():
+                _close_udp_probe(udp_sock)
+                break
+            if udp_sock is not None:
+                continue
+            # 연결 중 끊김: 첫 재시도는 BACKOFF_INITIAL_S 후
+        else:
+            connect_failures += 1
+
+        delay = backoff_delay(connect_failures)
+        connection_state = STATE_BACKOFF
+        next_retry_time = time.monotonic() + delay
+        _wake_event.wait(delay)
+        _wake_event.clear()
+    connection_state = STATE_STOPPED
+
+
+def _open_udp_socket():
+    """서버 UDP 포트로 connect한 논블로킹 소켓. connect: 서버가 없으면 (로컬) recv가 ConnectionRefusedError"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect((HOST, UDP_PORT))
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _log_udp_unavailable(msg, *args):
+    """UDP 구독이 성립하지 않음: 처음에만 INFO, 연속 실패 중(서버 꺼짐 등)에는 TCP 재시도처럼 DEBUG로 가끔만 기록"""
+    if connect_failures == 0:
+        log.info(msg, *args)
+    else:
+        log_utils.log_once_per(log, logging.DEBUG, msg, *args, interval=5.0, key="udp_unavailable")
 
-    if client_socket:
+
+def _udp_session(sock=None):
+    """
+    UDP 구독 세션 1번 (관리 스레드에서만 호출).
+    구독 후 HANDSHAKE_TIMEOUT 안에 프레임이 오지 않거나, 받던 프레임이 UDP_STALE_TIMEOUT 동안 끊기면 반환합니다.
+    sock: TCP 수신 중 구독이 확인된 소켓 (None이면 새로 엶)
+    반환: 구독이 한 번이라도 성립했으면(프레임을 받았으면) True
+    """
+    global client_socket, connection_state
+    if sock is None:
         try:
-            client_socket.close()
-        except Exception:
+            sock = _open_udp_socket()
+        except OSError as e:
+            _log_udp_unavailable("UDP 소켓을 열 수 없습니다 (%s). TCP로 연결합니다.", e)
+            return False
+
+    _reset_session(game_protocol.PROTO_BINARY, TRANSPORT_UDP)
+    client_socket = sock
+    connection_state = STATE_CONNECTING
+    recv_buf = bytearray(RECV_BUFFER_SIZE)
+    recv_view = memoryview(recv_buf)
+    partial = bytearray() # 데이터그램 = 프레임 1개이므로 항상 비움
+    subscribed = False
+    next_heartbeat = 0.0
+    deadline = time.monotonic() + HANDSHAKE_TIMEOUT
+
+    try:
+        while client_socket is sock:
+            now = time.monotonic()
+            if now >= deadline:
+                if subscribed:
+                    log.warning("UDP 수신이 %.1f초 동안 끊겼습니다. TCP로 전환합니다.", UDP_STALE_TIMEOUT)
+                else:
+                    _log_udp_unavailable("서버가 UDP 구독에 응답하지 않습니다. TCP로 연결합니다.")
+                break
+            if now >= next_heartbeat:
+                sock.send(_UDP_SUBSCRIBE)
+                next_heartbeat = now + UDP_HEARTBEAT_INTERVAL
+            if subscribed:
+                send_ping_if_due(sock)
+
+            if not select.select([sock], [], [], RECV_TIMEOUT)[0]:
+                continue
+            # 💡 쌓인 데이터그램을 모두 읽습니다. 오래된(seq가 이전 이하) 프레임은 process_frames가 버림
+            while True:
+                try:
+                    n = sock.recv_into(recv_buf)
+                except BlockingIOError:
+                    break
+                try:
+                    process_frames(recv_buf, recv_view, n, partial) # 받은 n bytes만 풂
+                    if partial:
+                        raise ValueError("프레임이 잘린 데이터그램") # 데이터그램 = 프레임 1개
+                except (ValueError, struct.error) as e:
+                    partial.clear()
+                    log_utils.log_once_per(log, logging.DEBUG, "UDP: 잘못된 데이터그램 버림 (%d bytes): %s",
+                                           n, e, interval=5.0, key="udp_bad_frame")
+                    continue # 깨진 데이터그램 하나만 버림 (구독 성립/수신으로 치지 않음)
+                partial.clear()
+                deadline = time.monotonic() + UDP_STALE_TIMEOUT
+                if not subscribed:
+                    subscribed = True
+                    connection_state = STATE_CONNECTED
+                    log.info("✅ 서버에 UDP로 구독 성공: %s:%d", HOST, UDP_PORT)
+    except (OSError, ValueError) as e:
+        # 서버 UDP 포트가 닫혀 있음(ConnectionRefusedError) 또는 close_client_socket()으로 닫힘 (select에 닫힌 소켓: ValueError)
+        if client_socket is sock:
+            if subscribed:
+                log.warning("UDP 수신 오류 (%s). TCP로 전환합니다.", e)
+            else:
+                _log_udp_unavailable("UDP 구독 실패 (%s). TCP로 연결합니다.", e)
+    finally:
+        recv_view.release()
+        if client_socket is sock:
+            client_socket = None
+            connection_state = STATE_CONNECTING
+            try:
+                sock.close()
+            except Exception:
+                pass
+    return subscribed
+
+
+def _send_udp_probe(probe):
+    """
+    (TCP 수신 중) UDP 구독을 시험합니다. 서버가 받아들이면 프레임이 probe 소켓으로 옵니다.
+    반환: 시험 소켓 (열거나 보낼 수 없으면 닫고 None)
+    """
+    try:
+        if probe is None:
+            probe = _open_udp_socket()
+        probe.send(_UDP_SUBSCRIBE)
+    except OSError as e:
+        log.debug("UDP 시험 구독 실패: %s", e)
+        _close_udp_probe(probe, unsubscribe=False)
+        return None
+    return probe
+
+
+def _udp_probe_answered(probe):
+    """시험 구독에 SPEED 프레임이 왔으면 True. 서버 UDP 포트가 닫혀 있으면 (로컬) OSError"""
+    try:
+        data = probe.recv(RECV_BUFFER_SIZE)
+    except BlockingIOError:
+        return False
+    return data[:2] == game_protocol.MAGIC and len(data) > 3 and data[3] == game_protocol.TYPE_SPEED
+
+
+def _close_udp_probe(probe, unsubscribe=True):
+    """쓰지 않는 시험 소켓을 닫습니다. (서버가 구독 만료를 기다리지 않도록 구독 해제를 보냄)"""
+    if probe is None:
+        return
+    if unsubscribe:
+        try:
+            probe.send(_UDP_UNSUBSCRIBE)
+        except OSError:
             pass
-        client_socket = None
+    try:
+        probe.close()
+    except Exception:
+        pass
 
-    data_buffer = ""
-    last_data_time = time.time()
 
+def start_connection(host=None):
+    """
+    연결 관리 스레드를 시작합니다. (이미 실행 중이면 아무것도 하지 않음)
+    즉시 반환하며, 연결 여부는 get_connection_state()로 확인합니다.
+    host: 서버 주소 (None이면 HOST 유지)
+    """
+    global _manager_thread, connection_state, HOST
+    if _manager_thread is not None and _manager_thread.is_alive():
+        return
+    if host:
+        HOST = host
+    _stop_event.clear()
+    _wake_event.clear()
+    connection_state = STATE_CONNECTING
+    _manager_thread = threading.Thread(target=_connection_loop, name="network_client", daemon=True)
+    _manager_thread.start()
+
+
+def request_reconnect():
+    """백오프 대기 중이면 기다리지 않고 바로 다시 연결을 시도합니다. (게임 재시작 시 등)"""
+    if connection_state != STATE_CONNECTED:
+        _wake_event.set()
+
+
+def get_connection_state():
+    return connection_state
+
+
+def is_connected():
+    return connection_state == STATE_CONNECTED
+
+
+def setup_client_socket():
+    """(호환용) 연결 관리 스레드를 시작하고 현재 연결 여부를 반환합니다. 블로킹하지 않습니다."""
+    start_connection()
+    request_reconnect()
+    return is_connected()
+
+def send_ping_if_due(sock):
+    """시계 오프셋 측정용 ping을 보낼 시간이면 보냅니다. (실패해도 무시)"""
+    global next_ping_time, pings_sent
+    now = time.time()
+    if now < next_ping_time:
+        return
     try:
-        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client_socket.settimeout(3)
-        client_socket.connect((HOST, PORT))
-        client_socket.setblocking(False)
-
-        print(f"✅ 서버에 연결 성공: {HOST}:{PORT}")
-        return True
-    except Exception as e:
-        print(f"❌ 서버 연결 실패: {e}")
-        client_socket = None
+        sock.send(latency_trace.make_ping())
+    except OSError:
+        pass
+    pings_sent += 1
+    next_ping_time = now + (PING_BURST_INTERVAL if pings_sent < PING_BURST_COUNT else PING_INTERVAL)
+
+_UDP_SUBSCRIBE = json.dumps({"subscribe": {"versions": [game_protocol.PROTO_BINARY]}}).encode("utf-8")
+_UDP_UNSUBSCRIBE = b'{"unsubscribe": true}'
+
+
+def _send_hello(sock):
+    """지원 프로토콜 버전을 알립니다. 보냈으면 True (응답을 기다림)"""
+    if game_protocol.PROTO_BINARY not in PROTOCOL_VERSIONS:
+        return False
+    try:
+        sock.send((json.dumps({"hello": {"versions": list(PROTOCOL_VERSIONS)}}) + "\n").encode("utf-8"))
+    except OSError:
         return False
+    return True
 
 # =====================================================
-# ✅ 서버 데이터 수신
+# ✅ 서버 데이터 수신 (백그라운드 스레드)
 # =====================================================
-import json
-import select
-import time
-import socket
+def _handle_lines(carried, view):
+    """
+    pong 응답이 섞인 청크를 처리합니다. (연결 초기와 PING_INTERVAL마다만 발생)
+    pong은 모두 시계 오프셋에 반영하고, 속도 라인은 마지막 것만 파싱합니다.
+    carried: 이전 청크에서 이어져 이번에 완성된 라인 (없으면 None)
+    """
+    lines = bytes(view).split(b"\n")
+    if carried is not None:
+        lines.insert(0, carried)
+    speed_line = None
+    for line in lines:
+        if b'"pong"' in line:
+            try:
+                latency_trace.on_pong(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                pass
+        elif line:
+            speed_line = line
+    if speed_line is not None:
+        _publish_line(speed_line)
 
-# 💡 전역 변수: 클라이언트 코드에서 반드시 전역으로 정의하고 유지해야 합니다.
-# ⚠️ 주의: 실제 사용 환경에 맞게 이 변수들이 main 스코프에 선언되어 있어야 합니다.
-# client_socket = None 
-# data_buffer = ""
-# last_data_time = 0.0
-last_successful_data = {"speed": 0.0}
 
-def get_player_data():
-    print("get_player_data 함수 실행")
+def _publish_line(line):
+    """가장 최신 완성 라인 하나만 파싱하여 last_successful_data를 교체합니다."""
+    global last_successful_data, last_data_time
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return
+    if not isinstance(data, dict) or "pong" in data:
+        return
+    if "t" in data:
+        latency_trace.mark_parsed(data["t"])
+    last_successful_data = data
+    last_data_time = time.time()
+
+
+def _feed_lines(data, partial):
+    """(협상 직후 1번) 남은 JSON 바이트를 process_chunk와 같은 방식으로 처리합니다."""
+    last_nl = data.rfind(b"\n")
+    if last_nl < 0:
+        partial += data
+        return
+    prev_nl = data.rfind(b"\n", 0, last_nl)
+    if prev_nl >= 0:
+        _publish_line(data[prev_nl + 1:last_nl])
+    else:
+        partial += data[:last_nl]
+        _publish_line(partial)
+    partial[:] = data[last_nl + 1:]
+
+
+def _negotiate(recv_view, n, partial):
     """
-    TCP 소켓에서 데이터를 수신하여 \n 기준으로 JSON을 파싱합니다.
-    (client_socket, data_buffer, last_data_time, last_successful_data 변수는 전역으로 가정)
+    hello 응답({"proto": N} 라인)을 찾습니다. 없으면 None (이번 청크는 평소처럼 JSON으로 처리)
+    찾으면 응답 앞의 JSON 라인을 처리하고, 응답 뒤 바이트는 partial에 남긴 채 N을 반환합니다.
     """
-    # 전역 변수를 사용하기 위해 선언
-    global client_socket, data_buffer, last_data_time, last_successful_data
-    
-    # 📌 1. 연결 상태 확인
-    if client_socket is None:
-        print("[DEBUG] 소켓 연결이 확인되지 않아 초기값을 반환합니다.")
-        return last_successful_data # 연결 없음 -> 마지막 성공 데이터 반환
-
+    data = bytes(partial) + bytes(recv_view[:n]) # 응답 라인이 청크 경계에 걸칠 수 있으므로 이어 붙여 검색
+    start = data.find(b'{"proto"')
+    end = data.find(b"\n", start) if start >= 0 else -1
+    if end < 0:
+        return None
     try:
-        # 2. 데이터 읽기 및 버퍼에 추가
-        while True:
-            ready_to_read, _, _ = select.select([client_socket], [], [], 0.001)
-            if not ready_to_read:
-                break
-            
+        proto = int(json.loads(data[start:end])["proto"])
+    except (ValueError, KeyError, TypeError):
+        proto = game_protocol.PROTO_JSON
+    partial.clear()
+    _feed_lines(data[:start], partial)
+    partial[:] = data[end + 1:]
+    return proto
+
+
+def _publish_frame(buf, offset):
+    """SPEED 프레임 하나를 풀어 last_successful_data를 교체합니다. (JSON 메시지와 같은 키 + seq/rms/서버 시각)"""
+    global last_successful_data, last_data_time, last_server_ms
+    seq, server_ms, speeds, rms_scores, trace = game_protocol.decode_speed(buf, offset)
+    if trace is not None:
+        latency_trace.mark_parsed([trace[0], trace[1], server_ms])
+    last_server_ms = server_ms
+    last_successful_data = {"speed": speeds[0] if speeds else 0.0, "speeds": list(speeds),
+                            "rms": list(rms_scores), "seq": seq, "server_ms": server_ms}
+    last_data_time = time.time()
+
+
+def process_frames(recv_buf, recv_view, n, partial):
+    """
+    (바이너리 프로토콜) recv_buf[:n]에 새로 받은 데이터를 프레임 단위로 나눕니다.
+    밀린 SPEED 프레임은 seq만 확인하고 마지막 프레임만 풀며, 미완성 프레임은 partial에 보관합니다.
+    스트림이 어긋나면(magic 불일치, 헤더 길이와 내용 불일치) ValueError
+    """
+    global last_frame_seq, dropped_frames, last_data_time
+    if partial:
+        partial += recv_view[:n]
+        buf, end = partial, len(partial)
+    else:
+        buf, end = recv_view[:n], n # 받은 n bytes 밖(이전 청크의 남은 바이트)은 읽지 않도록
+
+    header_size = game_protocol.HEADER.size
+    offset = 0
+    latest = -1
+    while end - offset >= header_size:
+        length = game_protocol.frame_length(buf, offset)
+        if end - offset < length:
+            break
+        kind = buf[offset + 3]
+        if kind == game_protocol.TYPE_SPEED:
+            seq = game_protocol.frame_seq(buf, offset)
+            if last_frame_seq is None:
+                latest = offset
+                last_frame_seq = seq
+            else:
+                gap = game_protocol.seq_gap(last_frame_seq, seq)
+                if gap >= 0:
+                    dropped_frames += gap
+                    latest = offset
+                    last_frame_seq = seq
+                else:
+                    last_data_time = time.time() # keepalive 재전송: 값은 같으므로 다시 풀지 않음
+        elif kind == game_protocol.TYPE_PONG:
+            server_ms, ping_ms = game_protocol.decode_pong(buf, offset)
+            latency_trace.on_pong({"pong": ping_ms, "server": server_ms})
+        offset += length
+
+    if latest >= 0:
+        _publish_frame(buf, latest)
+
+    if buf is partial:
+        del partial[:offset]
+    else:
+        partial[:] = recv_view[offset:n]
+
+
+def process_chunk(recv_buf, recv_view, n, partial):
+    """
+    recv_buf[:n]에 새로 받은 데이터를 '\n' 단위로 프레이밍합니다.
+    밀린 여러 줄 중 마지막 완성 속도 라인만 파싱하고, 남은 미완성 라인은 partial에 보관합니다.
+    pong 라인은 (청크 경계에 걸쳐 있어도) 모두 처리합니다.
+    """
+    last_nl = recv_buf.rfind(b"\n", 0, n)
+    if last_nl < 0:
+        if len(partial) > MAX_PARTIAL_LINE:
+            partial.clear() # 줄바꿈 없는 비정상 데이터
+        partial += recv_view[:n]
+        return
+
+    # 이전 청크의 미완성 라인을 먼저 완성합니다. (라인이 청크 경계에 걸친 pong일 수도 있음)
+    start = 0
+    carried = None
+    if partial:
+        first_nl = recv_buf.find(b"\n", 0, n)
+        partial += recv_view[:first_nl]
+        carried = partial
+        start = first_nl + 1
+
+    if recv_buf.find(b'"pong"', start, last_nl) >= 0 or (carried is not None and b'"pong"' in carried):
+        _handle_lines(carried, recv_view[start:last_nl])
+    elif start < last_nl:
+        # 마지막 라인 전체가 이번 청크 안에 있음 -> 이어진 라인(carried)은 더 오래된 값이므로 파싱하지 않음
+        prev_nl = recv_buf.rfind(b"\n", start, last_nl)
+        if prev_nl + 1 < last_nl:
+            _publish_line(bytes(recv_view[prev_nl + 1 if prev_nl >= 0 else start:last_nl]))
+        else:
+            _handle_lines(carried, recv_view[start:last_nl]) # 빈 줄로 끝난 청크: 앞의 속도 라인을 찾음
+    elif carried is not None:
+        _publish_line(carried)
+
+    partial[:] = recv_view[last_nl + 1:n]
+
+
+def _receive_loop(sock):
+    """
+    소켓에서 데이터를 받아 process_chunk로 넘깁니다.
+    recv_into로 고정 bytearray 버퍼를 재사용하므로 청크마다 str/bytes를 새로 만들지 않습니다.
+    USE_UDP면 UDP_RETRY_INTERVAL마다 UDP 구독을 시험합니다.
+    반환: 시험 구독에 응답이 와서 TCP를 끝냈으면 그 UDP 소켓, 아니면 None
+    """
+    global client_socket, connection_state, protocol
+    recv_buf = bytearray(RECV_BUFFER_SIZE)
+    recv_view = memoryview(recv_buf)
+    partial = bytearray() # 이전 청크에서 이어지는 미완성 라인 (바이너리면 미완성 프레임)
+    probe = None # UDP 시험 구독 소켓
+    udp_sock = None
+    next_probe_time = time.monotonic() + UDP_RETRY_INTERVAL if USE_UDP else None
+
+    # 💡 hello 응답을 기다리는 동안은 ping을 보내지 않습니다. (pong이 협상 전 형식으로 오지 않도록)
+    awaiting_proto = _send_hello(sock)
+    handshake_deadline = time.monotonic() + HANDSHAKE_TIMEOUT
+
+    while client_socket is sock:
+        now = time.monotonic()
+        if awaiting_proto and now >= handshake_deadline:
+            awaiting_proto = False
+            log.info("서버가 프로토콜 협상에 응답하지 않습니다. JSON 라인으로 수신합니다.")
+        if not awaiting_proto:
+            send_ping_if_due(sock)
+        if next_probe_time is not None:
+            if now >= next_probe_time:
+                probe = _send_udp_probe(probe)
+                next_probe_time = now + UDP_RETRY_INTERVAL
+            if probe is not None:
+                try:
+                    if _udp_probe_answered(probe):
+                        log.info("UDP 구독에 응답이 왔습니다. UDP로 전환합니다.")
+                        udp_sock, probe = probe, None
+                        break
+                except OSError as e:
+                    log.debug("UDP 시험 구독 실패: %s", e)
+                    _close_udp_probe(probe, unsubscribe=False)
+                    probe = None
+        try:
+            n = sock.recv_into(recv_buf)
+        except socket.timeout:
+            continue
+        except OSError:
+            break # close_client_socket()으로 닫혔거나 연결 오류
+
+        if n == 0:
+            log.info("서버가 연결을 닫았습니다.")
+            break
+
+        if protocol == game_protocol.PROTO_BINARY:
             try:
-                chunk = client_socket.recv(1024)
-            except BlockingIOError:
-                break
-                
-            if not chunk:
-                # 서버에서 연결이 정상적으로 종료된 경우
-                print("[INFO] 서버가 연결을 닫았습니다.")
-                client_socket.close()
-                client_socket = None
+                process_frames(recv_buf, recv_view, n, partial)
+            except (ValueError, struct.error) as e:
+                log.error("잘못된 프레임 수신 (%s). 다시 연결합니다.", e)
                 break
-                
-            data_buffer += chunk.decode("utf-8")
-            last_data_time = time.time()
-        
-        
-        # 📌 3. 버퍼 상태 출력 (수신된 데이터 확인)
-        if data_buffer:
-            print(f"[RAW BUFFER] 현재 버퍼 내용: {repr(data_buffer)}")
-
-        # 4. '\n' 기준으로 모든 JSON 처리
-        results = []
-        
-        while "\n" in data_buffer:
-            json_line, data_buffer = data_buffer.split("\n", 1)
-            
-            if not json_line.strip():
+            continue
+
+        if awaiting_proto:
+            proto = _negotiate(recv_view, n, partial)
+            if proto is not None:
+                awaiting_proto = False
+                protocol = proto
+                log.info("프로토콜 버전 %d (%s)", proto, '바이너리 프레임' if proto == game_protocol.PROTO_BINARY else 'JSON 라인')
+                if proto == game_protocol.PROTO_BINARY:
+                    try:
+                        process_frames(recv_buf, recv_view, 0, partial) # 응답 뒤에 이미 받은 프레임
+                    except (ValueError, struct.error) as e:
+                        log.error("잘못된 프레임 수신 (%s). 다시 연결합니다.", e)
+                        break
+                else:
+                    data = bytes(partial)
+                    partial.clear()
+                    _feed_lines(data, partial)
                 continue
-                
-            try:
-                # JSON 문자열을 딕셔너리로 변환
-                data = json.loads(json_line)
-                results.append(data)
-                
-                # 🌟 성공적으로 파싱된 데이터를 전역 변수에 저장
-                last_successful_data = data 
-                
-            except json.JSONDecodeError as e:
-                # 💡 JSON 디코딩 실패 시 (데이터 손상 또는 불완전)
-                print(f"[ERROR/JSON] JSON 디코딩 실패. 오류: {e}, 라인: {repr(json_line.strip())}")
-                # 디코딩 실패 라인은 버려지고, data_buffer에는 남은 불완전한 데이터만 남습니다.
-                
-
-        # 5. 결과 반환 및 디버깅
-        if results:
-            # 새로운 결과가 있다면 최신 데이터 반환
-            print(f"[client] 반환 성공 : {results}")
-            return results[-1]
-        else:
-            # 💡 results가 비었지만 data_buffer에 데이터가 남아있는 경우:
-            if data_buffer:
-                print(f"[DEBUG] results는 비었지만 버퍼에 데이터({len(data_buffer)} 바이트)가 남아있음. 다음 호출에서 처리될 예정: {repr(data_buffer[:50])}...")
-            
-            # 🌟 새로운 데이터 수신에는 실패했으나, 
-            # 🌟 마지막으로 성공했던 데이터를 반환하여 안정적인 값 흐름을 유지합니다.
-            print(f"[client] 새로운 데이터 없음. 마지막 성공 데이터 반환: {last_successful_data}")
-            return last_successful_data 
-
-    except Exception as e:
-        print(f"[UNKNOWN ERROR/SPEED] 예외: {e}")
-        # 예외 발생 시 소켓 정리 (원래 코드와 동일)
-        if client_socket:
-            client_socket.close()
-            client_socket = None
-        # 예외 발생 시에도 마지막 성공 데이터를 반환하여 갑작스러운 값 변경을 방지
-        return last_successful_data
+
+        process_chunk(recv_buf, recv_view, n, partial)
+
+    recv_view.release()
+    _close_udp_probe(probe)
+    if client_socket is sock:
+        client_socket = None
+        connection_state = STATE_CONNECTING
+        try:
+            sock.close()
+        except Exception:
+            pass
+    return udp_sock
+
+
+def get_player_data():
+    """
+    수신 스레드가 마지막으로 파싱한 서버 데이터를 반환합니다.
+    렌더 루프에서 매 프레임 호출되며, 시스템 콜 없이 전역 참조 하나만 읽습니다.
+    """
+    return last_successful_data
+
+
+def get_data_age_ms():
+    """
+    (바이너리 프로토콜) 마지막 속도 값이 서버에서 계산된 뒤 지난 시간(ms).
+    서버 시각이 없거나 시계 오프셋을 아직 측정하지 못했으면 None
+    """
+    server_ms = last_server_ms
+    offset = latency_trace.clock_offset_ms
+    if server_ms is None or offset is None:
+        return None
+    return latency_trace.now_ms() + offset - server_ms
+
+
+def get_link_stats():
+    """수신 프로토콜과 프레임 누락/지연 통계 (F3 리포트용)"""
+    return {"transport": transport, "protocol": protocol, "last_seq": last_frame_seq, "dropped": dropped_frames,
+            "age_ms": get_data_age_ms()}
 
 
 def get_client_socket():
@@ -150,30 +675,47 @@ def get_client_socket():
 
 
 def close_client_socket():
-    """클라이언트 소켓 안전하게 닫기"""
+    """연결 관리 스레드를 멈추고 클라이언트 소켓을 안전하게 닫습니다. (수신 루프는 recv 오류로 종료됨)"""
     global client_socket
-    if client_socket:
+    _stop_event.set()
+    _wake_event.set()
+    sock = client_socket
+    client_socket = None
+    if sock:
+        if transport == TRANSPORT_UDP:
+            try:
+                sock.send(_UDP_UNSUBSCRIBE) # 서버가 구독 만료를 기다리지 않고 바로 전송을 멈추도록
+            except OSError:
+                pass
         try:
-            client_socket.close()
+            sock.shutdown(socket.SHUT_RDWR)
+        except Exception:
+            pass
+        try:
+            sock.close()
         except Exception:
             pass
-        client_socket = None
 
 
 # =====================================================
 # ✅ 독립 실행용
 # =====================================================
 if __name__ == "__main__":
-    if not setup_client_socket():
+    log_utils.setup_logging("DEBUG")
+    start_connection()
+    deadline = time.monotonic() + CONNECT_TIMEOUT
+    while not is_connected() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    if not is_connected():
+        close_client_socket()
         exit(1)
 
-    print("🔄 서버 데이터 수신 시작. Ctrl+C로 종료")
+    log.info("🔄 서버 데이터 수신 시작. Ctrl+C로 종료")
     try:
         while True:
             data = get_player_data()
-            # data가 None이면 아직 JSON 완성 안 됨
+            log.debug("최신 데이터: %s", data)
             time.sleep(0.05)  # 50ms 간격
     except KeyboardInterrupt:
-        print("\n🛑 종료 요청. 클라이언트 소켓 닫는 중...")
-        if client_socket:
-            client_socket.close()
+        log.info("🛑 종료 요청. 클라이언트 소켓 닫는 중...")
+        close_client_socket()
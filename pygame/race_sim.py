@@ -0,0 +1,120 @@
+# race_sim.py
+# 화면/프레임레이트와 무관한 고정 시간 간격(fixed timestep) 경주 시뮬레이션입니다.
+#
+# - 위치는 '트랙 단위'로 기록합니다: 출발선 0.0 ~ 결승선 1.0
+# - 속도는 트랙 단위/초 입니다. 기존 튜닝 값(AI_SPEED, PLAYER_SPEED_CORRECTION)은 "60FPS에서 프레임당 픽셀"이므로
+#   트랙 길이(픽셀, track_length_px)로 나눠 변환합니다. 어떤 화면 폭의 트랙 길이를 쓸지는 게임 설정
+#   (config_utils.RACE_REFERENCE_WIDTH)이 정합니다.
+# - 렌더링은 advance()로 흐른 시간만큼 고정 간격 step을 돌린 뒤, 남은 시간 비율(alpha)로
+#   직전/현재 상태를 보간해서 그립니다. -> 느린 PC에서도 같은 결과
+# - pygame을 import하지 않으므로 화면 없이 실제 시간보다 빠르게 돌릴 수 있습니다. (run_headless)
+
+SIM_HZ = 120 # 시뮬레이션 step 주기 (초당 횟수)
+REFERENCE_FPS = 60 # 기존 프레임당 속도 값이 튜닝된 프레임레이트
+MAX_CATCHUP_S = 0.25 # 한 번에 따라잡을 최대 시간 (긴 멈춤 후 step이 폭주하지 않도록)
+NO_RECORD_TIME = 99999.0 # AI 승리 시 기록 (기존 규칙과 동일)
+
+
+def track_length_px(screen_width, box_size, start_ratio, finish_ratio):
+    """화면 폭에서의 트랙 길이(픽셀): 캐릭터 왼쪽 끝이 출발선 ~ 오른쪽 끝이 결승선 (end_x - BOX_SIZE - start_x)"""
+    return screen_width * finish_ratio - box_size - screen_width * start_ratio
+
+
+def per_frame_to_ups(per_frame_px, track_px, reference_fps=REFERENCE_FPS):
+    """기존 '프레임당 픽셀' 속도를 '트랙 단위/초'로 변환합니다."""
+    return per_frame_px * reference_fps / track_px
+
+
+class RaceSimulation:
+    """
+    AI와 플레이어 1명의 경주 상태.
+    track_px: 속도 변환에 쓰는 트랙 길이 (픽셀, track_length_px)
+    player_speed_func() -> 서버 원본 속도 (step마다 호출, 0 이하면 정지)
+    """
+
+    def __init__(self, ai_speed, player_speed_correction, track_px, sim_hz=SIM_HZ):
+        self.dt = 1.0 / sim_hz
+        self.ai_ups = per_frame_to_ups(ai_speed, track_px)
+        self.player_ups_per_speed = per_frame_to_ups(player_speed_correction, track_px)
+        self.reset()
+
+    def reset(self):
+        self.time = 0.0 # 진행된 step의 시뮬레이션 시각 (s)
+        self.accumulator = 0.0 # 아직 step으로 처리하지 않은 시간 (s)
+        self.ai = 0.0
+        self.player = 0.0
+        self.prev_ai = 0.0
+        self.prev_player = 0.0
+        self.player_ups = 0.0 # 마지막 step의 플레이어 속도
+        self.steps = 0
+        self.winner = None # "PLAYER" / "AI"
+        self.finish_time = None
+
+    @property
+    def finished(self):
+        return self.winner is not None
+
+    @property
+    def clock(self):
+        """화면에 표시할 경과 시간 (step + 남은 누적 시간)"""
+        return self.finish_time if self.finished else self.time + self.accumulator
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.dt
+
+    def step(self, raw_speed):
+        """고정 간격 dt만큼 진행합니다."""
+        if self.finished:
+            return
+        dt = self.dt
+        self.prev_ai = self.ai
+        self.prev_player = self.player
+
+        player_ups = raw_speed * self.player_ups_per_speed if raw_speed > 0.0 else 0.0
+        self.player_ups = player_ups
+        ai = self.ai + self.ai_ups * dt
+        player = self.player + player_ups * dt
+        self.ai = ai if ai < 1.0 else 1.0
+        self.player = player if player < 1.0 else 1.0
+        self.steps += 1
+
+        # 기존 규칙: 같은 step에 둘 다 도착하면 플레이어 승리
+        if self.player >= 1.0:
+            self.winner = "PLAYER"
+            # step 안에서 결승선을 지난 시각까지 보간해 기록 (dt에 따른 오차 제거)
+            self.finish_time = self.time + (1.0 - self.prev_player) / self.player_ups
+        elif self.ai >= 1.0:
+            self.winner = "AI"
+            self.finish_time = NO_RECORD_TIME
+        self.time += dt
+
+    def advance(self, elapsed_s, player_speed_func):
+        """실제로 흐른 시간만큼 step을 돌립니다. 처리한 step 수를 반환합니다."""
+        self.accumulator += min(elapsed_s, MAX_CATCHUP_S)
+        steps = 0
+        while self.accumulator >= self.dt and not self.finished:
+            self.step(player_speed_func())
+            self.accumulator -= self.dt
+            steps += 1
+        if self.finished:
+            self.accumulator = 0.0
+        return steps
+
+    def interpolated(self):
+        """렌더링용 (AI 위치, 플레이어 위치): 직전 step과 현재 step 사이를 alpha로 보간"""
+        if self.finished:
+            return self.ai, self.player
+        a = self.alpha
+        return (self.prev_ai + (self.ai - self.prev_ai) * a,
+                self.prev_player + (self.player - self.prev_player) * a)
+
+    def run_headless(self, speed_at, max_time_s=120.0):
+        """
+        화면 없이 경주가 끝날 때까지 최대한 빨리 돌립니다.
+        speed_at(t) -> 시뮬레이션 시각 t(s)의 서버 원본 속도
+        (winner, finish_time)을 반환하고, max_time_s 안에 끝나지 않으면 winner는 None입니다.
+        """
+        while not self.finished and self.time < max_time_s:
+            self.step(speed_at(self.time))
+        return self.winner, self.finish_time
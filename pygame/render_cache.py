@@ -0,0 +1,114 @@
+import pygame
+
+# =====================================================================
+# 🚀 배경 캐시 + 변경 영역(dirty rect) 렌더러
+# =====================================================================
+# - 배경은 해상도별로 한 번만 스케일해 두고 재사용합니다. (매 프레임 전체 해상도 리샘플 제거)
+# - 경주 화면에서는 스프라이트/HUD가 그려진 영역만 배경으로 복원하고
+#   pygame.display.update(rects)로 그 영역만 화면에 반영합니다.
+# - 장면이 바뀔 때(카운트다운/결과 화면 이후)만 invalidate()로 전체 flip 합니다.
+
+_background_cache = {} # (원본 id, 크기) -> (원본, 스케일된 배경)
+
+
+def get_scaled_background(source, size, fill_color=(255, 255, 255)):
+    """
+    원본 배경을 화면 크기로 스케일한 Surface를 돌려줍니다. (해상도별로 1번만 생성)
+    원본이 없으면 fill_color로 채운 Surface를 캐시합니다.
+    """
+    key = (id(source), tuple(size))
+    cached = _background_cache.get(key)
+    if cached is not None and cached[0] is source:
+        return cached[1]
+
+    if source is not None:
+        # 에셋 캐시가 이미 화면 크기로 스케일해 둔 경우 그대로 사용
+        scaled = source if source.get_size() == tuple(size) else pygame.transform.scale(source, size)
+    else:
+        scaled = pygame.Surface(size)
+        scaled.fill(fill_color)
+    # 💡 화면과 같은 픽셀 형식으로 맞춰 두면 부분 복원 blit이 변환 없이 복사만 합니다.
+    if pygame.display.get_surface() is not None:
+        scaled = scaled.convert()
+
+    _background_cache[key] = (source, scaled)
+    return scaled
+
+
+def clear_background_cache():
+    _background_cache.clear()
+
+
+def merge_rects(rects):
+    """겹치는 사각형을 합쳐 display.update에 넘길 사각형 수를 줄입니다."""
+    merged = []
+    for rect in rects:
+        if not rect.width or not rect.height:
+            continue
+        rect = rect.copy()
+        i = 0
+        while i < len(merged):
+            if rect.colliderect(merged[i]):
+                rect.union_ip(merged.pop(i))
+                i = 0 # 합쳐진 사각형이 다른 것과 다시 겹칠 수 있음
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
+
+
+class DirtyRectRenderer:
+    """
+    고정 배경 위에 움직이는 스프라이트를 그릴 때 바뀐 영역만 갱신합니다.
+
+    사용 순서 (매 프레임):
+        renderer.begin_frame()      # 이전 프레임에 그린 영역을 배경으로 복원
+        renderer.blit(surf, pos)    # 그린 영역을 기록
+        renderer.present()          # 이전 + 현재 영역만 display.update
+    """
+
+    def __init__(self, screen, background=None):
+        self.screen = screen
+        self.background = background
+        self._prev_rects = [] # 이전 프레임에 그린 영역 (이번 프레임에 지워야 함)
+        self._rects = [] # 이번 프레임에 그린 영역
+        self._full_redraw = True
+        self.full_flips = 0
+        self.partial_updates = 0
+
+    def set_background(self, background):
+        if background is not self.background:
+            self.background = background
+            self.invalidate()
+
+    def invalidate(self):
+        """다음 present()에서 화면 전체를 다시 그리고 flip 합니다. (장면 전환 후 호출)"""
+        self._full_redraw = True
+
+    def begin_frame(self):
+        screen = self.screen
+        background = self.background
+        if self._full_redraw:
+            if background is not None:
+                screen.blit(background, (0, 0))
+            self._prev_rects = []
+        elif background is not None:
+            for rect in self._prev_rects:
+                screen.blit(background, rect, rect)
+        self._rects = []
+
+    def blit(self, surface, pos, area=None):
+        rect = self.screen.blit(surface, pos, area)
+        self._rects.append(rect)
+        return rect
+
+    def present(self):
+        if self._full_redraw:
+            pygame.display.flip()
+            self._full_redraw = False
+            self.full_flips += 1
+        else:
+            pygame.display.update(merge_rects(self._prev_rects + self._rects))
+            self.partial_updates += 1
+        self._prev_rects = self._rects
+        self._rects = []
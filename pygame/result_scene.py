@@ -1,52 +1,37 @@
 import pygame
 import sys
+import text_cache
+import leaderboard
 # config_utils에서 랭킹 함수 및 상수 임포트
-from config_utils import load_high_scores, save_high_scores, clear_high_scores 
+from config_utils import load_high_scores, save_race_result, clear_high_scores, get_race_rank
 
 # ----------------- 결과 화면 씬 클래스 -----------------
 
 class ResultScene:
+    # 💡 정지 화면이므로 입력이 있을 때만 다시 그리고 그 외에는 이벤트를 기다리며 잠듭니다. (scene_scheduler)
+    target_fps = 0
+
     def __init__(self, screen_size, time_record, is_win):
         self.time = round(time_record, 2)
         self.is_win = is_win
         self.is_running = True
         self.SCREEN_WIDTH, self.SCREEN_HEIGHT = screen_size
 
-        self.high_scores = load_high_scores()
-        self.rank, self.is_ranked = self._check_rank_and_update(save_if_ranked=True)
-        
-        # 폰트 로딩 (안전하게)
-        try:
-            self.font_big = pygame.font.Font("C:/Windows/Fonts/malgun.ttf", 80)
-            self.font_medium = pygame.font.Font("C:/Windows/Fonts/malgun.ttf", 45)
-            self.font_small = pygame.font.Font("C:/Windows/Fonts/malgun.ttf", 30)
-        except Exception:
-            self.font_big = pygame.font.Font(None, 80)
-            self.font_medium = pygame.font.Font(None, 45)
-            self.font_small = pygame.font.Font(None, 30)
-
-    def _check_rank_and_update(self, save_if_ranked=True):
-        """현재 기록을 검사하고, Top 3에 들면 파일을 업데이트합니다."""
-        
-        all_scores = [s for s in self.high_scores if s < 99999.0]
-        
-        if self.time < 99999.0:
-            all_scores.append(self.time)
-            
-        all_scores.sort()
-        
-        # 현재 기록의 순위 계산
-        rank = len([s for s in all_scores if s < self.time]) + 1
+        # 💡 모든 경주를 DB에 기록하고, 순위는 기록 전에 인덱스 조회 1번으로 계산합니다.
+        self.rank, self.day_rank = save_race_result(self.time, is_win)
+        self.is_ranked = self.rank <= 3
+        self._load_boards()
         
-        is_ranked = rank <= 3
+        # 폰트 로딩 (text_cache가 프로세스당 1번만 로드, 실패 시 기본 폰트)
+        self.font_path = text_cache.KOREAN_FONT_PATH
         
-        if save_if_ranked and self.is_win and is_ranked:
-            new_scores = self.high_scores + [self.time]
-            # config_utils의 save_high_scores 사용
-            save_high_scores(new_scores)
-            self.high_scores = load_high_scores()
-            
-        return rank, is_ranked
+        # 💡 결과 화면은 랭킹이 바뀔 때만 화면 전체를 1장의 Surface로 조합해 둡니다.
+        self._layout = None
+
+    def _load_boards(self):
+        """전체(현재 시즌) / 오늘 TOP 3 (leaderboard가 캐시하므로 기록이 바뀌지 않으면 DB를 읽지 않음)"""
+        self.high_scores = load_high_scores()
+        self.today_scores = load_high_scores(leaderboard.today())
 
     def process_input(self, events):
         """입력 이벤트를 처리합니다. (재시작, 종료, 랭킹 초기화)"""
@@ -60,8 +45,11 @@ class ResultScene:
             
             # config_utils의 clear_high_scores 사용
             clear_high_scores()
-            self.high_scores = load_high_scores() 
-            self.rank, self.is_ranked = self._check_rank_and_update(save_if_ranked=False)
+            self._load_boards()
+            # 새 시즌에서의 현재 기록 순위 (기록은 이전 시즌에 저장되어 있음)
+            self.rank = self.day_rank = get_race_rank(self.time, self.is_win)
+            self.is_ranked = self.rank <= 3
+            self._layout = None # 랭킹이 바뀌었으므로 다시 조합
         
         # 2. 개별 키 입력 처리 (ESC, ENTER)
         for event in events:
@@ -74,48 +62,65 @@ class ResultScene:
                     #    가장 간단한 방법은 pygame에 QUIT 이벤트를 직접 보내는 것입니다.
                     pygame.event.post(pygame.event.Event(pygame.QUIT))
             
-    def render(self, screen):
-        """화면을 렌더링합니다."""
-        screen.fill((20, 20, 50))
+    def _text(self, size, text, color):
+        return text_cache.render(self.font_path, size, text, color)
+
+    def _compose_layout(self):
+        """결과 화면 전체를 Surface 1장에 그립니다."""
+        layout = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
+        layout.fill((20, 20, 50))
         center_x = self.SCREEN_WIDTH // 2
         
         # 1. 승패 텍스트
         title_text = "승리!" if self.is_win else "패배..."
         title_color = (0, 255, 0) if self.is_win else (255, 0, 0)
-        title_surface = self.font_big.render(title_text, True, title_color)
-        screen.blit(title_surface, title_surface.get_rect(center=(center_x, 100)))
+        title_surface = self._text(80, title_text, title_color)
+        layout.blit(title_surface, title_surface.get_rect(center=(center_x, 100)))
 
         # 2. 시간 표시
         time_display = f"{self.time}초" if self.time < 99999.0 else "기록 없음"
         time_text = f"기록: {time_display}"
-        time_surface = self.font_medium.render(time_text, True, (255, 255, 255))
-        screen.blit(time_surface, time_surface.get_rect(center=(center_x, 200)))
+        time_surface = self._text(45, time_text, (255, 255, 255))
+        layout.blit(time_surface, time_surface.get_rect(center=(center_x, 200)))
         
         # 3. 랭킹 여부 표시
         if self.is_ranked and self.is_win:
             rank_text = f"★ {self.rank}위 달성! TOP 3 진입! ★"
             color = (255, 215, 0)
         else:
-            rank_text = f"순위: {self.rank}위"
+            rank_text = f"순위: {self.rank}위 (오늘 {self.day_rank}위)"
             color = (200, 200, 200)
             
-        rank_surface = self.font_medium.render(rank_text, True, color)
-        screen.blit(rank_surface, rank_surface.get_rect(center=(center_x, 280)))
+        rank_surface = self._text(45, rank_text, color)
+        layout.blit(rank_surface, rank_surface.get_rect(center=(center_x, 280)))
         
-        # 4. 최고 기록 목록
+        # 4. 최고 기록 목록 (왼쪽: 전체, 오른쪽: 오늘)
         score_y_start = 380
-        title_surface = self.font_medium.render("TOP 3 BEST TIMES", True, (150, 150, 255))
-        screen.blit(title_surface, title_surface.get_rect(center=(center_x, score_y_start)))
+        column_offset = self.SCREEN_WIDTH // 5
+        for column_x, board_title, scores in ((center_x - column_offset, "TOP 3 BEST TIMES", self.high_scores),
+                                              (center_x + column_offset, "TODAY TOP 3", self.today_scores)):
+            title_surface = self._text(45, board_title, (150, 150, 255))
+            layout.blit(title_surface, title_surface.get_rect(center=(column_x, score_y_start)))
 
-        for i, score in enumerate(self.high_scores):
-            score_display = f"#{i+1}: {score:.2f} seconds" if score < 99999.0 else f"#{i+1}: ---"
-            score_text = self.font_medium.render(score_display, True, (255, 255, 255))
-            text_rect = score_text.get_rect(center=(center_x, score_y_start + 60 + i * 50))
-            screen.blit(score_text, text_rect)
+            for i, score in enumerate(scores):
+                score_display = f"#{i+1}: {score:.2f} seconds" if score < 99999.0 else f"#{i+1}: ---"
+                score_text = self._text(45, score_display, (255, 255, 255))
+                text_rect = score_text.get_rect(center=(column_x, score_y_start + 60 + i * 50))
+                layout.blit(score_text, text_rect)
             
         # 5. 재시작/초기화 힌트
         hint_text = "ENTER: 재시작 | ESC: 종료 | L-SHIFT + ENTER: 랭킹 초기화"
-        hint_surface = self.font_small.render(hint_text, True, (100, 100, 100))
-        screen.blit(hint_surface, hint_surface.get_rect(center=(center_x, self.SCREEN_HEIGHT - 30)))
+        hint_surface = self._text(30, hint_text, (100, 100, 100))
+        layout.blit(hint_surface, hint_surface.get_rect(center=(center_x, self.SCREEN_HEIGHT - 30)))
+        
+        if pygame.display.get_surface() is not None:
+            layout = layout.convert()
+        return layout
+
+    def render(self, screen):
+        """화면을 렌더링합니다. (조합해 둔 레이아웃을 한 번에 blit)"""
+        if self._layout is None:
+            self._layout = self._compose_layout()
+        screen.blit(self._layout, (0, 0))
         
-        pygame.display.flip()
\ No newline at end of file
+        pygame.display.flip()
@@ -0,0 +1,160 @@
+import time
+from collections import deque
+import pygame
+
+# =====================================================================
+# 🚀 장면 스케줄러 + 프레임 페이싱
+# =====================================================================
+# 장면(scene) 객체는 다음을 가집니다. (ResultScene 형식)
+#   target_fps   : 목표 프레임레이트. 0이면 '대기 장면' -> 입력/변화가 있을 때만 그리고
+#                  그 외에는 pygame.event.wait로 잠들어 CPU를 쓰지 않습니다.
+#   is_running   : False가 되면 스케줄러가 next_scene_func로 다음 장면을 받아 전환합니다.
+#   process_input(events), render(screen)
+#   update()     : (선택) 매 루프 호출, True를 반환하면 대기 장면도 다시 그립니다.
+
+SPIN_MARGIN_S = 0.002 # 마감 시각 이만큼 전까지는 sleep, 이후는 busy-wait (OS sleep 오차 보정)
+IDLE_WAIT_MS = 500 # 대기 장면에서 이벤트를 기다리는 최대 시간 (update() 확인 주기)
+PACING_HISTORY = 600 # 지터 통계에 사용할 최근 프레임 수
+
+
+class FramePacer:
+    """
+    목표 프레임레이트에 맞춰 기다립니다. (sleep + 마지막 SPIN_MARGIN_S는 spin)
+    실제 프레임 간격과 목표 간격의 차이(지터)를 기록합니다.
+    """
+
+    def __init__(self, fps=0, spin_margin_s=SPIN_MARGIN_S):
+        self.spin_margin_s = spin_margin_s
+        self.intervals = deque(maxlen=PACING_HISTORY) # 실제 프레임 간격 (s)
+        self.late_frames = 0 # 목표 간격을 1프레임 이상 넘긴 횟수
+        self.stats_fps = 0 # 통계가 측정된 목표 FPS (대기 장면 동안에도 마지막 값을 유지)
+        self.set_rate(fps)
+
+    def set_rate(self, fps):
+        self.fps = fps
+        self.period = 1.0 / fps if fps > 0 else 0.0
+        if fps > 0 and fps != self.stats_fps:
+            self.intervals.clear()
+            self.late_frames = 0
+            self.stats_fps = fps
+        self.reset()
+
+    def reset(self):
+        """장면 전환/대기 후에는 밀린 프레임을 몰아서 처리하지 않도록 기준 시각을 다시 잡습니다."""
+        self._deadline = None
+        self._last_frame = None
+
+    def tick(self):
+        """다음 프레임 마감 시각까지 기다리고 직전 프레임부터의 경과 시간(s)을 반환합니다."""
+        now = time.perf_counter()
+        if self.period <= 0.0:
+            dt = 0.0 if self._last_frame is None else now - self._last_frame
+            self._last_frame = now
+            return dt
+
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += self.period
+        if self._deadline < now - self.period:
+            # 한 프레임 이상 밀림 -> 따라잡으려 연속으로 달리지 않고 기준 재설정
+            self.late_frames += 1
+            self._deadline = now
+
+        remaining = self._deadline - now
+        if remaining > self.spin_margin_s:
+            time.sleep(remaining - self.spin_margin_s)
+        deadline = self._deadline
+        while time.perf_counter() < deadline:
+            pass
+
+        frame_time = time.perf_counter()
+        dt = 0.0
+        if self._last_frame is not None:
+            dt = frame_time - self._last_frame
+            self.intervals.append(dt)
+        self._last_frame = frame_time
+        return dt
+
+    def get_stats(self):
+        """{"fps", "n", "mean_ms", "jitter_p50_ms", "jitter_p95_ms", "jitter_max_ms", "late_frames"}"""
+        period = 1.0 / self.stats_fps if self.stats_fps > 0 else 0.0
+        values = sorted(abs(v - period) * 1000.0 for v in self.intervals)
+        n = len(values)
+        mean = sum(self.intervals) / n if n else 0.0
+        return {
+            "fps": self.stats_fps,
+            "n": n,
+            "mean_ms": mean * 1000.0,
+            "jitter_p50_ms": values[n // 2] if n else 0.0,
+            "jitter_p95_ms": values[min(n - 1, int(n * 0.95))] if n else 0.0,
+            "jitter_max_ms": values[-1] if n else 0.0,
+            "late_frames": self.late_frames,
+        }
+
+
+class SceneScheduler:
+    """
+    현재 장면의 이벤트 처리/갱신/렌더링 루프를 소유합니다.
+    next_scene_func(끝난 장면) -> 다음 장면 (None이면 종료)
+    event_hook(event): 모든 장면에 공통인 이벤트 처리 (종료 키, 디버그 키 등)
+    """
+
+    def __init__(self, screen, next_scene_func, event_hook=None):
+        self.screen = screen
+        self.next_scene_func = next_scene_func
+        self.event_hook = event_hook
+        self.pacer = FramePacer()
+        self.running = True
+        self.renders = 0 # 실제로 그린 프레임 수 (대기 장면 확인용)
+
+    def stop(self):
+        self.running = False
+
+    def _poll_events(self, idle):
+        if not idle:
+            return pygame.event.get()
+        # 💡 대기 장면: 이벤트가 올 때까지 잠듦 (CPU 0%에 가깝게)
+        first = pygame.event.wait(IDLE_WAIT_MS)
+        if first.type == pygame.NOEVENT:
+            return []
+        return [first] + pygame.event.get()
+
+    def run(self, scene):
+        """scene부터 시작해 stop()이 호출되거나 다음 장면이 None일 때까지 실행합니다."""
+        while self.running and scene is not None:
+            self._run_scene(scene)
+            if not self.running:
+                break
+            scene = self.next_scene_func(scene)
+
+    def _run_scene(self, scene):
+        self.pacer.set_rate(scene.target_fps)
+        needs_render = True # 장면에 들어오면 최소 1번은 그림
+
+        while self.running and scene.is_running:
+            idle = scene.target_fps <= 0
+            events = self._poll_events(idle and not needs_render)
+
+            if self.event_hook is not None:
+                for event in events:
+                    self.event_hook(event)
+                if not self.running:
+                    break
+
+            if events:
+                scene.process_input(events)
+                needs_render = True
+            if not scene.is_running:
+                break
+
+            update = getattr(scene, "update", None)
+            if update is not None and update():
+                needs_render = True
+
+            if not idle or needs_render:
+                scene.render(self.screen)
+                self.renders += 1
+                needs_render = False
+
+            if not idle:
+                self.pacer.tick()
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+import pygame
+import log_utils
+
+log = log_utils.get_logger(__name__)
+
+# =====================================================================
+# 🚀 텍스트 Surface 캐시
+# =====================================================================
+# - 폰트는 (경로, 크기)별로 프로세스에서 1번만 로드합니다.
+# - font.render 결과는 (폰트, 크기, 텍스트, 색상) 키로 LRU 캐시에 보관합니다.
+# - 타이머처럼 매 프레임 바뀌는 숫자 문자열은 글자(glyph)별로 미리 렌더해 두고
+#   재사용 버퍼에 이어 붙이기만 합니다. (GlyphText)
+
+TEXT_CACHE_SIZE = 256 # LRU에 보관할 최대 텍스트 Surface 수
+KOREAN_FONT_PATH = "C:/Windows/Fonts/malgun.ttf" # 한글 표시용 폰트 (없으면 기본 폰트)
+
+_fonts = {} # (경로, 크기) -> Font
+_missing_fonts = set() # 로드에 실패한 경로 (경고는 1번만)
+_surfaces = OrderedDict() # (경로, 크기, 텍스트, 색상, antialias) -> Surface
+hits = 0
+misses = 0
+
+
+def get_font(path, size):
+    """폰트를 로드합니다. (경로가 None이거나 로드에 실패하면 pygame 기본 폰트)"""
+    key = (path, size)
+    font = _fonts.get(key)
+    if font is None:
+        try:
+            if path in _missing_fonts:
+                raise FileNotFoundError(path)
+            font = pygame.font.Font(path, size)
+        except Exception as e:
+            if path is not None and path not in _missing_fonts:
+                _missing_fonts.add(path)
+                log.warning("폰트 로드 실패 (%s: %s). 기본 폰트를 사용합니다.", path, e)
+            font = pygame.font.Font(None, size)
+        _fonts[key] = font
+    return font
+
+
+def render(path, size, text, color, antialias=True):
+    """렌더된 텍스트 Surface를 돌려줍니다. (반환된 Surface는 공유되므로 수정하지 마세요)"""
+    global hits, misses
+    key = (path, size, text, tuple(color), antialias)
+    surf = _surfaces.get(key)
+    if surf is not None:
+        hits += 1
+        _surfaces.move_to_end(key)
+        return surf
+
+    misses += 1
+    surf = get_font(path, size).render(text, antialias, color)
+    _surfaces[key] = surf
+    if len(_surfaces) > TEXT_CACHE_SIZE:
+        _surfaces.popitem(last=False)
+    return surf
+
+
+def clear():
+    _surfaces.clear()
+
+
+class GlyphText:
+    """
+    자주 바뀌는 짧은 문자열(예: "TIME: 12.34s")을 글자 단위로 조합합니다.
+    글자 Surface는 처음 1번만 렌더하고, 조합 결과는 재사용 버퍼 하나에 그립니다.
+    prefix로 준 고정 문구는 한 덩어리로 렌더해 두고 blit 1번으로 붙입니다.
+    (글자 사이 커닝은 적용되지 않으므로 숫자/고정폭에 가까운 문자열에 사용)
+    """
+
+    def __init__(self, path, size, color, background=None, prefix="", preload="0123456789.:- "):
+        self.font = get_font(path, size)
+        self.color = color
+        self.background = background # 버퍼 배경색 (RGBA, None이면 투명)
+        self.height = self.font.get_height()
+        self.prefix = prefix
+        self._prefix_surface = self.font.render(prefix, True, color) if prefix else None
+        self._glyphs = {} # 글자 -> (Surface, 폭)
+        self._buffer = None
+        for ch in preload:
+            self._glyph(ch)
+
+    def _glyph(self, ch):
+        glyph = self._glyphs.get(ch)
+        if glyph is None:
+            surf = self.font.render(ch, True, self.color)
+            glyph = self._glyphs[ch] = (surf, surf.get_width())
+        return glyph
+
+    def compose(self, text):
+        """
+        text를 버퍼에 그리고 (버퍼, 사용한 영역 Rect)를 반환합니다.
+        버퍼는 다음 compose 호출 때 다시 쓰이므로 바로 blit(버퍼, 위치, 영역)해서 사용합니다.
+        """
+        head = None
+        if self._prefix_surface is not None and text.startswith(self.prefix):
+            head = self._prefix_surface
+            text = text[len(self.prefix):]
+
+        glyphs = self._glyphs
+        width = head.get_width() if head is not None else 0
+        for ch in text:
+            width += (glyphs.get(ch) or self._glyph(ch))[1]
+
+        buffer = self._buffer
+        if buffer is None or buffer.get_width() < width:
+            buffer = self._buffer = pygame.Surface((max(width, 1), self.height), pygame.SRCALPHA)
+
+        area = pygame.Rect(0, 0, width, self.height)
+        buffer.fill(self.background or (0, 0, 0, 0), area)
+        x = 0
+        if head is not None:
+            buffer.blit(head, (0, 0))
+            x = head.get_width()
+        for ch in text:
+            surf, w = glyphs[ch]
+            buffer.blit(surf, (x, 0))
+            x += w
+        return buffer, area
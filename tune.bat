@@ -0,0 +1,7 @@
+@echo off
+REM 배치 파일이 위치한 폴더(루트 폴더)를 현재 작업 디렉토리(CWD)로 설정합니다.
+cd /d "%~dp0"
+
+REM 화면 없이 경주를 대량으로 시뮬레이션해 난이도 파라미터별 승률/완주 시간을 출력합니다.
+REM 예: tune.bat --grid AI_SPEED=1.2,1.5,1.8 --target-win-rate 0.5
+python benchmarks\race_tuning.py %*